@@ -8,6 +8,8 @@ import os
 from datetime import date, timedelta
 
 from utils import extract_oid_aid_key, is_financial_title, day_ranges, collect_links_day
+import comment_db
+from dedup_index import DedupIndex, DEDUP_DIR, NEWS, scoped
 
 # -----------------------------
 # 설정
@@ -26,6 +28,8 @@ SLEEP_SEC = 0.3
 
 OUTPUT_DIR = "../data/NAVER/article"
 OUTPUT_PATH = f"{OUTPUT_DIR}/articles_2025_financial.csv"
+DB_PATH = comment_db.DB_PATH  # None이면 SQLite 적재 안 함
+DEDUP_PATH = DEDUP_DIR         # None이면 실행 간 중복 제거 안 함 (CSV 덮어쓰기)
 
 # 금융 맥락 키워드
 FIN_KEYWORDS = [
@@ -39,8 +43,12 @@ FIN_KEYWORDS = [
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # key(oid+aid) 기준으로만 중복 제거
+    # key(oid+aid) 기준으로만 중복 제거 (이전 실행에서 저장한 key 포함)
     uniq = {}
+    dedup = DedupIndex(DEDUP_PATH) if DEDUP_PATH else None
+    news_kind = scoped(NEWS, OUTPUT_PATH)
+    if dedup is not None:
+        dedup.sync_csv(OUTPUT_PATH, news_kind, "key")
 
     days = day_ranges(YEAR)
     print(f"수집 대상 날짜 수: {len(days)}")
@@ -50,10 +58,27 @@ def main():
         for kw in KEYWORDS:
             rows = collect_links_day(kw, d, HEADERS, SLEEP_SEC, fin_keywords=FIN_KEYWORDS)
             for r in rows:
-                uniq.setdefault(r["key"], r)
+                if r["key"] in uniq:
+                    continue
+                if dedup is not None and dedup.seen(news_kind, r["key"]):
+                    continue
+                uniq[r["key"]] = r
 
     df = pd.DataFrame(uniq.values()).drop_duplicates(subset=["url"])
-    df.to_csv(OUTPUT_PATH, index=False, encoding="utf-8-sig")
+    if dedup is not None:
+        # 새 기사만 기존 CSV 뒤에 이어 씀
+        if len(df):
+            df.to_csv(OUTPUT_PATH, mode="a", header=not os.path.exists(OUTPUT_PATH),
+                      index=False, encoding="utf-8-sig")
+            dedup.add_many(news_kind, df["key"])
+            dedup.mark_csv(OUTPUT_PATH)
+    else:
+        df.to_csv(OUTPUT_PATH, index=False, encoding="utf-8-sig")
+
+    if DB_PATH:
+        con = comment_db.connect(DB_PATH)
+        comment_db.insert_articles(con, df.to_dict("records"), source="article_crawling")
+        con.close()
 
     print("\n✅ 완료")
     print("총 기사 수:", len(df))
@@ -0,0 +1,334 @@
+#%%
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import extract_oid_aid_key
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+DB_PATH = "../data/NAVER/naver.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    article_id    INTEGER PRIMARY KEY,   -- FTS content_rowid (VACUUM 해도 안 바뀜)
+    news_id       TEXT NOT NULL UNIQUE,  -- oid_aid
+    date          TEXT,                  -- YYYY-MM-DD (기사 작성일)
+    keyword       TEXT,
+    section       TEXT,
+    title         TEXT,
+    url           TEXT,
+    comment_total INTEGER,
+    rank          INTEGER,
+    source        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(date);
+CREATE INDEX IF NOT EXISTS idx_articles_keyword ON articles(keyword, date);
+CREATE INDEX IF NOT EXISTS idx_articles_section ON articles(section, date);
+
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id INTEGER PRIMARY KEY,
+    news_id    TEXT,
+    date       TEXT,                     -- YYYY-MM-DD (댓글 작성일)
+    created_at TEXT,
+    keyword    TEXT,                     -- 기사 keyword 비정규화 (인덱스용)
+    section    TEXT,
+    text       TEXT,
+    likes      INTEGER,
+    dislikes   INTEGER,
+    sort       TEXT,
+    source     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_date ON comments(date);
+CREATE INDEX IF NOT EXISTS idx_comments_news ON comments(news_id, date);
+CREATE INDEX IF NOT EXISTS idx_comments_keyword ON comments(keyword, date);
+CREATE INDEX IF NOT EXISTS idx_comments_section ON comments(section, date);
+
+-- 한국어는 조사가 붙으므로 unicode61 + prefix 인덱스로 '패닉*' 형태 검색
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    text, content='comments', content_rowid='comment_id', prefix='1 2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, content='articles', content_rowid='article_id', prefix='1 2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS comments_ai AFTER INSERT ON comments BEGIN
+    INSERT INTO comments_fts(rowid, text) VALUES (new.comment_id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_ad AFTER DELETE ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.comment_id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title) VALUES (new.article_id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title) VALUES ('delete', old.article_id, old.title);
+END;
+"""
+
+# news_id 가 TEXT PRIMARY KEY 이던 이전 스키마 → article_id 추가 (FTS 는 새로 채움)
+MIGRATE_ARTICLES = """
+BEGIN;
+DROP TRIGGER IF EXISTS articles_ai;
+DROP TRIGGER IF EXISTS articles_ad;
+DROP TABLE IF EXISTS articles_fts;
+DROP INDEX IF EXISTS idx_articles_date;
+DROP INDEX IF EXISTS idx_articles_keyword;
+DROP INDEX IF EXISTS idx_articles_section;
+ALTER TABLE articles RENAME TO articles_old;
+COMMIT;
+"""
+ARTICLE_COLUMNS = "news_id, date, keyword, section, title, url, comment_total, rank, source"
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """DB 연결 + 스키마 생성 (WAL 모드)"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    cols = [r[1] for r in con.execute("PRAGMA table_info(articles)")]
+    migrate = bool(cols) and "article_id" not in cols
+    if migrate:
+        con.executescript(MIGRATE_ARTICLES)
+    con.executescript(SCHEMA)
+    if migrate:
+        with con:
+            con.execute(f"INSERT INTO articles({ARTICLE_COLUMNS}) SELECT {ARTICLE_COLUMNS} FROM articles_old ORDER BY rowid")
+            con.execute("DROP TABLE articles_old")
+    return con
+
+
+def iso_day(s) -> Optional[str]:
+    """'2025.01.02' / '20250102' / '2025-01-02T..' → '2025-01-02'"""
+    if s is None:
+        return None
+    digits = "".join(ch for ch in str(s)[:10] if ch.isdigit())
+    if len(digits) < 8:
+        return None
+    return f"{digits[:4]}-{digits[4:6]}-{digits[6:8]}"
+
+
+def to_int(v, default=0) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return default
+
+
+# --------------------------------------------------
+# 적재 (크롤러에서 호출)
+# --------------------------------------------------
+def insert_articles(con: sqlite3.Connection, rows: Iterable[Dict], source: str = ""):
+    """
+    article_crawling / yeowon news 행을 articles 테이블에 적재 (news_id 중복은 무시).
+    기사보다 먼저 들어온 댓글의 keyword/section(NULL)은 여기서 채운다.
+    """
+    data = []
+    for r in rows:
+        news_id = r.get("news_id") or r.get("key") or extract_oid_aid_key(str(r.get("url", "")))
+        if not news_id:
+            continue
+        day = r.get("pub_date") or r.get("date") or r.get("news_date") or r.get("loop_date")
+        data.append((
+            news_id,
+            iso_day(day),
+            r.get("keyword"),
+            None if r.get("section") is None else str(r.get("section")),
+            r.get("title"),
+            r.get("url"),
+            to_int(r.get("comment_total", r.get("comment_total_all")), None),
+            to_int(r.get("rank", r.get("rank_in_section")), None),
+            source,
+        ))
+    with con:
+        con.executemany(
+            f"INSERT OR IGNORE INTO articles({ARTICLE_COLUMNS})"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            data,
+        )
+        con.executemany(
+            "UPDATE comments SET"
+            " keyword = COALESCE(keyword, (SELECT keyword FROM articles WHERE news_id = ?1)),"
+            " section = COALESCE(section, (SELECT section FROM articles WHERE news_id = ?1))"
+            " WHERE news_id = ?1 AND (keyword IS NULL OR section IS NULL)",
+            [(d[0],) for d in data],
+        )
+
+
+def insert_comments(con: sqlite3.Connection, rows: Iterable[Dict], news_id: Optional[str] = None,
+                    source: str = ""):
+    """comments_crawling_adj / yeowon 댓글 행을 comments 테이블에 적재 (comment_id 중복은 무시)"""
+    data = []
+    for r in rows:
+        cid = to_int(r.get("comment_id"), None)
+        if cid is None:
+            continue
+        nid = news_id or r.get("news_id") or extract_oid_aid_key(str(r.get("article_url", "")))
+        created = r.get("reg_time") or r.get("comment_at") or ""
+        data.append((
+            cid,
+            nid,
+            iso_day(created),
+            created,
+            r.get("contents", r.get("text_raw")),
+            to_int(r.get("sympathy", r.get("like_count"))),
+            to_int(r.get("antipathy", r.get("dislike_count"))),
+            r.get("sort"),
+            source,
+            nid,
+            nid,
+        ))
+    with con:
+        con.executemany(
+            "INSERT OR IGNORE INTO comments"
+            "(comment_id, news_id, date, created_at, text, likes, dislikes, sort, source, keyword, section)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?,"
+            " (SELECT keyword FROM articles WHERE news_id = ?),"
+            " (SELECT section FROM articles WHERE news_id = ?))",
+            data,
+        )
+
+
+def import_csv(con: sqlite3.Connection, path: str, kind: str, source: str = "", batch: int = 50_000):
+    """기존 CSV 를 batch 단위로 적재 (kind: articles | comments)"""
+    insert = insert_articles if kind == "articles" else insert_comments
+    n = 0
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        buf = []
+        for row in csv.DictReader(f):
+            buf.append(row)
+            if len(buf) >= batch:
+                insert(con, buf, source=source)
+                n += len(buf)
+                buf = []
+        insert(con, buf, source=source)
+        n += len(buf)
+    return n
+
+
+# --------------------------------------------------
+# 조회
+# --------------------------------------------------
+def fts_query(text: str) -> str:
+    """'패닉 공포' → '"패닉"* AND "공포"*' (FTS5 prefix 검색식)"""
+    terms = [t.replace('"', '""') for t in text.split() if t]
+    return " AND ".join(f'"{t}"*' for t in terms)
+
+
+def comment_filter(keyword: Optional[str] = None, section: Optional[str] = None,
+                   start: Optional[str] = None, end: Optional[str] = None,
+                   match: Optional[str] = None, title_match: Optional[str] = None,
+                   news_id: Optional[str] = None) -> Tuple[str, List]:
+    """keyword/section/날짜/news_id 인덱스 조건 + 댓글·제목 FTS 조건 → (FROM ... WHERE ... 절, 파라미터)"""
+    where, params = [], []
+    src = "comments c"
+    if match:
+        src = "comments_fts f JOIN comments c ON c.comment_id = f.rowid"
+        where.append("comments_fts MATCH ?")
+        params.append(fts_query(match))
+    if keyword:
+        where.append("c.keyword = ?")
+        params.append(keyword)
+    if section:
+        where.append("c.section = ?")
+        params.append(str(section))
+    if news_id:
+        where.append("c.news_id = ?")
+        params.append(news_id)
+    if start:
+        where.append("c.date >= ?")
+        params.append(iso_day(start))
+    if end:
+        where.append("c.date <= ?")
+        params.append(iso_day(end))
+    if title_match:
+        where.append(
+            "c.news_id IN (SELECT a.news_id FROM articles_fts af"
+            " JOIN articles a ON a.article_id = af.rowid WHERE articles_fts MATCH ?)"
+        )
+        params.append(fts_query(title_match))
+    return f" FROM {src}" + (" WHERE " + " AND ".join(where) if where else ""), params
+
+
+def query_comments(con: sqlite3.Connection, limit: int = 100, **filters) -> List[sqlite3.Row]:
+    """comment_filter 조건으로 댓글 조회 (날짜, comment_id 순)"""
+    clause, params = comment_filter(**filters)
+    sql = (
+        "SELECT c.comment_id, c.news_id, c.date, c.created_at, c.keyword, c.section,"
+        " c.likes, c.dislikes, c.text"
+        + clause
+        + " ORDER BY c.date, c.comment_id"
+        + (" LIMIT ?" if limit else "")
+    )
+    if limit:
+        params.append(limit)
+    con.row_factory = sqlite3.Row
+    return con.execute(sql, params).fetchall()
+
+
+def count_comments(con: sqlite3.Connection, **filters) -> int:
+    """comment_filter 조건에 맞는 댓글 수 (행을 가져오지 않고 COUNT)"""
+    clause, params = comment_filter(**filters)
+    return con.execute("SELECT COUNT(*)" + clause, params).fetchone()[0]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="NAVER 기사/댓글 SQLite store")
+    ap.add_argument("--db", default=DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    imp = sub.add_parser("import", help="기존 CSV 적재")
+    imp.add_argument("kind", choices=["articles", "comments"])
+    imp.add_argument("csv")
+    imp.add_argument("--source", default="")
+
+    q = sub.add_parser("query", help="댓글 조회")
+    q.add_argument("--keyword")
+    q.add_argument("--section")
+    q.add_argument("--news_id")
+    q.add_argument("--start", help="YYYY-MM-DD")
+    q.add_argument("--end", help="YYYY-MM-DD")
+    q.add_argument("--match", help="댓글 본문 검색어 (공백 = AND)")
+    q.add_argument("--title", help="기사 제목 검색어")
+    q.add_argument("--limit", type=int, default=100, help="0이면 제한 없음")
+    q.add_argument("--count", action="store_true", help="건수만 출력")
+
+    sub.add_parser("stats", help="테이블 건수")
+    args = ap.parse_args()
+
+    con = connect(args.db)
+
+    if args.cmd == "import":
+        n = import_csv(con, args.csv, args.kind, source=args.source)
+        print(f"{args.kind} 적재:", n)
+
+    elif args.cmd == "query":
+        filters = dict(keyword=args.keyword, section=args.section, start=args.start, end=args.end,
+                       match=args.match, title_match=args.title, news_id=args.news_id)
+        if args.count:
+            print(count_comments(con, **filters))
+            return
+        rows = query_comments(con, limit=args.limit, **filters)
+        w = csv.writer(sys.stdout, delimiter="\t")
+        w.writerow(rows[0].keys() if rows else [])
+        for r in rows:
+            w.writerow(list(r))
+
+    elif args.cmd == "stats":
+        for t in ("articles", "comments"):
+            print(t, con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0])
+
+
+if __name__ == "__main__":
+    main()
+
+
+#%%
+# 사용 예시
+# python comment_db.py query --keyword 삼성전자 --start 2025-03-01 --end 2025-05-31 --match 패닉
@@ -6,7 +6,10 @@ import time
 import re
 import os
 
-from utils import to_legacy_url, parse_oid_aid, safe_jsonp_load, collect_comments
+from utils import to_legacy_url, parse_oid_aid, safe_jsonp_load, collect_comments, extract_oid_aid_key
+import comment_db
+from dedup_index import DedupIndex, DEDUP_DIR, COMMENT, NEWS_COMMENTS, scoped
+from telemetry import TELEMETRY
 
 # --------------------------------------------------
 # 설정
@@ -31,6 +34,11 @@ BASE_LIST_URL = (
 
 ARTICLE_CSV = "../data/NAVER/article/articles_2025_financial.csv"
 OUTPUT_CSV = "../data/NAVER/comments/comments_2025_adj.csv"
+DB_PATH = comment_db.DB_PATH  # None이면 SQLite 적재 안 함
+DEDUP_PATH = DEDUP_DIR         # None이면 실행 간 중복 제거 안 함
+TELEMETRY_DIR = "../data/NAVER/telemetry"  # None이면 계측 파일 기록 안 함
+TELEMETRY_INTERVAL = 30
+TELEMETRY_TRACE = False
 
 PAGE_SIZE = 100      # 네이버 서버가 사실상 허용하는 최대
 MAX_PAGES = 100      # 안전 장치
@@ -48,31 +56,69 @@ def main():
 
     print("총 기사 수:", len(df))
 
+    if TELEMETRY_DIR:
+        TELEMETRY.start(TELEMETRY_DIR, interval=TELEMETRY_INTERVAL, trace=TELEMETRY_TRACE,
+                        prefix="comments_crawling_adj")
+
+    con = comment_db.connect(DB_PATH) if DB_PATH else None
+    dedup = DedupIndex(DEDUP_PATH) if DEDUP_PATH else None
+    comment_kind = scoped(COMMENT, OUTPUT_CSV)
+    done_kind = scoped(NEWS_COMMENTS, OUTPUT_CSV)
+    if dedup is not None:
+        first_seed = dedup.count(comment_kind) == 0
+        # 처음이면 CSV 전체, 아니면 지난 실행이 CSV 에 쓰고 등록하기 전에 멈춘 꼬리 행만 등록
+        dedup.sync_csv(OUTPUT_CSV, comment_kind, "comment_id")
+        if first_seed:
+            dedup.seed_from_csv(OUTPUT_CSV, done_kind, "article_url", transform=extract_oid_aid_key)
+
     for i, row in df.iterrows():
         article_url = row["url"]
+        news_id = extract_oid_aid_key(article_url)
+
+        # 이전 실행에서 댓글 수집을 끝낸 기사는 건너뜀
+        if dedup is not None and news_id and dedup.seen(done_kind, news_id):
+            continue
+
         print(f"[{i+1}/{len(df)}] 댓글 수집:", article_url)
 
-        comments = collect_comments(article_url, PAGE_SIZE, PAGE_SLEEP)
-        print("  수집 댓글 수:", len(comments))
+        comments, complete = collect_comments(article_url, PAGE_SIZE, PAGE_SLEEP, dedup=dedup, kind=comment_kind)
+        print("  수집 댓글 수:", len(comments), "" if complete else "(중간에 실패, 다음 실행에서 다시)")
 
         if comments:
-            out_df = pd.DataFrame(comments)
-            out_df.to_csv(
-                OUTPUT_CSV,
-                mode="a",
-                header=first_write,
-                index=False,
-                encoding="utf-8-sig"
-            )
-            first_write = False
-
-        time.sleep(ARTICLE_SLEEP)
+            with TELEMETRY.stage("write"):
+                out_df = pd.DataFrame(comments)
+                out_df.to_csv(
+                    OUTPUT_CSV,
+                    mode="a",
+                    header=first_write,
+                    index=False,
+                    encoding="utf-8-sig"
+                )
+                first_write = False
+
+                if dedup is not None:   # 쓰기와 같은 단계에서 등록 + 등록한 CSV 위치 기록
+                    dedup.add_many(comment_kind, [c["comment_id"] for c in comments])
+                    dedup.mark_csv(OUTPUT_CSV)
+
+                if con is not None:
+                    comment_db.insert_comments(con, comments, source="comments_crawling_adj")
+
+        # 페이지네이션이 정상 종료한 기사만 '댓글 수집 완료'
+        if dedup is not None and news_id and complete:
+            dedup.add(done_kind, news_id)
+
+        TELEMETRY.count("articles")
+
+        with TELEMETRY.stage("sleep"):
+            time.sleep(ARTICLE_SLEEP)
 
+    TELEMETRY.close()
     print("\n✅ 댓글 수집 완료")
     print("저장 파일:", OUTPUT_CSV)
+    print("처리량(/s):", TELEMETRY.snapshot()["rates_per_s"])
 
 if __name__ == "__main__":
     main()
 #%%
-comments = collect_comments("https://n.news.naver.com/article/011/0004445148")
+comments, _ = collect_comments("https://n.news.naver.com/article/011/0004445148")
 print("수집 댓글 수:", len(comments))
\ No newline at end of file
@@ -0,0 +1,212 @@
+#%%
+import csv
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
+import sqlite3
+from typing import Iterable, List
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+DEDUP_DIR = "../data/NAVER/dedup"
+
+CAPACITY = 20_000_000   # 예상 최대 key 수 (기사 + 댓글)
+ERROR_RATE = 0.001      # Bloom filter 오탐률
+
+# key 종류
+NEWS = "news"                   # oid_aid (기사 행 저장 완료)
+NEWS_COMMENTS = "news_comments" # oid_aid (해당 기사 댓글 수집 완료)
+COMMENT = "comment"             # comment_id
+
+
+def scoped(kind: str, dataset: str) -> str:
+    """
+    출력 데이터셋(CSV 경로)별 key 종류. 크롤러마다 저장 파일이 다르므로
+    한 크롤러가 저장한 기사/댓글이 다른 크롤러 출력에서 빠지지 않게 파일 단위로 나눔.
+    """
+    return f"{kind}@{os.path.abspath(dataset)}"
+
+
+class BloomFilter:
+    """mmap 비트 배열 기반 Bloom filter (크기 고정 → 이력이 늘어도 메모리 일정)"""
+
+    def __init__(self, path: str, capacity: int = CAPACITY, error_rate: float = ERROR_RATE):
+        meta_path = path + ".json"
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            self.m, self.k = meta["m"], meta["k"]
+        else:
+            self.m = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            self.k = max(1, int(round(self.m / capacity * math.log(2))))
+            with open(meta_path, "w") as f:
+                json.dump({"m": self.m, "k": self.k, "capacity": capacity, "error_rate": error_rate}, f)
+
+        nbytes = (self.m + 7) // 8
+        self.fresh = not os.path.exists(path)
+        if self.fresh:
+            with open(path, "wb") as f:
+                f.truncate(nbytes)
+        self._f = open(path, "r+b")
+        self._mm = mmap.mmap(self._f.fileno(), nbytes)
+
+    def _positions(self, key: str):
+        # double hashing: h1 + i*h2
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, key: str):
+        mm = self._mm
+        for p in self._positions(key):
+            mm[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        mm = self._mm
+        return all(mm[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        self._mm.flush()
+        self._mm.close()
+        self._f.close()
+
+
+class DedupIndex:
+    """
+    크롤러 공용 중복 인덱스.
+    Bloom filter 로 '처음 보는 key'를 디스크 조회 없이 걸러내고,
+    양성일 때만 SQLite(진짜 key 집합)를 확인한다.
+    """
+
+    def __init__(self, path: str = DEDUP_DIR, capacity: int = CAPACITY, error_rate: float = ERROR_RATE):
+        os.makedirs(path, exist_ok=True)
+        self.con = sqlite3.connect(os.path.join(path, "keys.db"))
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (kind, key)"
+            ") WITHOUT ROWID"
+        )
+        # CSV 별로 key 를 등록해 둔 위치(바이트). 쓰기와 등록 사이에 멈춘 경우 다음 실행에서 그 뒤만 다시 등록
+        self.con.execute("CREATE TABLE IF NOT EXISTS marks (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.bloom = BloomFilter(os.path.join(path, "bloom.bin"), capacity, error_rate)
+        if self.bloom.fresh:
+            self.rebuild_bloom()
+
+    @staticmethod
+    def _bkey(kind: str, key) -> str:
+        return f"{kind}:{key}"
+
+    def rebuild_bloom(self):
+        """bloom.bin 이 없을 때 SQLite 의 key 전체로 다시 채움"""
+        for kind, key in self.con.execute("SELECT kind, key FROM seen"):
+            self.bloom.add(self._bkey(kind, key))
+        self.bloom.flush()
+
+    def seen(self, kind: str, key) -> bool:
+        if self._bkey(kind, key) not in self.bloom:
+            return False
+        row = self.con.execute("SELECT 1 FROM seen WHERE kind = ? AND key = ?", (kind, str(key))).fetchone()
+        return row is not None
+
+    def filter_new(self, kind: str, keys: Iterable) -> List:
+        """이전 실행에서 저장된 적 없는 key 만 (입력 순서대로) 반환"""
+        return [k for k in keys if not self.seen(kind, k)]
+
+    def add_many(self, kind: str, keys: Iterable):
+        keys = [str(k) for k in keys]
+        if not keys:
+            return
+        with self.con:
+            self.con.executemany("INSERT OR IGNORE INTO seen(kind, key) VALUES (?, ?)",
+                                 [(kind, k) for k in keys])
+        for k in keys:
+            self.bloom.add(self._bkey(kind, k))
+        self.bloom.flush()
+
+    def add(self, kind: str, key):
+        self.add_many(kind, [key])
+
+    def seed_from_csv(self, path: str, kind: str, column: str, transform=None, batch: int = 100_000,
+                      offset: int = 0) -> int:
+        """CSV 의 key 를 인덱스에 등록 (offset: 이 바이트 위치 이후 행만). 반환: 읽은 key 수"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return 0
+        n = 0
+        with open(path, "rb") as raw:
+            if offset:
+                raw.seek(offset)
+            f = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+            reader = csv.DictReader(f, fieldnames=header)
+            if not offset:
+                next(reader, None)   # 헤더 행
+            buf = []
+            for row in reader:
+                key = row.get(column)
+                if transform is not None:
+                    key = transform(key or "")
+                if key:
+                    buf.append(key)
+                if len(buf) >= batch:
+                    self.add_many(kind, buf)
+                    n += len(buf)
+                    buf = []
+            self.add_many(kind, buf)
+            n += len(buf)
+        return n
+
+    def _mark_name(self, path: str) -> str:
+        return f"csv@{os.path.abspath(path)}"
+
+    def mark_csv(self, path: str):
+        """path 를 지금 크기까지 등록했다고 기록 (CSV 에 쓰고 add_many 한 직후 호출)"""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        with self.con:
+            self.con.execute("INSERT OR REPLACE INTO marks VALUES (?, ?)", (self._mark_name(path), size))
+
+    def sync_csv(self, path: str, kind: str, column: str, transform=None) -> int:
+        """
+        실행 시작 때 CSV 와 인덱스를 맞춤.
+        처음이면 전체, 아니면 마지막 mark_csv 이후 CSV 에 붙었는데 등록 전에 멈춘 행만 등록. 반환: 등록한 key 수
+        """
+        row = self.con.execute("SELECT value FROM marks WHERE name = ?", (self._mark_name(path),)).fetchone()
+        if row is None:
+            n = self.seed_from_csv(path, kind, column, transform) if self.count(kind) == 0 else 0
+        else:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            n = self.seed_from_csv(path, kind, column, transform, offset=row[0]) if size > row[0] else 0
+        self.mark_csv(path)
+        return n
+
+    def count(self, kind: str) -> int:
+        return self.con.execute("SELECT COUNT(*) FROM seen WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def kinds(self) -> List[tuple]:
+        return self.con.execute("SELECT kind, COUNT(*) FROM seen GROUP BY kind").fetchall()
+
+    def close(self):
+        self.bloom.close()
+        self.con.close()
+
+
+#%%
+# 확인용
+if __name__ == "__main__":
+    idx = DedupIndex()
+    for kind, n in idx.kinds():
+        print(kind, n)
+    print("bloom bits:", idx.bloom.m, "hashes:", idx.bloom.k)
+    idx.close()
@@ -0,0 +1,327 @@
+#%%
+import argparse
+import os
+import shutil
+import uuid
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pds
+
+from utils import extract_oid_aid_key
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+DATA_DIR = "../data/NAVER"
+STORE_DIR = f"{DATA_DIR}/parquet"
+
+ARTICLE_CSV = f"{DATA_DIR}/article/articles_2025_financial.csv"
+COMMENT_CSV = f"{DATA_DIR}/comments/comments_2025_adj.csv"
+NEWS_TOP5_CSV = "../../yeowon/news_2025_top5.csv"
+COMMENT_TOP5_CSV = "../../yeowon/comments_2025_top5.csv"
+
+KST = "Asia/Seoul"
+
+# keyword / section 은 값 종류가 적으므로 dictionary 인코딩
+KEYWORD_TYPE = pa.dictionary(pa.int16(), pa.string())
+SECTION_TYPE = pa.dictionary(pa.int8(), pa.string())
+TS_TYPE = pa.timestamp("s", tz=KST)
+
+# 파티션 컬럼(date)은 스키마 맨 앞에 둔다
+SCHEMAS: Dict[str, pa.Schema] = {
+    # article_crawling.py → articles_2025_financial.csv
+    "articles": pa.schema([
+        ("date", pa.date32()),
+        ("key", pa.string()),
+        ("keyword", KEYWORD_TYPE),
+        ("title", pa.string()),
+        ("url", pa.string()),
+        ("is_financial", pa.int8()),
+    ]),
+    # comments_crawling_adj.py → comments_2025_adj.csv (date = 댓글 작성일)
+    "comments": pa.schema([
+        ("date", pa.date32()),
+        ("comment_id", pa.int64()),
+        ("news_id", pa.string()),
+        ("keyword", KEYWORD_TYPE),
+        ("article_url", pa.string()),
+        ("contents", pa.string()),
+        ("sympathy", pa.int32()),
+        ("antipathy", pa.int32()),
+        ("reg_time", TS_TYPE),
+    ]),
+    # yeowon 스크립트 → news_2025_top5.csv (date = 기사 작성일)
+    "news_top5": pa.schema([
+        ("date", pa.date32()),
+        ("loop_date", pa.date32()),
+        ("news_id", pa.string()),
+        ("section", SECTION_TYPE),
+        ("keyword", KEYWORD_TYPE),
+        ("title", pa.string()),
+        ("comment_total", pa.int32()),
+        ("rank", pa.int16()),
+        ("url", pa.string()),
+    ]),
+    # yeowon 스크립트 → comments_2025_top5.csv (date = 댓글 작성일)
+    "comments_top5": pa.schema([
+        ("date", pa.date32()),
+        ("comment_id", pa.int64()),
+        ("news_id", pa.string()),
+        ("keyword", KEYWORD_TYPE),
+        ("section", SECTION_TYPE),
+        ("pub_date", pa.date32()),
+        ("comment_at", TS_TYPE),
+        ("sort", pa.dictionary(pa.int8(), pa.string())),
+        ("text_raw", pa.string()),
+        ("like_count", pa.int32()),
+        ("dislike_count", pa.int32()),
+    ]),
+}
+
+PARTITIONING = pds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+# --------------------------------------------------
+# 타입 변환
+# --------------------------------------------------
+def parse_day(s: pd.Series) -> pd.Series:
+    """'2025.01.02' / '20250102' / '2025-01-02' 형태의 날짜 문자열을 date로 변환"""
+    digits = s.astype("string").str.replace(r"\D", "", regex=True).str[:8]
+    return pd.to_datetime(digits, format="%Y%m%d", errors="coerce").dt.date
+
+
+def parse_kst_time(s: pd.Series) -> pd.Series:
+    """'2025-01-02T23:38:23+0900' 형태의 작성 시각을 KST 기준 timestamp로 변환"""
+    ts = pd.to_datetime(s, format="%Y-%m-%dT%H:%M:%S%z", errors="coerce", utc=True)
+    return ts.dt.tz_convert(KST)
+
+
+def to_table(df: pd.DataFrame, dataset: str) -> pa.Table:
+    """DataFrame을 dataset 스키마에 맞는 Arrow Table로 변환 (없는 컬럼은 null)"""
+    schema = SCHEMAS[dataset]
+    df = df.copy()
+    for field in schema:
+        if field.name not in df.columns:
+            df[field.name] = None
+    df = df[schema.names]
+
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_dictionary(field.type) or pa.types.is_string(field.type):
+            df[field.name] = col.astype("string")
+        elif pa.types.is_integer(field.type):
+            df[field.name] = pd.to_numeric(col, errors="coerce").astype("Int64")
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+# --------------------------------------------------
+# 원본 CSV → 표준 컬럼
+# --------------------------------------------------
+def normalize_articles(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    out["date"] = parse_day(out["date"])
+    return out
+
+
+def normalize_comments(df: pd.DataFrame, articles: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    out = df.copy()
+    out["reg_time"] = parse_kst_time(out["reg_time"])
+    out["date"] = out["reg_time"].dt.date
+    out["news_id"] = out["article_url"].map(lambda u: extract_oid_aid_key(str(u)))
+    if articles is not None and "keyword" not in out.columns:
+        kw = articles.drop_duplicates("url").set_index("url")["keyword"]
+        out["keyword"] = out["article_url"].map(kw)
+    return out
+
+
+def normalize_news_top5(df: pd.DataFrame) -> pd.DataFrame:
+    """collect_naver_2025_top5.py(news_date, rank) / naver_comments_2025_new.py(loop_date, pub_date, rank_in_section) 공통 처리"""
+    out = df.rename(columns={
+        "comment_total_all": "comment_total",
+        "rank_in_section": "rank",
+    })
+    if "loop_date" not in out.columns:
+        out["loop_date"] = out["news_date"]
+    pub = out["pub_date"] if "pub_date" in out.columns else out["loop_date"]
+    out["date"] = parse_day(pub.fillna(out["loop_date"]))
+    out["loop_date"] = parse_day(out["loop_date"])
+    return out
+
+
+def normalize_comments_top5(df: pd.DataFrame, news: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    out = df.copy()
+    out["comment_at"] = parse_kst_time(out["comment_at"])
+    out["date"] = out["comment_at"].dt.date
+    if "pub_date" in out.columns:
+        out["pub_date"] = parse_day(out["pub_date"])
+    if news is not None:
+        meta = news.drop_duplicates("news_id").set_index("news_id")
+        for col in ("keyword", "section"):
+            if col not in out.columns:
+                out[col] = out["news_id"].map(meta[col])
+    return out
+
+
+# --------------------------------------------------
+# 쓰기 / 읽기
+# --------------------------------------------------
+def dataset_dir(dataset: str, root: str = STORE_DIR) -> str:
+    return os.path.join(root, dataset)
+
+
+def write(df: pd.DataFrame, dataset: str, root: str = STORE_DIR):
+    """
+    표준 컬럼 DataFrame을 date 파티션(date=YYYY-MM-DD)에 append (append 전용: 같은 행을 다시 쓰면 중복됨).
+    전체 다시 만들 때는 convert_csvs 처럼 비운 곳에 쓰고 replace_dataset 으로 교체
+    """
+    df = df[df["date"].notna()]
+    if df.empty:
+        return
+    table = to_table(df, dataset)
+    pds.write_dataset(
+        table,
+        dataset_dir(dataset, root),
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def replace_dataset(dataset: str, src_root: str, root: str = STORE_DIR):
+    """src_root 에 새로 쓴 dataset 으로 root 의 dataset 을 통째로 교체"""
+    src, dst = dataset_dir(dataset, src_root), dataset_dir(dataset, root)
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    if os.path.exists(src):
+        os.replace(src, dst)
+
+
+def append_rows(rows: List[Dict], dataset: str, root: str = STORE_DIR, **context):
+    """크롤러에서 수집한 dict 리스트를 바로 저장 (CSV append 대체용)"""
+    if not rows:
+        return
+    df = pd.DataFrame(rows)
+    normalize = {
+        "articles": normalize_articles,
+        "comments": normalize_comments,
+        "news_top5": normalize_news_top5,
+        "comments_top5": normalize_comments_top5,
+    }[dataset]
+    write(normalize(df, **context), dataset, root)
+
+
+def open_dataset(dataset: str, root: str = STORE_DIR) -> pds.Dataset:
+    return pds.dataset(
+        dataset_dir(dataset, root),
+        schema=SCHEMAS[dataset],
+        format="parquet",
+        partitioning=PARTITIONING,
+    )
+
+
+def build_filter(start: Optional[date] = None, end: Optional[date] = None,
+                 keywords: Optional[Iterable[str]] = None):
+    """date 범위(파티션 pruning) + keyword(row group 통계) 필터식 생성"""
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    if start is not None:
+        expr = _and(pds.field("date") >= pd.Timestamp(start).date())
+    if end is not None:
+        expr = _and(pds.field("date") <= pd.Timestamp(end).date())
+    if keywords:
+        expr = _and(pds.field("keyword").isin(list(keywords)))
+    return expr
+
+
+def read(dataset: str, start=None, end=None, keywords: Optional[Iterable[str]] = None,
+         columns: Optional[List[str]] = None, root: str = STORE_DIR) -> pd.DataFrame:
+    """date 범위 / keyword 조건을 pushdown 해서 필요한 파티션·컬럼만 로드"""
+    dset = open_dataset(dataset, root)
+    table = dset.to_table(columns=columns, filter=build_filter(start, end, keywords))
+    # dictionary 컬럼은 pandas category 로 그대로 받아 메모리 절약
+    return table.to_pandas()
+
+
+# --------------------------------------------------
+# 기존 CSV 변환
+# --------------------------------------------------
+def read_csv_chunks(path: str, chunksize: int):
+    return pd.read_csv(path, encoding="utf-8-sig", dtype=str, chunksize=chunksize)
+
+
+def convert_csvs(root: str = STORE_DIR, chunksize: int = 200_000,
+                 article_csv: str = ARTICLE_CSV, comment_csv: str = COMMENT_CSV,
+                 news_top5_csv: str = NEWS_TOP5_CSV, comment_top5_csv: str = COMMENT_TOP5_CSV):
+    """
+    기존 utf-8-sig CSV 4종을 parquet store로 변환 (댓글엔 기사 keyword/section을 붙임).
+    CSV 가 있는 dataset 은 임시 위치(root/.convert)에 새로 쓴 뒤 통째로 교체하므로 다시 실행해도 행이 중복되지 않고,
+    중간에 멈추면 이전 store 가 그대로 남는다.
+    """
+    tmp = os.path.join(root, ".convert")
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+
+    articles = None
+    if os.path.exists(article_csv):
+        articles = pd.read_csv(article_csv, encoding="utf-8-sig", dtype=str)
+        write(normalize_articles(articles), "articles", tmp)
+        replace_dataset("articles", tmp, root)
+        print("articles:", len(articles))
+
+    if os.path.exists(comment_csv):
+        n = 0
+        for chunk in read_csv_chunks(comment_csv, chunksize):
+            write(normalize_comments(chunk, articles), "comments", tmp)
+            n += len(chunk)
+        replace_dataset("comments", tmp, root)
+        print("comments:", n)
+
+    news = None
+    if os.path.exists(news_top5_csv):
+        news = normalize_news_top5(pd.read_csv(news_top5_csv, encoding="utf-8-sig", dtype=str))
+        write(news, "news_top5", tmp)
+        replace_dataset("news_top5", tmp, root)
+        print("news_top5:", len(news))
+
+    if os.path.exists(comment_top5_csv):
+        n = 0
+        for chunk in read_csv_chunks(comment_top5_csv, chunksize):
+            write(normalize_comments_top5(chunk, news), "comments_top5", tmp)
+            n += len(chunk)
+        replace_dataset("comments_top5", tmp, root)
+        print("comments_top5:", n)
+
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="NAVER 기사/댓글 CSV → date 파티션 parquet store 변환")
+    ap.add_argument("--root", default=STORE_DIR)
+    ap.add_argument("--articles", default=ARTICLE_CSV)
+    ap.add_argument("--comments", default=COMMENT_CSV)
+    ap.add_argument("--news_top5", default=NEWS_TOP5_CSV)
+    ap.add_argument("--comments_top5", default=COMMENT_TOP5_CSV)
+    ap.add_argument("--chunksize", type=int, default=200_000)
+    args = ap.parse_args()
+
+    convert_csvs(args.root, args.chunksize, args.articles, args.comments,
+                 args.news_top5, args.comments_top5)
+    print("저장 위치:", args.root)
+
+
+if __name__ == "__main__":
+    main()
+
+
+#%%
+# 사용 예시 (노트북)
+# from storage import read
+# df = read("comments", start="2025-03-01", end="2025-05-31", keywords=["폭락", "패닉"])
@@ -0,0 +1,231 @@
+#%%
+# 크롤링 계측: endpoint 별 latency 히스토그램 / bytes / status, 단계별 소요 시간, 처리량 카운터, span trace
+# requests 의 response hook 과 stage() context manager 로 기록하고,
+# 주기적으로 JSON / Prometheus text snapshot 을 파일로 내보낸다.
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# latency / 단계 소요 시간 히스토그램 버킷 (초)
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf")]
+
+
+class Histogram:
+    def __init__(self, buckets: List[float] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.n = 0
+
+    def observe(self, v: float):
+        self.sum += v
+        self.n += 1
+        for i, b in enumerate(self.buckets):
+            if v <= b:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """버킷 상한 기준 근사 분위수"""
+        if self.n == 0:
+            return 0.0
+        target, acc = q * self.n, 0
+        for b, c in zip(self.buckets, self.counts):
+            acc += c
+            if acc >= target:
+                return b
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.n,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.n, 6) if self.n else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): c for b, c in zip(self.buckets, self.counts)},
+        }
+
+
+def endpoint_name(url: str) -> str:
+    """URL → endpoint 이름 (search.naver, SECTION_ARTICLE_LIST_FOR_LATEST, web_naver_list_jsonp.json, article ...)"""
+    path = urlparse(url).path
+    if "/article/" in path:
+        return "article"
+    if path.startswith("/breakingnews/"):
+        return "breakingnews"
+    return path.rstrip("/").rsplit("/", 1)[-1] or "/"
+
+
+class Telemetry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latency: Dict[str, Histogram] = {}    # 서버 응답 헤더까지 (r.elapsed, 연결·TLS 포함)
+        self.transfer: Dict[str, Histogram] = {}   # 본문 수신
+        self.bytes: Dict[str, int] = {}
+        self.status: Dict[str, Dict[str, int]] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._trace = None
+        self._trace_first = True
+        self._exporter: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._paths: Dict[str, str] = {}
+
+    # --------------------------------------------------
+    # 기록
+    # --------------------------------------------------
+    def on_response(self, r, *args, **kwargs):
+        """requests response hook: hooks={"response": TELEMETRY.on_response}"""
+        ep = endpoint_name(r.url)
+        t0 = time.perf_counter()
+        size = len(r.content)
+        t_body = time.perf_counter() - t0
+        latency = r.elapsed.total_seconds()
+        with self.lock:
+            self.latency.setdefault(ep, Histogram()).observe(latency)
+            self.transfer.setdefault(ep, Histogram()).observe(t_body)
+            self.bytes[ep] = self.bytes.get(ep, 0) + size
+            st = self.status.setdefault(ep, {})
+            st[str(r.status_code)] = st.get(str(r.status_code), 0) + 1
+            self.counters["requests"] = self.counters.get("requests", 0) + 1
+        self._span("http " + ep, time.time() - latency - t_body, latency + t_body,
+                   {"status": r.status_code, "bytes": size})
+        return r
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name: str, **attrs):
+        """with TELEMETRY.stage("parse"): ... → 단계별 소요 시간 + span"""
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self.lock:
+                self.stages.setdefault(name, Histogram()).observe(dt)
+            self._span(name, start, dt, attrs)
+
+    def _span(self, name: str, start: float, dur: float, args: Dict):
+        if self._trace is None:
+            return
+        ev = {"name": name, "ph": "X", "ts": int(start * 1e6), "dur": int(dur * 1e6),
+              "pid": os.getpid(), "tid": threading.get_ident() % 100000, "args": args}
+        line = json.dumps(ev, ensure_ascii=False)
+        with self.lock:
+            self._trace.write(("" if self._trace_first else ",\n") + line)
+            self._trace_first = False
+
+    # --------------------------------------------------
+    # 내보내기
+    # --------------------------------------------------
+    def snapshot(self) -> Dict:
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "counters": dict(self.counters),
+                "rates_per_s": {k: round(v / elapsed, 3) for k, v in self.counters.items()},
+                "endpoints": {
+                    ep: {
+                        "latency": h.to_dict(),
+                        "transfer": self.transfer[ep].to_dict(),
+                        "bytes": self.bytes.get(ep, 0),
+                        "status": dict(self.status.get(ep, {})),
+                    }
+                    for ep, h in self.latency.items()
+                },
+                "stages": {name: h.to_dict() for name, h in self.stages.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+
+        def hist(metric: str, label: str, value: str, h: Dict):
+            acc = 0
+            for b, c in h["buckets"].items():
+                acc += c
+                le = "+Inf" if b == "inf" else b
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="{le}"}} {acc}')
+            lines.append(f'{metric}_sum{{{label}="{value}"}} {h["sum"]}')
+            lines.append(f'{metric}_count{{{label}="{value}"}} {h["count"]}')
+
+        lines.append("# TYPE crawl_http_latency_seconds histogram")
+        for ep, d in snap["endpoints"].items():
+            hist("crawl_http_latency_seconds", "endpoint", ep, d["latency"])
+        lines.append("# TYPE crawl_http_bytes_total counter")
+        for ep, d in snap["endpoints"].items():
+            lines.append(f'crawl_http_bytes_total{{endpoint="{ep}"}} {d["bytes"]}')
+        lines.append("# TYPE crawl_http_responses_total counter")
+        for ep, d in snap["endpoints"].items():
+            for code, n in d["status"].items():
+                lines.append(f'crawl_http_responses_total{{endpoint="{ep}",status="{code}"}} {n}')
+        lines.append("# TYPE crawl_stage_seconds histogram")
+        for name, h in snap["stages"].items():
+            hist("crawl_stage_seconds", "stage", name, h)
+        lines.append("# TYPE crawl_items_total counter")
+        for name, n in snap["counters"].items():
+            lines.append(f'crawl_items_total{{item="{name}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """snapshot 을 JSON / Prometheus text 파일로 기록 (원자적 교체)"""
+        for kind, path in self._paths.items():
+            body = (json.dumps(self.snapshot(), ensure_ascii=False, indent=1)
+                    if kind == "json" else self.to_prometheus())
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        if self._trace is not None:
+            with self.lock:
+                self._trace.flush()
+
+    def start(self, out_dir: str, interval: float = 30.0, trace: bool = False, prefix: str = "crawl"):
+        """out_dir 에 {prefix}_telemetry.json / .prom (+ {prefix}_trace.json) 을 interval 초마다 기록"""
+        os.makedirs(out_dir, exist_ok=True)
+        with self.lock:
+            self.started = time.time()   # 전역 인스턴스는 import 시점에 만들어지므로 rate 기준을 여기서 다시 잡음
+        self._paths = {
+            "json": os.path.join(out_dir, f"{prefix}_telemetry.json"),
+            "prom": os.path.join(out_dir, f"{prefix}_telemetry.prom"),
+        }
+        if trace:
+            # Chrome trace event 형식 (chrome://tracing, Perfetto 에서 열기)
+            self._trace = open(os.path.join(out_dir, f"{prefix}_trace.json"), "w", encoding="utf-8")
+            self._trace.write("[\n")
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.export()
+
+        self._exporter = threading.Thread(target=loop, daemon=True)
+        self._exporter.start()
+        atexit.register(self.close)
+
+    def close(self):
+        if self._exporter is None:
+            return
+        self._stop.set()
+        self.export()
+        if self._trace is not None:
+            self._trace.write("\n]\n")
+            self._trace.close()
+            self._trace = None
+        self._exporter = None
+
+
+# 크롤러 공용 인스턴스
+TELEMETRY = Telemetry()
@@ -0,0 +1,255 @@
+#%%
+# 크롤러 end-to-end 처리량 벤치마크 (mock_naver 대역 서버 사용, 네이버 접속 없음)
+# 각 진입점을 별도 프로세스에서 실행하고 requests/s, articles/s, comments/s, peak RSS 를 측정한다.
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+import traceback
+import types
+from datetime import date, timedelta
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+from mock_naver import MockConfig, install_recorder, serve
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NAVER_DIR = os.path.dirname(HERE)
+YEOWON_DIR = os.path.join(NAVER_DIR, "..", "..", "yeowon")
+
+COMMENT_TEMPLATE_URL = (
+    "https://apis.naver.com/commentBox/cbox/web_naver_list_jsonp.json"
+    "?ticket=news&templateId=default_society&pool=cbox5&_callback=jQuery1707_1&lang=ko&country=KR"
+)
+
+ENTRIES = ["article_crawling", "comments_crawling_adj", "collect_naver_2025_top5", "naver_comments_2025_new"]
+CHILD_TIMEOUT = 1800   # 진입점 하나 최대 실행 시간 (초)
+
+
+# --------------------------------------------------
+# 요청 가로채기: 모든 https://*.naver.com 요청을 mock 서버로 보냄
+# --------------------------------------------------
+def redirect_to_mock(port: int):
+    from requests.adapters import HTTPAdapter
+
+    orig_send = HTTPAdapter.send
+
+    def send(self, request, **kwargs):
+        u = urlsplit(request.url)
+        request.url = urlunsplit(("http", f"127.0.0.1:{port}", u.path, u.query, u.fragment))
+        return orig_send(self, request, **kwargs)
+
+    HTTPAdapter.send = send
+
+
+def load_module(name: str, path: str):
+    """스크립트의 첫 번째 #%% 셀만 모듈로 로드 (뒤쪽 확인용 셀은 import 시 실행되면 안 됨)"""
+    with open(path, "r", encoding="utf-8") as f:
+        src = f.read()
+    cells = src.split("\n#%%")
+    mod = types.ModuleType(name)
+    mod.__file__ = path
+    sys.modules[name] = mod
+    exec(compile(cells[0], path, "exec"), mod.__dict__)
+    return mod
+
+
+def csv_rows(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+# --------------------------------------------------
+# 진입점별 실행 (자식 프로세스)
+# --------------------------------------------------
+def run_article_crawling(work: str, days: int):
+    sys.path.insert(0, NAVER_DIR)
+    mod = load_module("article_crawling", os.path.join(NAVER_DIR, "article_crawling.py"))
+    start = date(2025, 1, 1)
+    mod.day_ranges = lambda year: [start + timedelta(days=i) for i in range(days)]
+    mod.SLEEP_SEC = 0
+    mod.OUTPUT_DIR = work
+    mod.OUTPUT_PATH = os.path.join(work, "articles.csv")
+    mod.DB_PATH = None
+    mod.DEDUP_PATH = None
+    mod.main()
+    return {"articles": csv_rows(mod.OUTPUT_PATH), "comments": 0}
+
+
+def run_comments_crawling_adj(work: str, days: int):
+    sys.path.insert(0, NAVER_DIR)
+    mod = load_module("comments_crawling_adj", os.path.join(NAVER_DIR, "comments_crawling_adj.py"))
+    mod.ARTICLE_CSV = os.path.join(work, "articles.csv")
+    mod.OUTPUT_CSV = os.path.join(work, "comments.csv")
+    mod.ARTICLE_SLEEP = 0
+    mod.PAGE_SLEEP = 0
+    mod.DB_PATH = None
+    mod.DEDUP_PATH = None
+    mod.TELEMETRY_DIR = os.path.join(work, "telemetry")
+    mod.TELEMETRY_TRACE = True
+    mod.main()
+    return {"articles": csv_rows(mod.ARTICLE_CSV), "comments": csv_rows(mod.OUTPUT_CSV)}
+
+
+def run_yeowon(name: str, work: str, days: int):
+    mod = load_module(name, os.path.join(YEOWON_DIR, f"{name}.py"))
+    end = (date(2025, 1, 1) + timedelta(days=days - 1)).strftime("%Y%m%d")
+    out_news = os.path.join(work, f"{name}_news.csv")
+    out_comments = os.path.join(work, f"{name}_comments.csv")
+    sys.argv = [name, "--start", "20250101", "--end", end, "--sleep", "0",
+                "--comment_template_url", COMMENT_TEMPLATE_URL,
+                "--out_news", out_news, "--out_comments", out_comments]
+    mod.main()
+    return {"articles": csv_rows(out_news), "comments": csv_rows(out_comments)}
+
+
+def child(entry: str, port: int, work: str, days: int, out, record_dir: str = ""):
+    """port 가 있으면 mock 서버로 돌리고, record_dir 가 있으면 응답을 녹화 (port=0 이면 실제 네이버)"""
+    if record_dir:
+        install_recorder(record_dir)
+    if port:
+        redirect_to_mock(port)
+    cwd = os.getcwd()
+    os.chdir(work)
+    try:
+        t0 = time.perf_counter()
+        if entry == "article_crawling":
+            counts = run_article_crawling(work, days)
+        elif entry == "comments_crawling_adj":
+            counts = run_comments_crawling_adj(work, days)
+        else:
+            counts = run_yeowon(entry, work, days)
+        elapsed = time.perf_counter() - t0
+    except Exception:
+        out.put({"error": traceback.format_exc()})
+        return
+    finally:
+        os.chdir(cwd)
+    # ru_maxrss: Linux 는 KB, macOS 는 byte
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+    out.put({**counts, "elapsed": elapsed, "peak_rss_mb": rss_mb})
+
+
+def wait_child(p, out, timeout: float) -> dict:
+    """자식 결과 대기. 시간 초과나 결과 없이 죽은 경우도 {"error": ...} 로 돌려줌 (벤치가 멈추지 않게)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            res = out.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not p.is_alive():
+                res = {"error": f"결과 없이 종료 (exitcode {p.exitcode})"}
+                break
+            if time.monotonic() > deadline:
+                p.terminate()
+                res = {"error": f"{timeout:.0f}초 초과로 중단"}
+                break
+    p.join()
+    return res
+
+
+def record(entries, days: int, work: str, record_dir: str, timeout: float = CHILD_TIMEOUT):
+    """실제 네이버에 진입점을 돌려 응답을 record_dir 에 녹화 (이후 --replay_dir 로 재생)"""
+    ctx = mp.get_context("spawn")
+    for entry in entries:
+        out = ctx.Queue()
+        p = ctx.Process(target=child, args=(entry, 0, work, days, out, record_dir))
+        p.start()
+        res = wait_child(p, out, timeout)
+        if "error" in res:
+            print(f"[{entry}] 실패\n{res['error']}", file=sys.stderr)
+    print("녹화:", record_dir, len([f for f in os.listdir(record_dir) if f.endswith(".json")]), "개")
+
+
+def bench(entries, cfg: MockConfig, days: int, work: str, timeout: float = CHILD_TIMEOUT):
+    ctx = mp.get_context("spawn")
+    ready = ctx.Queue()
+    server = ctx.Process(target=serve, args=(cfg, "127.0.0.1", 0, ready), daemon=True)
+    server.start()
+    port = ready.get(timeout=30)
+    base = f"http://127.0.0.1:{port}"
+
+    results = []
+    try:
+        for entry in entries:
+            requests.get(f"{base}/__reset", timeout=5)
+            out = ctx.Queue()
+            p = ctx.Process(target=child, args=(entry, port, work, days, out))
+            p.start()
+            res = wait_child(p, out, timeout)
+            if "error" in res:
+                print(f"[{entry}] 실패\n{res['error']}", file=sys.stderr)
+                continue
+            stats = requests.get(f"{base}/__stats", timeout=5).json()
+            n_req = stats.get("requests", 0)
+            el = res["elapsed"]
+            results.append({
+                "entry": entry,
+                "elapsed_s": round(el, 3),
+                "requests": n_req,
+                "requests_per_s": round(n_req / el, 1),
+                "articles": res["articles"],
+                "articles_per_s": round(res["articles"] / el, 1),
+                "comments": res["comments"],
+                "comments_per_s": round(res["comments"] / el, 1),
+                "peak_rss_mb": round(res["peak_rss_mb"], 1),
+                "errors": stats.get("500", 0) + stats.get("429", 0),
+            })
+    finally:
+        server.terminate()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="크롤러 처리량 벤치마크 (mock 서버)")
+    ap.add_argument("--entries", nargs="*", default=ENTRIES, choices=ENTRIES)
+    ap.add_argument("--days", type=int, default=2)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--error_rate", type=float, default=0.0)
+    ap.add_argument("--rate_limit", type=float, default=0.0)
+    ap.add_argument("--max_comments", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--replay_dir", default="", help="녹화 응답 디렉터리 (있는 요청은 합성 대신 재생)")
+    ap.add_argument("--record", default="", help="mock 대신 실제 네이버에 돌려 이 디렉터리에 응답 녹화")
+    ap.add_argument("--timeout", type=float, default=CHILD_TIMEOUT, help="진입점 하나 최대 실행 시간 (초)")
+    ap.add_argument("--json", default="", help="결과 JSON 저장 경로")
+    args = ap.parse_args()
+
+    cfg = MockConfig(seed=args.seed, latency=args.latency, jitter=args.jitter,
+                     error_rate=args.error_rate, rate_limit=args.rate_limit,
+                     max_comments=args.max_comments, replay_dir=args.replay_dir)
+
+    # comments_crawling_adj 는 article_crawling 결과(articles.csv)를 입력으로 씀
+    entries = list(args.entries)
+    if "comments_crawling_adj" in entries and "article_crawling" not in entries:
+        entries.insert(0, "article_crawling")
+
+    with tempfile.TemporaryDirectory() as work:
+        if args.record:
+            record(entries, args.days, work, args.record, args.timeout)
+            return
+        results = bench(entries, cfg, args.days, work, args.timeout)
+
+    cols = ["entry", "elapsed_s", "requests_per_s", "articles_per_s", "comments_per_s", "peak_rss_mb", "errors"]
+    print("\t".join(cols))
+    for r in results:
+        print("\t".join(str(r[c]) for c in cols))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#%%
+# 네이버 대역 서버 (오프라인 벤치마크용)
+# m.search.naver.com 검색, SECTION_ARTICLE_LIST_FOR_LATEST, NEWS_COMMENT_COUNT_LIST,
+# cbox web_naver_list_jsonp(커서 페이지네이션), 기사 HTML 을 경로 기준으로 흉내낸다.
+# 녹화 응답(--replay_dir)이 있으면 그것을, 없으면 시드 기반 합성 응답을 돌려준다.
+# 녹화: install_recorder(dir) 를 건 프로세스의 requests 응답(200)이 dir/{replay_key}.json 으로 저장된다
+# (bench_crawlers.py --record dir 가 실제 네이버에 크롤러를 돌리며 이걸 씀).
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+TITLE_WORDS = [
+    "코스피", "코스닥", "증시", "주식", "한국증시", "삼성전자", "SK하이닉스",
+    "폭락", "급락", "급등", "반등", "패닉", "위기", "침체", "쇼크", "투자", "외국인",
+]
+
+COMMENT_WORDS = ["떡락", "떡상", "존버", "손절", "줍줍", "ㅋㅋㅋ", "물타기", "가즈아", "패닉셀", "반등"]
+
+
+@dataclass
+class MockConfig:
+    seed: int = 0
+    latency: float = 0.0          # 고정 지연 (초)
+    jitter: float = 0.0           # 추가 지연 상한 (초, uniform)
+    error_rate: float = 0.0       # 500 응답 비율
+    rate_limit: float = 0.0       # 초당 허용 요청 수 (0 = 무제한, 초과 시 429)
+    search_articles: int = 10     # 검색 결과 기사 수
+    section_pages: int = 3        # 섹션 목록 페이지 수
+    page_articles: int = 20       # 섹션 페이지당 기사 수
+    max_comments: int = 300       # 기사당 댓글 수 상한
+    replay_dir: str = ""          # 녹화 응답 디렉터리
+
+
+class MockState:
+    def __init__(self, cfg: MockConfig):
+        self.cfg = cfg
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+        self.tokens = cfg.rate_limit
+        self.last_refill = time.monotonic()
+
+    def count(self, name: str):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def allow(self) -> bool:
+        """token bucket 기반 rate limit"""
+        if self.cfg.rate_limit <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.cfg.rate_limit,
+                              self.tokens + (now - self.last_refill) * self.cfg.rate_limit)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+def rng_for(*parts) -> random.Random:
+    """요청 내용별로 고정된 난수 (같은 요청 → 같은 응답)"""
+    h = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return random.Random(int(h[:12], 16))
+
+
+def make_title(r: random.Random, must: str = "") -> str:
+    words = r.sample(TITLE_WORDS, 3)
+    if must:
+        words.insert(r.randrange(len(words) + 1), must)
+    return " ".join(words) + f" {r.randrange(10**6)}"
+
+
+def article_id(r: random.Random):
+    return f"{r.choice(['011', '015', '009', '421'])}", f"{r.randrange(10**9, 10**10):010d}"
+
+
+def n_comments(cfg: MockConfig, oid: str, aid: str) -> int:
+    return rng_for(cfg.seed, "count", oid, aid).randrange(cfg.max_comments + 1)
+
+
+# --------------------------------------------------
+# 응답 생성
+# --------------------------------------------------
+def search_html(cfg: MockConfig, q: Dict[str, str]) -> str:
+    r = rng_for(cfg.seed, "search", q.get("query"), q.get("ds"))
+    links = []
+    for _ in range(cfg.search_articles):
+        oid, aid = article_id(r)
+        title = make_title(r, q.get("query", ""))
+        links.append(f'<a href="https://n.news.naver.com/article/{oid}/{aid}" title="{title}">{title}</a>')
+    return "<html><body>" + "\n".join(links) + "</body></html>"
+
+
+def breaking_html(cfg: MockConfig, sid2: str, date: str) -> str:
+    token = f"{date}235959"
+    return (
+        "<html><body><div data-template-url='/section/template/"
+        f"SECTION_ARTICLE_LIST_FOR_LATEST?sid=101&sid2={sid2}&next={token}'></div></body></html>"
+    )
+
+
+def section_json(cfg: MockConfig, q: Dict[str, str]) -> str:
+    date, sid2 = q.get("date", ""), q.get("sid2", "")
+    page = int(q.get("pageNo", "1"))
+    items = []
+    if page <= cfg.section_pages:
+        r = rng_for(cfg.seed, "section", date, sid2, page)
+        for _ in range(cfg.page_articles):
+            oid, aid = article_id(r)
+            title = make_title(r)
+            items.append(f'<li><a href="https://n.news.naver.com/mnews/article/{oid}/{aid}">{title}</a></li>')
+    nxt = f"{date}{235959 - page * 100:06d}"
+    return json.dumps({
+        "renderedComponent": {"SECTION_ARTICLE_LIST_FOR_LATEST": "<ul>" + "".join(items) + "</ul>"},
+        "next": nxt,
+    }, ensure_ascii=False)
+
+
+def comment_count_json(cfg: MockConfig, q: Dict[str, str]) -> str:
+    result = []
+    for obj in q.get("objectIds", "").split(";"):
+        m = re.match(r"news(\d+),(\d+)", obj)
+        if m:
+            result.append({"objectId": obj, "commentCount": n_comments(cfg, m.group(1), m.group(2))})
+    return json.dumps({"success": True, "result": result})
+
+
+def comment_jsonp(cfg: MockConfig, q: Dict[str, str]) -> str:
+    m = re.match(r"news(\d+),(\d+)", q.get("objectId", ""))
+    callback = q.get("_callback", "jQuery_callback")
+    if not m:
+        return f"{callback}({json.dumps({'success': False})});"
+    oid, aid = m.group(1), m.group(2)
+    total = n_comments(cfg, oid, aid)
+    size = min(int(q.get("pageSize", "20")), 100)
+    offset = int(q.get("moreParam.next", "0") or 0)
+    day = pub_day(cfg, oid, aid)
+
+    r = rng_for(cfg.seed, "comments", oid, aid, offset)
+    comments = []
+    for i in range(offset, min(offset + size, total)):
+        minute = i * 3
+        comments.append({
+            "commentNo": int(aid[-6:]) * 1000 + i,
+            "contents": " ".join(r.choices(COMMENT_WORDS, k=3)),
+            "sympathyCount": r.randrange(200),
+            "antipathyCount": r.randrange(50),
+            "regTime": f"{day[:4]}-{day[4:6]}-{day[6:]}T{(minute // 60) % 24:02d}:{minute % 60:02d}:00+0900",
+        })
+    more = {"end": str(total)}
+    if offset + size < total:
+        more["next"] = str(offset + size)
+    payload = {"success": True, "result": {"commentList": comments, "morePage": more,
+                                           "count": {"total": total}}}
+    return f"{callback}({json.dumps(payload, ensure_ascii=False)});"
+
+
+def pub_day(cfg: MockConfig, oid: str, aid: str) -> str:
+    r = rng_for(cfg.seed, "pub", oid, aid)
+    return f"2025{r.randrange(1, 13):02d}{r.randrange(1, 29):02d}"
+
+
+def article_html(cfg: MockConfig, oid: str, aid: str) -> str:
+    d = pub_day(cfg, oid, aid)
+    ts = f"{d[:4]}-{d[4:6]}-{d[6:]}T09:00:00+0900"
+    body = "본문 " * 200
+    return (
+        f'<html><head><meta property="article:published_time" content="{ts}"></head>'
+        f"<body><div id='dic_area'>{body}</div></body></html>"
+    )
+
+
+# --------------------------------------------------
+# 녹화 / 재생
+# --------------------------------------------------
+def replay_key(path: str, query: str) -> str:
+    """녹화 파일 이름: sha1("{path}?{query}") (host 는 빼서, 대역 서버로 돌린 요청도 같은 키)"""
+    return hashlib.sha1(f"{path}?{query}".encode("utf-8")).hexdigest()
+
+
+def record_response(replay_dir: str, url: str, status: int, content_type: str, body: str):
+    """
+    응답 하나를 replay_dir/{replay_key}.json 으로 저장 (--replay_dir 가 읽는 형식):
+      {"url": 원래 URL, "status": 200, "content_type": "text/html; charset=utf-8", "body": 본문 text}
+    """
+    u = urlparse(url)
+    path = os.path.join(replay_dir, replay_key(u.path, u.query) + ".json")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "status": status, "content_type": content_type, "body": body}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def install_recorder(replay_dir: str):
+    """이 프로세스의 requests 응답 중 200 인 것을 record_response 로 녹화 (HTTPAdapter.send 를 감쌈)"""
+    from requests.adapters import HTTPAdapter
+
+    os.makedirs(replay_dir, exist_ok=True)
+    orig_send = HTTPAdapter.send
+
+    def send(self, request, **kwargs):
+        r = orig_send(self, request, **kwargs)
+        if r.status_code == 200 and not kwargs.get("stream"):
+            record_response(replay_dir, request.url, r.status_code,
+                            r.headers.get("Content-Type", "text/html"), r.text)
+        return r
+
+    HTTPAdapter.send = send
+
+
+# --------------------------------------------------
+# HTTP 서버
+# --------------------------------------------------
+class Handler(BaseHTTPRequestHandler):
+    state: MockState = None
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status: int, body: str, ctype: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def replay(self, u) -> Optional[dict]:
+        """record_response 가 남긴 녹화 응답 (없으면 None → 합성 응답)"""
+        if not self.state.cfg.replay_dir:
+            return None
+        path = os.path.join(self.state.cfg.replay_dir, replay_key(u.path, u.query) + ".json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def do_GET(self):
+        st, cfg = self.state, self.state.cfg
+        u = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(u.query, keep_blank_values=True).items()}
+
+        if u.path == "/__stats":
+            return self.send(200, json.dumps(st.stats), "application/json")
+        if u.path == "/__reset":
+            with st.lock:
+                st.stats.clear()
+            return self.send(200, "{}", "application/json")
+
+        st.count("requests")
+        if not st.allow():
+            st.count("429")
+            return self.send(429, "rate limited", "text/plain")
+        if cfg.latency or cfg.jitter:
+            time.sleep(cfg.latency + random.uniform(0, cfg.jitter))
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            st.count("500")
+            return self.send(500, "injected error", "text/plain")
+
+        rec = self.replay(u)
+        if rec is not None:
+            st.count("replay")
+            return self.send(rec.get("status", 200), rec["body"], rec.get("content_type", "text/html"))
+
+        m_article = re.search(r"/article/(?:comment/)?(\d+)/(\d+)", u.path)
+        if u.path.endswith("/search.naver"):
+            st.count("search")
+            self.send(200, search_html(cfg, q), "text/html; charset=utf-8")
+        elif u.path.startswith("/breakingnews/section/"):
+            st.count("breaking")
+            self.send(200, breaking_html(cfg, u.path.rsplit("/", 1)[-1], q.get("date", "")),
+                      "text/html; charset=utf-8")
+        elif u.path.endswith("/SECTION_ARTICLE_LIST_FOR_LATEST"):
+            st.count("section_list")
+            self.send(200, section_json(cfg, q), "application/json; charset=utf-8")
+        elif u.path.endswith("/NEWS_COMMENT_COUNT_LIST"):
+            st.count("comment_count")
+            self.send(200, comment_count_json(cfg, q), "application/json; charset=utf-8")
+        elif u.path.endswith("/web_naver_list_jsonp.json"):
+            st.count("comment_list")
+            self.send(200, comment_jsonp(cfg, q), "application/javascript; charset=utf-8")
+        elif m_article:
+            st.count("article")
+            self.send(200, article_html(cfg, m_article.group(1), m_article.group(2)), "text/html; charset=utf-8")
+        else:
+            st.count("404")
+            self.send(404, "not found", "text/plain")
+
+
+def make_server(cfg: MockConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    handler = type("MockHandler", (Handler,), {"state": MockState(cfg)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(cfg: MockConfig, host: str = "127.0.0.1", port: int = 0, ready=None):
+    """서버 실행 (ready 가 multiprocessing Queue 면 실제 포트를 넣어줌)"""
+    server = make_server(cfg, host, port)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="네이버 대역 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    for name, val in asdict(MockConfig()).items():
+        ap.add_argument(f"--{name}", type=type(val), default=val)
+    args = ap.parse_args()
+
+    cfg = MockConfig(**{k: getattr(args, k) for k in asdict(MockConfig())})
+    print(f"mock naver: http://{args.host}:{args.port}")
+    serve(cfg, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@ import os
 from datetime import timedelta
 import json
 
+from dedup_index import COMMENT
+from telemetry import TELEMETRY
+
 HEADERS_BASE = {
     "User-Agent": "Mozilla/5.0"
 }
@@ -49,29 +52,35 @@ def collect_links_day(keyword: str, day: date, headers, sleep_sec:float, fin_key
         f"?where=m_news&query={q}&pd=3&ds={ds}&de={ds}"
     )
 
-    res = requests.get(url, headers=headers, timeout=10)
-    soup = BeautifulSoup(res.text, "html.parser")
-
-    rows = []
-    for a in soup.select("a[href*='n.news.naver.com/article']"):
-        title = a.get("title") or a.text.strip()
-        href = a.get("href", "")
-        flag = is_financial_title(title, fin_keywords)
-
-        key = extract_oid_aid_key(href)
-        if not key:
-            continue
-
-        rows.append({
-        "key": key,
-        "keyword": keyword,
-        "title": title,
-        "url": href,
-        "date": ds,
-        "is_financial": int(flag)
-        })
-
-    time.sleep(sleep_sec)
+    res = requests.get(url, headers=headers, timeout=10, hooks={"response": TELEMETRY.on_response})
+
+    with TELEMETRY.stage("parse", endpoint="search.naver"):
+        soup = BeautifulSoup(res.text, "html.parser")
+
+        rows = []
+        for a in soup.select("a[href*='n.news.naver.com/article']"):
+            title = a.get("title") or a.text.strip()
+            href = a.get("href", "")
+            flag = is_financial_title(title, fin_keywords)
+
+            key = extract_oid_aid_key(href)
+            if not key:
+                continue
+
+            rows.append({
+            "key": key,
+            "keyword": keyword,
+            "title": title,
+            "url": href,
+            "date": ds,
+            "is_financial": int(flag)
+            })
+
+    TELEMETRY.count("pages")
+    TELEMETRY.count("articles", len(rows))
+
+    with TELEMETRY.stage("sleep"):
+        time.sleep(sleep_sec)
     return rows
 
 def parse_oid_aid(article_url):
@@ -99,11 +108,15 @@ def safe_jsonp_load(text):
         return None
     
 
-def collect_comments(article_url, page_size, page_sleep):
-    """커서 기반 페이지네이션을 이용해 기사 댓글 전체 수집"""
+def collect_comments(article_url, page_size, page_sleep, dedup=None, kind=COMMENT):
+    """
+    커서 기반 페이지네이션을 이용해 기사 댓글 전체 수집 (dedup: 이전 실행에서 kind 로 저장된 댓글 제외).
+    반환: (댓글 목록, complete). complete 는 댓글/다음 커서가 떨어져 정상 종료했을 때만 True,
+    HTTP 오류·JSONP 파싱 실패로 멈췄으면 False (다음 실행에서 다시 수집해야 함)
+    """
     legacy_url = to_legacy_url(article_url)
     if legacy_url is None:
-        return []
+        return [], True
 
     oid, aid = parse_oid_aid(article_url)
     object_id = f"news{oid},{aid}"
@@ -131,6 +144,7 @@ def collect_comments(article_url, page_size, page_sleep):
 
     next_cursor = None
     seen_cursors = set()
+    complete = True
 
     while True:
         if next_cursor is None:
@@ -144,10 +158,16 @@ def collect_comments(article_url, page_size, page_sleep):
                 + "&initialize=false"
             )
 
-        r = requests.get(url, headers=headers, timeout=10)
-        data = safe_jsonp_load(r.text)
+        r = requests.get(url, headers=headers, timeout=10, hooks={"response": TELEMETRY.on_response})
+        if r.status_code != 200:   # 429 / 5xx
+            complete = False
+            break
+        with TELEMETRY.stage("parse", endpoint="web_naver_list_jsonp.json"):
+            data = safe_jsonp_load(r.text)
         if not data:
+            complete = False
             break
+        TELEMETRY.count("pages")
 
         result = data.get("result", {})
         comment_list = result.get("commentList", [])
@@ -162,6 +182,10 @@ def collect_comments(article_url, page_size, page_sleep):
             seen_ids.add(cid)
             new_count += 1
 
+            # 이전 실행에서 이미 저장한 댓글은 건너뜀 (페이지 진행 판단은 seen_ids 기준 유지)
+            if dedup is not None and dedup.seen(kind, cid):
+                continue
+
             all_comments.append({
                 "comment_id": cid,
                 "article_url": article_url,
@@ -185,6 +209,8 @@ def collect_comments(article_url, page_size, page_sleep):
         seen_cursors.add(next_cursor_new)
         next_cursor = next_cursor_new
 
-        time.sleep(page_sleep)
+        with TELEMETRY.stage("sleep"):
+            time.sleep(page_sleep)
 
-    return all_comments
\ No newline at end of file
+    TELEMETRY.count("comments", len(all_comments))
+    return all_comments, complete
\ No newline at end of file
@@ -0,0 +1,294 @@
+#%%
+# 주가폭.ipynb AV/DV 계산의 벡터화 버전
+# long 형식(날짜, ticker, 종가, 거래량)을 한 번만 날짜×종목 dense 패널로 펼친 뒤
+# 전일종가 / 상승·하락 마스크 / AV·DV 를 배열 연산으로 계산한다.
+# 일별 시계열(EMA, rolling 평균)은 online.py 의 pandas 와 같은 식(한 단계씩)으로 계산해서 breadth_daily3.csv 와 값이 똑같다.
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import rolling
+from online import Ema, RollingMean, replay
+
+ALPHA_FAST = 0.10
+ALPHA_SLOW = 0.05
+MA_WINDOW = 20
+TREND_WINDOWS = (50, 200)   # 이동평균 위 종목 비율
+HIGH_LOW_WINDOW = 252       # 신고가 / 신저가 (최근 1년)
+
+BREADTH_COLUMNS = ["date", "AV", "DV", "net_vol", "trend_fast", "trend_slow",
+                   "oscillator", "summation", "osc_ma20"]
+
+
+@dataclass
+class Panel:
+    """날짜×종목 dense 패널 (행이 없는 칸은 present=False)"""
+    dates: pd.DatetimeIndex
+    tickers: np.ndarray
+    close: np.ndarray      # float64 (panel.py 에서 열면 float32) (D, T), 없는 칸 NaN
+    volume: np.ndarray     # (D, T), 없는 칸 0
+    present: np.ndarray    # bool (D, T)
+
+
+# --------------------------------------------------
+# long → panel
+# --------------------------------------------------
+def to_panel(kospi_ohlcv: pd.DataFrame) -> Panel:
+    df = kospi_ohlcv.rename(columns={"날짜": "date"})
+    need_cols = {"date", "ticker", "종가", "거래량"}
+    missing = need_cols - set(df.columns)
+    if missing:
+        raise ValueError(f"필수 컬럼 누락: {missing} / 현재 컬럼: {list(df.columns)}")
+
+    date_codes, dates = pd.factorize(pd.to_datetime(df["date"]), sort=True)
+    # 2M 행 전체에 zfill 하지 않고 고유 ticker(~1000개)에만 적용한 뒤 코드를 다시 매핑
+    raw_codes, raw_tickers = pd.factorize(df["ticker"].astype(str))
+    remap, tickers = pd.factorize(pd.Index(raw_tickers).str.zfill(6), sort=True)
+    tick_codes = remap[raw_codes]
+    D, T = len(dates), len(tickers)
+
+    flat = date_codes.astype(np.int64) * T + tick_codes
+    present = np.zeros(D * T, dtype=bool)
+    present[flat] = True
+    if present.sum() != len(flat):
+        raise ValueError("같은 (날짜, ticker) 행이 중복됨")
+
+    close = np.full(D * T, np.nan)
+    close[flat] = pd.to_numeric(df["종가"], errors="coerce").to_numpy(dtype=np.float64)
+
+    vol_src = df["거래량"]
+    vol_dtype = np.int64 if pd.api.types.is_integer_dtype(vol_src) else np.float64
+    volume = np.zeros(D * T, dtype=vol_dtype)
+    volume[flat] = vol_src.to_numpy(dtype=vol_dtype)
+    return Panel(pd.DatetimeIndex(dates), np.asarray(tickers),
+                 close.reshape(D, T), volume.reshape(D, T), present.reshape(D, T))
+
+
+def prev_close(panel: Panel) -> np.ndarray:
+    """
+    종목별 직전 '행'의 종가 (groupby("ticker")["종가"].shift(1) 과 같음).
+    중간에 행이 빠진 날은 건너뛰고, 마지막으로 행이 있던 날의 종가를 쓴다.
+    """
+    D, T = panel.close.shape
+    rows = np.where(panel.present, np.arange(D)[:, None], -1)
+    last = np.maximum.accumulate(rows, axis=0)
+    prev_row = np.vstack([np.full((1, T), -1), last[:-1]])
+    out = panel.close[np.maximum(prev_row, 0), np.arange(T)]
+    out[prev_row < 0] = np.nan
+    return out
+
+
+def moves(panel: Panel):
+    """전일종가 대비 (valid, up, down) 마스크. valid = 행이 있고 전일종가도 있는 칸"""
+    prev = prev_close(panel)
+    valid = panel.present & ~np.isnan(prev)
+    with np.errstate(invalid="ignore"):
+        up = valid & (panel.close > prev)
+        down = valid & (panel.close < prev)
+    return valid, up, down
+
+
+def summable_volume(panel: Panel) -> np.ndarray:
+    vol = panel.volume
+    if vol.dtype.kind == "f":
+        return np.nan_to_num(vol)
+    if vol.dtype.kind == "u":
+        # panel.py 의 uint32 거래량: 합계가 uint64 가 되면 net_vol 에서 음수가 넘어감
+        return vol.astype(np.int64)
+    return vol
+
+
+def masked_volume_sums(panel: Panel, up: np.ndarray, down: np.ndarray):
+    vol = summable_volume(panel)
+    av = np.where(up, vol, 0).sum(axis=1)
+    dv = np.where(down, vol, 0).sum(axis=1)
+    return av, dv
+
+
+def up_down_volume(panel: Panel):
+    """일별 상승 종목 거래량 합(AV), 하락 종목 거래량 합(DV). 보합/첫 거래일 제외"""
+    _, up, down = moves(panel)
+    return masked_volume_sums(panel, up, down)
+
+
+# --------------------------------------------------
+# 일별 시계열 (pandas 와 같은 식)
+# --------------------------------------------------
+def ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Series.ewm(alpha=alpha, adjust=False).mean() 과 같은 값 (online.Ema 를 한 번 흘림)"""
+    e = Ema(alpha)
+    return np.array([e.update(v) for v in np.asarray(x, dtype=np.float64).tolist()], dtype=np.float64)
+
+
+def rolling_mean(x: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """
+    Series.rolling(window).mean() 과 같은 값.
+    pandas 와 똑같이 창에 들어오는 값/나가는 값을 따로 Kahan 보정하며 더하고 빼서 float 오차까지 일치시킨다.
+    """
+    r = RollingMean(window, min_periods)
+    return np.array([r.update(v) for v in np.asarray(x, dtype=np.float64).tolist()], dtype=np.float64)
+
+
+# --------------------------------------------------
+# 전체
+# --------------------------------------------------
+def breadth_from_panel(panel: Panel, alpha_fast: float = ALPHA_FAST, alpha_slow: float = ALPHA_SLOW,
+                       ma_window: int = MA_WINDOW) -> pd.DataFrame:
+    av, dv = up_down_volume(panel)
+    net = av - dv
+    trend_fast = ema(net, alpha_fast)
+    trend_slow = ema(net, alpha_slow)
+    osc = trend_fast - trend_slow
+    return pd.DataFrame({
+        "date": panel.dates,
+        "AV": av,
+        "DV": dv,
+        "net_vol": net,
+        "trend_fast": trend_fast,
+        "trend_slow": trend_slow,
+        "oscillator": osc,
+        "summation": np.cumsum(osc),
+        "osc_ma20": rolling_mean(osc, ma_window),
+    })
+
+
+def breadth_daily(kospi_ohlcv: pd.DataFrame, alpha_fast: float = ALPHA_FAST,
+                  alpha_slow: float = ALPHA_SLOW) -> pd.DataFrame:
+    """long 형식 OHLCV → breadth_daily3.csv 와 같은 일별 프레임 (oscillator.breadth_daily 의 빠른 버전)"""
+    return breadth_from_panel(to_panel(kospi_ohlcv), alpha_fast, alpha_slow)
+
+
+# --------------------------------------------------
+# 여러 breadth 지표 한 번에
+# --------------------------------------------------
+def breadth_indicators(panel: Panel, ma_windows=TREND_WINDOWS, high_low_window: int = HIGH_LOW_WINDOW) -> pd.DataFrame:
+    """
+    패널 한 번으로 일별 breadth 지표를 모두 계산 (날짜는 breadth_daily3.csv 와 같음).
+      advances / declines / unchanged : 상승·하락·보합 종목 수 (전일종가 있는 종목만)
+      ad_line        : (advances - declines) 누적합
+      ud_vol_ratio   : AV / DV
+      trin           : Arms index = (advances / declines) / (AV / DV)
+      pct_above_ma{w}: 종가 > w일 이동평균인 종목 비율(%), 최근 w 거래일 종가가 모두 있는 종목 중
+      new_highs / new_lows : 신고가 / 신저가 종목 수 (rolling.new_extremes, highlow.py 와 같은 정의 —
+                             이 패널엔 고가·저가가 없어 종가로 판정)
+    전일종가·상승/하락 마스크와 종가 누적합은 한 번만 만들어 모든 지표가 같이 쓴다.
+    """
+    valid, up, down = moves(panel)
+    adv = up.sum(axis=1)
+    dec = down.sum(axis=1)
+    av, dv = masked_volume_sums(panel, up, down)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ud_ratio = av / dv
+        trin = (adv / dec) / ud_ratio
+    res = {
+        "date": panel.dates,
+        "advances": adv,
+        "declines": dec,
+        "unchanged": valid.sum(axis=1) - adv - dec,
+        "ad_line": np.cumsum(adv.astype(np.int64) - dec),
+        "AV": av,
+        "DV": dv,
+        "ud_vol_ratio": ud_ratio,
+        "trin": trin,
+    }
+
+    close = panel.close
+    for w, ma in rolling.rolling_means(close, ma_windows).items():
+        has = panel.present & ~np.isnan(ma)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            res[f"pct_above_ma{w}"] = 100.0 * (has & (close > ma)).sum(axis=1) / has.sum(axis=1)
+
+    is_high, is_low, _ = rolling.new_extremes(close, close, panel.present, high_low_window)
+    res["new_highs"] = is_high.sum(axis=1)
+    res["new_lows"] = is_low.sum(axis=1)
+    res["net_new_highs"] = res["new_highs"] - res["new_lows"]
+    return pd.DataFrame(res)
+
+
+# --------------------------------------------------
+# 그룹별 breadth (KOSPI / KOSDAQ / 업종)
+# --------------------------------------------------
+def group_members(tickers: np.ndarray, groups) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    groups: {ticker: 그룹} dict / Series, 또는 ticker(Code) 컬럼 + 그룹 컬럼들만 있는 DataFrame
+    (예: Market, Sector → 한 종목이 KOSPI 와 전기전자 두 그룹에 동시에 속함).
+    반환: 그룹 순으로 정렬된 (종목 열 인덱스, 그룹 id), 그룹 이름. 패널에 없는 종목은 무시.
+    """
+    if isinstance(groups, pd.DataFrame):
+        key = "ticker" if "ticker" in groups.columns else "Code"
+        pairs = groups.melt(id_vars=[key], value_name="group")[[key, "group"]].rename(columns={key: "ticker"})
+    else:
+        pairs = pd.Series(groups).rename_axis("ticker").reset_index(name="group")
+    pairs = pairs.dropna()
+    pairs["ticker"] = pairs["ticker"].astype(str).str.zfill(6)
+
+    pos = pd.Index(tickers).get_indexer(pairs["ticker"])
+    pairs = pairs[pos >= 0].assign(col=pos[pos >= 0]).drop_duplicates(["col", "group"])
+    gid, names = pd.factorize(pairs["group"].astype(str), sort=True)
+    order = np.argsort(gid, kind="stable")
+    return pairs["col"].to_numpy()[order], gid[order], list(names)
+
+
+def grouped_up_down_volume(panel: Panel, groups):
+    """
+    그룹별 AV / DV (D, G). 상승·하락 거래량 패널을 한 번 만들고, 그룹 순으로 모은 종목 열을
+    np.add.reduceat 으로 구간 합 (그룹마다 노트북을 다시 돌리지 않음).
+    """
+    cols, gid, names = group_members(panel.tickers, groups)
+    if len(cols) == 0:
+        raise ValueError("패널 종목 중 그룹에 속한 종목이 없음")
+    starts = np.flatnonzero(np.r_[True, gid[1:] != gid[:-1]])
+
+    _, up, down = moves(panel)
+    vol = summable_volume(panel)
+    av = np.add.reduceat(np.where(up, vol, 0)[:, cols], starts, axis=1)
+    dv = np.add.reduceat(np.where(down, vol, 0)[:, cols], starts, axis=1)
+    return av, dv, names
+
+
+def grouped_breadth(panel: Panel, groups, alpha_fast: float = ALPHA_FAST, alpha_slow: float = ALPHA_SLOW,
+                    **score_params) -> pd.DataFrame:
+    """
+    그룹별 breadth_daily3 컬럼 + osc_z_1y / osc_score_0_100 (long 형식, group 컬럼).
+    패널 집계는 한 번, 그룹마다는 길이 D 의 일별 시계열만 online.replay 로 흘린다 (breadth_daily / osc_score 와 값이 같음).
+    """
+    av, dv, names = grouped_up_down_volume(panel, groups)
+    parts = []
+    for j, name in enumerate(names):
+        daily = pd.DataFrame({"date": panel.dates, "AV": av[:, j], "DV": dv[:, j]})
+        res = replay(daily, alpha_fast=alpha_fast, alpha_slow=alpha_slow, **score_params)
+        res.insert(1, "group", name)
+        parts.append(res)
+    return pd.concat(parts, ignore_index=True)
+
+
+#%%
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    ap = argparse.ArgumentParser(description="일별 breadth 지표 (A/D, TRIN, 이동평균 위 비율, 신고가/신저가) / 그룹별 oscillator")
+    ap.add_argument("--ohlcv", default="kospi_2018_2025_ohlcv.csv", help="long 형식 CSV 또는 panel.py 디렉터리")
+    ap.add_argument("--groups", default="", help="종목 → 그룹 CSV (ticker 또는 Code 컬럼). 주면 그룹별 breadth 를 저장")
+    ap.add_argument("--group_cols", nargs="*", default=["Market"], help="그룹으로 쓸 컬럼 (예: Market Sector)")
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    if os.path.isdir(args.ohlcv):
+        import panel as panel_store
+        p = panel_store.load(args.ohlcv, columns=["close", "volume"]).breadth_panel()
+    else:
+        p = to_panel(pd.read_csv(args.ohlcv, encoding="utf-8-sig", dtype={"ticker": str}))
+    if args.groups:
+        g = pd.read_csv(args.groups, encoding="utf-8-sig", dtype={"ticker": str, "Code": str})
+        key = "ticker" if "ticker" in g.columns else "Code"
+        res = grouped_breadth(p, g[[key] + args.group_cols])
+        out = args.out or "breadth_groups.csv"
+    else:
+        res = breadth_indicators(p)
+        out = args.out or "breadth_indicators.csv"
+    res.to_csv(out, index=False, encoding="utf-8-sig")
+    print("저장:", out, res.shape)
@@ -0,0 +1,238 @@
+#%%
+# 충격 키워드 기사 급증일 이벤트 스터디
+# 기사 CSV(article_crawling / yeowon 수집본)에서 폭락·급락·패닉… 기사 수가 평소보다 튄 날을 이벤트로 잡고,
+# OHLCV 패널 전 종목에 대해 market model 비정상 수익률(AR), 누적(CAR), 비정상 거래량과 횡단면 t 통계량을 구한다.
+# 추정 구간 OLS 는 (수익률, 시장수익률) 누적합 차이로 모든 (이벤트, 종목) 쌍을 한 번에,
+# 이벤트 구간 AR 은 sliding_window_view 로 이벤트 위치의 창을 한 번에 모은다.
+import argparse
+import os
+import warnings
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import panel as panel_store
+import rolling
+from trading_calendar import TradingCalendar
+
+SHOCK_KEYWORDS = ["폭락", "급락", "패닉", "위기", "쇼크"]
+DATE_COLS = ["date", "pub_date", "news_date", "loop_date"]   # article_crawling / yeowon 수집본 날짜 컬럼 (우선순위 순)
+SPIKE_WINDOW = 60      # 기사 수 평소 수준 (직전 60일)
+SPIKE_Z = 2.0
+EST_WINDOW = (-120, -11)   # 추정 구간 (이벤트일 기준 거래일, 양끝 포함)
+EVENT_WINDOW = (-5, 20)    # 이벤트 구간
+MIN_EST_OBS = 60
+
+
+# --------------------------------------------------
+# 이벤트일
+# --------------------------------------------------
+def load_articles(paths: Iterable[str]) -> pd.DataFrame:
+    """기사 CSV 들 → (date, keyword). 날짜는 date(YYYY.MM.DD) / pub_date / news_date / loop_date(YYYYMMDD) 중 있는 것"""
+    parts = []
+    for path in paths:
+        df = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+        col = next((c for c in DATE_COLS if c in df.columns), None)
+        if col is None:
+            raise ValueError(f"{path}: 날짜 컬럼({'/'.join(DATE_COLS)})이 없음")
+        if "is_financial" in df.columns:
+            df = df[df["is_financial"].astype(float) == 1]
+        parts.append(pd.DataFrame({
+            "date": pd.to_datetime(df[col].str.replace(".", "-", regex=False), format="mixed", errors="coerce"),
+            "keyword": df["keyword"] if "keyword" in df.columns else "",
+        }))
+    return pd.concat(parts, ignore_index=True).dropna(subset=["date"])
+
+
+def spike_days(articles: pd.DataFrame, keywords: Iterable[str] = SHOCK_KEYWORDS,
+               window: int = SPIKE_WINDOW, z: float = SPIKE_Z) -> pd.DataFrame:
+    """
+    키워드 기사 수가 직전 window 일(달력일, 0건 포함) 평균 + z·표준편차를 넘은 날.
+    반환: (date, articles, z)
+    """
+    a = articles[articles["keyword"].isin(list(keywords))]
+    cnt = a.groupby(a["date"].dt.normalize()).size()
+    if cnt.empty:
+        return pd.DataFrame(columns=["date", "articles", "z"])
+    cnt = cnt.reindex(pd.date_range(cnt.index.min(), cnt.index.max()), fill_value=0)
+    base = cnt.shift(1).rolling(window, min_periods=window)
+    zs = (cnt - base.mean()) / base.std(ddof=1)
+    hit = zs > z
+    return pd.DataFrame({"date": cnt.index[hit], "articles": cnt[hit].to_numpy(), "z": zs[hit].to_numpy()})
+
+
+def to_trading_index(dates: np.ndarray, days) -> np.ndarray:
+    """이벤트 날짜 → 그날 또는 다음 거래일의 패널 행 번호 (주말·휴일 기사는 다음 거래일 반응으로, 범위 밖 -1)"""
+    return TradingCalendar(dates).session_index(pd.Series(days), has_time=False)
+
+
+# --------------------------------------------------
+# 수익률 / 시장 모형
+# --------------------------------------------------
+def returns(close: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """종목별 직전 행 대비 단순 수익률 (D, T). 행 없는 칸과 첫 행은 NaN"""
+    c = np.asarray(close, dtype=np.float64)
+    prev = rolling.shift(rolling.ffill(np.where(present, c, np.nan)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = c / prev - 1.0
+    r[~present] = np.nan
+    return r
+
+
+def window_sums(a: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """행 구간 [lo, hi) 의 합 (누적합 차이). a (D, ...) → (len(lo), ...)"""
+    s = np.concatenate([np.zeros((1,) + a.shape[1:]), np.cumsum(a, axis=0)])
+    return s[hi] - s[lo]
+
+
+def market_model(r: np.ndarray, m: np.ndarray, lo: np.ndarray, hi: np.ndarray, min_obs: int = MIN_EST_OBS):
+    """
+    이벤트마다 추정 구간 [lo, hi) 에서 종목별 OLS r = alpha + beta·m.
+    반환: alpha, beta, n (E, T). 관측치가 min_obs 미만이면 NaN
+    """
+    v = ~np.isnan(r) & ~np.isnan(m)[:, None]
+    rv = np.where(v, r, 0.0)
+    mv = np.where(v, m[:, None], 0.0)
+    n = window_sums(v.astype(np.float64), lo, hi)
+    sm, sr = window_sums(mv, lo, hi), window_sums(rv, lo, hi)
+    smm, srm = window_sums(mv * mv, lo, hi), window_sums(rv * mv, lo, hi)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (srm - sm * sr / n) / (smm - sm * sm / n)
+        alpha = (sr - beta * sm) / n
+    bad = n < min_obs
+    alpha[bad] = np.nan
+    beta[bad] = np.nan
+    return alpha, beta, n
+
+
+def nanmean(x: np.ndarray, axis: int) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # 값이 하나도 없는 칸은 NaN
+        return np.nanmean(x, axis=axis)
+
+
+def t_stat(x: np.ndarray, axis: int) -> np.ndarray:
+    """NaN 을 뺀 평균 / (표준편차 / sqrt(n))"""
+    n = (~np.isnan(x)).sum(axis=axis)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(x, axis=axis) / (np.nanstd(x, axis=axis, ddof=1) / np.sqrt(n))
+
+
+def event_study(p, events: pd.DataFrame, market: Optional[np.ndarray] = None,
+                est: tuple = EST_WINDOW, win: tuple = EVENT_WINDOW, min_obs: int = MIN_EST_OBS) -> Dict:
+    """
+    p: panel.OhlcvPanel (close, volume, present), events: (date, ...) 프레임.
+    market: 날짜별 시장수익률 (없으면 종목 동일가중 평균).
+    반환 dict:
+      events  : 패널 범위 안에 창이 다 들어가는 이벤트 (event_day = 반응 거래일)
+      rel_days: 이벤트 구간 상대 거래일 (K,)
+      ar, car : (E, K, T) 비정상 수익률, 이벤트 구간 시작부터 누적
+      abn_vol : (E, K, T) log(1+거래량) - 추정 구간 평균
+    """
+    r = returns(p.close, p.present)
+    if market is None:
+        market = nanmean(r, axis=1)
+    market = np.asarray(market, dtype=np.float64)
+    D = r.shape[0]
+
+    ev = events.copy()
+    ev["row"] = to_trading_index(p.dates, ev["date"])
+    ok = (ev["row"] + est[0] >= 0) & (ev["row"] + win[1] < D) & (ev["row"] + win[0] >= 0)
+    ev = ev[ok].reset_index(drop=True)
+    row = ev["row"].to_numpy()
+    ev["event_day"] = pd.DatetimeIndex(p.dates[row]) if len(row) else pd.DatetimeIndex([])
+
+    lo, hi = row + est[0], row + est[1] + 1
+    alpha, beta, _ = market_model(r, market, lo, hi, min_obs)
+
+    K = win[1] - win[0] + 1
+    start = row + win[0]
+    # (D-K+1, T, K) 창 뷰에서 이벤트 시작 위치만 골라 (E, K, T)
+    r_evt = sliding_window_view(r, K, axis=0)[start].transpose(0, 2, 1)
+    m_evt = sliding_window_view(market, K)[start]
+    ar = r_evt - (alpha[:, None, :] + beta[:, None, :] * m_evt[:, :, None])
+    car = np.nancumsum(ar, axis=1)
+    car[np.isnan(ar)] = np.nan
+
+    lv = np.where(p.present, np.log1p(np.asarray(p.volume, dtype=np.float64)), np.nan)
+    lv_ok = ~np.isnan(lv)
+    lv_mean = window_sums(np.where(lv_ok, lv, 0.0), lo, hi) / np.maximum(window_sums(lv_ok.astype(np.float64), lo, hi), 1)
+    lv_mean[np.isnan(alpha)] = np.nan
+    abn_vol = sliding_window_view(lv, K, axis=0)[start].transpose(0, 2, 1) - lv_mean[:, None, :]
+
+    return {"events": ev, "rel_days": np.arange(win[0], win[1] + 1), "ar": ar, "car": car, "abn_vol": abn_vol}
+
+
+# --------------------------------------------------
+# 요약
+# --------------------------------------------------
+def summarize(res: Dict) -> pd.DataFrame:
+    """
+    상대 거래일별: 전체 (이벤트, 종목) 평균 AR / CAR / 비정상 거래량과 횡단면 t,
+    그리고 이벤트별 평균을 다시 이벤트 간 평균 낸 t (이벤트끼리 겹치는 종목 상관을 덜 받음)
+    """
+    E, K, T = res["ar"].shape
+
+    def flat(a):   # (E, K, T) → (K, E·T)
+        return a.transpose(1, 0, 2).reshape(K, E * T)
+
+    ar, car, av = flat(res["ar"]), flat(res["car"]), flat(res["abn_vol"])
+    ev_car = nanmean(res["car"], axis=2)                           # (E, K)
+    return pd.DataFrame({
+        "rel_day": res["rel_days"],
+        "n": (~np.isnan(ar)).sum(axis=1),
+        "AAR": nanmean(ar, axis=1),
+        "t_AAR": t_stat(ar, axis=1),
+        "CAAR": nanmean(car, axis=1),
+        "t_CAAR": t_stat(car, axis=1),
+        "t_CAAR_events": t_stat(ev_car, axis=0),
+        "abn_vol": nanmean(av, axis=1),
+        "t_abn_vol": t_stat(av, axis=1),
+    })
+
+
+def per_event(res: Dict, upto: int = 5) -> pd.DataFrame:
+    """이벤트별 CAR[0, upto] 의 종목 평균과 횡단면 t"""
+    rel = res["rel_days"]
+    car = res["ar"][:, (rel >= 0) & (rel <= upto), :].sum(axis=1)   # 하루라도 AR 이 없으면 NaN
+    out = res["events"].copy()
+    out[f"CAR_0_{upto}"] = nanmean(car, axis=1)
+    out[f"t_CAR_0_{upto}"] = t_stat(car, axis=1)
+    out["n_tickers"] = (~np.isnan(car)).sum(axis=1)
+    return out
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="충격 키워드 기사 급증일 이벤트 스터디")
+    ap.add_argument("--articles", nargs="+", default=["../data/NAVER/article/articles_2025_financial.csv"])
+    ap.add_argument("--keywords", nargs="*", default=SHOCK_KEYWORDS)
+    ap.add_argument("--z", type=float, default=SPIKE_Z)
+    ap.add_argument("--ohlcv", default="kospi_panel", help="panel.py 디렉터리 또는 long 형식 CSV")
+    ap.add_argument("--kospi_csv", default="", help="시장수익률로 쓸 KOSPI 지수 종가 CSV (없으면 동일가중 평균)")
+    ap.add_argument("--post", type=int, default=EVENT_WINDOW[1])
+    ap.add_argument("--out", default="event_study.csv")
+    ap.add_argument("--events_out", default="event_study_events.csv")
+    args = ap.parse_args()
+
+    if os.path.isdir(args.ohlcv):
+        p = panel_store.load(args.ohlcv, columns=["close", "volume"])
+    else:
+        from oscillator import load_ohlcv_csv
+        p = panel_store.build(load_ohlcv_csv(args.ohlcv))
+
+    market = None
+    if args.kospi_csv:
+        from sweep import load_index_close
+        idx = load_index_close(args.kospi_csv)
+        idx.index = pd.to_datetime(idx.index)
+        market = idx.reindex(pd.DatetimeIndex(p.dates)).pct_change().to_numpy()
+
+    events = spike_days(load_articles(args.articles), args.keywords, z=args.z)
+    res = event_study(p, events, market, win=(EVENT_WINDOW[0], args.post))
+    summarize(res).to_csv(args.out, index=False, encoding="utf-8-sig")
+    per_event(res).to_csv(args.events_out, index=False, encoding="utf-8-sig")
+    print(f"이벤트 {len(res['events'])}개 (급증일 {len(events)}개) → {args.out}, {args.events_out}")
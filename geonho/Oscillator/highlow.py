@@ -0,0 +1,67 @@
+#%%
+# 52주 신고가 / 신저가 (주가 강도) 공포·탐욕 구성요소
+# 종목별 최근 252 거래일 고가 max / 저가 min 을 날짜×종목 패널 전체에 대해 한 번에 구하고
+# (rolling.py, 창 길이와 무관하게 O(n)), 일별 순신고가 비율과 osc_score 와 같은 형식의 0~100 점수를 만든다.
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import panel as panel_store
+import rolling
+from oscillator import CLIP_C, OSC_END, OSC_START, WINDOW, load_ohlcv_csv, osc_score
+
+HIGH_LOW_WINDOW = 252   # 52주
+
+
+def new_highs_lows(p: panel_store.OhlcvPanel, window: int = HIGH_LOW_WINDOW) -> pd.DataFrame:
+    """
+    일별 신고가 / 신저가 종목 수 (정의는 rolling.new_extremes: 고가 >= / 저가 <= 직전 (window - 1) 거래일
+    최고 / 최저, 직전 (window - 1) 거래일 행이 모두 있는 종목만).
+      net_new_highs_ratio = (new_highs - new_lows) / eligible
+    고가/저가가 없는 패널이면 종가로 본다.
+    """
+    high = p.high if "high" in p.arrays else p.close
+    low = p.low if "low" in p.arrays else p.close
+    is_high, is_low, eligible = rolling.new_extremes(high, low, np.asarray(p.present), window)
+    nh = is_high.sum(axis=1)
+    nl = is_low.sum(axis=1)
+    n = eligible.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(n > 0, (nh - nl) / n, np.nan)
+    return pd.DataFrame({
+        "date": pd.DatetimeIndex(p.dates),
+        "new_highs": nh,
+        "new_lows": nl,
+        "eligible": n,
+        "net_new_highs_ratio": ratio,
+    })
+
+
+def high_low_score(daily: pd.DataFrame, start: str = OSC_START, end: str = OSC_END,
+                   window: int = WINDOW, clip_c=CLIP_C) -> pd.DataFrame:
+    """순신고가 비율 → osc_score_2020_2025.csv 와 같은 (date, osc_score_0_100) 형식 점수"""
+    d = daily[["date", "net_new_highs_ratio"]].rename(columns={"net_new_highs_ratio": "oscillator"})
+    d = d[(d["date"] >= start) & (d["date"] <= end) & d["oscillator"].notna()]
+    return osc_score(d, window, clip_c)
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="52주 신고가/신저가 구성요소")
+    ap.add_argument("--ohlcv", default="kospi_2018_2025_ohlcv.csv", help="long 형식 CSV 또는 panel.py 디렉터리")
+    ap.add_argument("--window", type=int, default=HIGH_LOW_WINDOW)
+    ap.add_argument("--daily_out", default="high_low_daily.csv")
+    ap.add_argument("--out", default="high_low_score.csv")
+    args = ap.parse_args()
+
+    if os.path.isdir(args.ohlcv):
+        p = panel_store.load(args.ohlcv, columns=["high", "low", "close"])
+    else:
+        p = panel_store.build(load_ohlcv_csv(args.ohlcv))
+    daily = new_highs_lows(p, args.window)
+    daily.to_csv(args.daily_out, index=False, encoding="utf-8-sig")
+    score = high_low_score(daily)
+    score.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print("저장:", args.daily_out, daily.shape, "/", args.out, score.shape)
@@ -0,0 +1,266 @@
+#%%
+# 종목별 기술 지표 패널 (RSI, MACD, 이동평균, 실현 변동성)
+# ~950 종목을 날짜×종목 배열로 한 번에 계산한다. EMA 류(RSI 의 Wilder 평활, MACD)는
+# scipy.signal.lfilter 로 날짜 축 점화식을 전 종목에 한 번에 흘리고, 이동평균·변동성은 rolling.py 누적합.
+# 하루치가 들어오면 IndicatorState.append 로 마지막 상태(EMA 값, 최근 120일 종가)만 써서 그날 행을 계산.
+# init 의 패널은 마지막 날 기준 수정주가라 상태의 종가 = 그날 무수정 종가. update 는 저장소의 무수정 종가를 넣되,
+# 등락률로 기준가 조정(액면분할·유무상증자)을 찾으면 그 전까지의 가격 상태를 같은 계수로 바꿔 수정주가 기준을 이어간다.
+import argparse
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+import panel as panel_store
+import rolling
+from market_data import base_factor
+
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+MA_WINDOWS = (20, 60, 120)
+VOL_WINDOW = 20
+ANNUAL_DAYS = 252
+
+STATE_PATH = "indicator_state.npz"
+
+
+def span_alpha(span: int) -> float:
+    return 2.0 / (span + 1.0)
+
+
+# --------------------------------------------------
+# 패널 연산
+# --------------------------------------------------
+def ema_panel(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    열마다 ewm(alpha, adjust=False).mean() 점화식: y(t) = (1-alpha)*y(t-1) + alpha*x(t), y(첫 값) = 첫 값.
+    x 는 첫 값 이후 NaN 이 없어야 함 (ffill 한 종가 등). 첫 값 이전은 NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    lead = np.isnan(x)
+    lead &= np.logical_and.accumulate(lead, axis=0)   # 첫 값 이전만
+    has = ~lead.all(axis=0)
+    x0 = np.zeros(x.shape[1])
+    x0[has] = x[lead[:, has].sum(axis=0), np.flatnonzero(has)]
+
+    # 첫 값 이전을 첫 값으로 채우고 y(-1) = 첫 값으로 시작하면, 첫 값부터의 점화식과 값이 같다
+    xf = np.where(lead, x0, x)
+    y = lfilter([alpha], [1.0, -(1.0 - alpha)], xf, axis=0, zi=((1.0 - alpha) * x0)[None, :])[0]
+    y[lead] = np.nan
+    return y
+
+
+def rsi_from(gain: np.ndarray, loss: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * gain / (gain + loss)
+
+
+def realized_vol(r_mean: np.ndarray, r2_mean: np.ndarray, w: int) -> np.ndarray:
+    """창 평균 r, r² → 연율화 표본 표준편차"""
+    var = np.maximum(r2_mean - r_mean * r_mean, 0.0) * (w / (w - 1.0))
+    return np.sqrt(var * ANNUAL_DAYS)
+
+
+def compute(p) -> Tuple[Dict[str, np.ndarray], "IndicatorState"]:
+    """
+    패널(panel.OhlcvPanel / breadth.Panel: dates, tickers, close, present) → 지표 이름별 (D, T) 배열과 마지막 날 상태.
+      rsi14   : Wilder RSI (평균 상승/하락폭을 alpha=1/14 EMA 로 평활)
+      macd / macd_signal / macd_hist : EMA12 - EMA26, 그 EMA9, 차이
+      ma20 / ma60 / ma120 : 최근 w 거래일 종가가 모두 있을 때의 단순 이동평균
+      vol20   : 최근 20 거래일 로그수익률 표준편차 × sqrt(252)
+    거래정지 등으로 빠진 날은 종가가 그대로인 것으로 보고 점화식을 이어가며, 행이 없는 칸의 결과는 NaN.
+    """
+    close = np.asarray(p.close, dtype=np.float64)
+    cf = rolling.ffill(close)
+    prev = rolling.shift(cf)
+    diff = cf - prev
+
+    a_rsi = 1.0 / RSI_PERIOD
+    gain = ema_panel(np.where(np.isnan(diff), np.nan, np.maximum(diff, 0.0)), a_rsi)
+    loss = ema_panel(np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0.0)), a_rsi)
+    ema_fast = ema_panel(cf, span_alpha(MACD_FAST))
+    ema_slow = ema_panel(cf, span_alpha(MACD_SLOW))
+    macd = ema_fast - ema_slow
+    signal = ema_panel(macd, span_alpha(MACD_SIGNAL))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.log(cf / prev)
+
+    out = {
+        "rsi14": rsi_from(gain, loss),
+        "macd": macd,
+        "macd_signal": signal,
+        "macd_hist": macd - signal,
+        **{f"ma{w}": m for w, m in rolling.rolling_means(close, MA_WINDOWS).items()},
+        "vol20": realized_vol(rolling.rolling_mean(r, VOL_WINDOW), rolling.rolling_mean(r * r, VOL_WINDOW), VOL_WINDOW),
+    }
+    tail = max(MA_WINDOWS)
+    state = IndicatorState(
+        last_date=str(np.datetime64(pd.Timestamp(p.dates[-1]), "D")),
+        tickers=np.asarray(p.tickers, dtype="<U6"),
+        gain=gain[-1], loss=loss[-1], fast=ema_fast[-1], slow=ema_slow[-1], signal=signal[-1],
+        last_close=cf[-1], close_tail=close[-tail:], ret_tail=r[-VOL_WINDOW:],
+    )
+
+    # 상태를 복사한 뒤에 가림 (macd_signal 은 signal 배열 그 자체)
+    present = np.asarray(p.present)
+    for a in out.values():
+        a[~present] = np.nan
+    return out, state
+
+
+# --------------------------------------------------
+# 하루치 증분
+# --------------------------------------------------
+class IndicatorState:
+    """
+    마지막 날의 EMA 값들과 최근 120 거래일 종가 / 20 거래일 수익률 (종목 축은 tickers 순).
+    append 는 이력 없이 이것만으로 그날 지표를 계산하고 상태를 한 칸 민다 (compute 와 값이 같음).
+    가격 단위 상태(PRICE_FIELDS)는 마지막 날 종가 기준 수정주가 — 기준가 조정이 있으면 rebase 로 같이 바꾼다.
+    """
+
+    EMA_FIELDS = ("gain", "loss", "fast", "slow", "signal", "last_close")
+    PRICE_FIELDS = ("gain", "loss", "fast", "slow", "signal", "last_close", "close_tail")   # ret_tail 은 로그수익률이라 그대로
+    TAIL_FIELDS = ("close_tail", "ret_tail")
+
+    def __init__(self, last_date: str, tickers: np.ndarray, **arrays):
+        self.last_date = last_date
+        self.tickers = tickers
+        for k in self.EMA_FIELDS + self.TAIL_FIELDS:
+            setattr(self, k, np.array(arrays[k], dtype=np.float64))
+
+    def _add_tickers(self, new: np.ndarray):
+        """처음 보는 종목은 NaN 상태로 열을 추가 (ticker 정렬 유지)"""
+        tickers = np.union1d(self.tickers, new).astype("<U6")
+        pos = np.searchsorted(tickers, self.tickers)
+        for k in self.EMA_FIELDS + self.TAIL_FIELDS:
+            old = getattr(self, k)
+            grown = np.full(old.shape[:-1] + (len(tickers),), np.nan)
+            grown[..., pos] = old
+            setattr(self, k, grown)
+        self.tickers = tickers
+
+    @staticmethod
+    def _step(prev: np.ndarray, x: np.ndarray, alpha: float) -> np.ndarray:
+        """ema_panel 한 칸: 이전 값이 없으면 x 로 시작, x 가 없으면 유지"""
+        y = np.where(np.isnan(prev), x, alpha * x + (1.0 - alpha) * prev)
+        return np.where(np.isnan(x), prev, y)
+
+    def rebase(self, factor: np.ndarray):
+        """종목별 계수(기준가 / 전일종가)를 가격 단위 상태에 곱한다 (tickers 순, 조정 없는 종목은 1)"""
+        for k in self.PRICE_FIELDS:
+            setattr(self, k, getattr(self, k) * factor)
+
+    def append(self, date, tickers, close, change=None) -> pd.DataFrame:
+        """
+        하루치 (ticker, 종가) → 그날 종목별 지표 프레임 (index=ticker)
+        change(등락률)를 주면 종가는 무수정으로 보고, 기준가 조정이 있는 종목은 먼저 rebase 한다.
+        """
+        day = str(np.datetime64(pd.Timestamp(date), "D"))
+        if day <= self.last_date:
+            raise ValueError(f"이미 반영된 날짜: {day} (마지막 {self.last_date})")
+        tickers = np.asarray([str(t).zfill(6) for t in tickers], dtype="<U6")
+        new = np.setdiff1d(tickers, self.tickers)
+        if len(new):
+            self._add_tickers(new)
+
+        pos = np.searchsorted(self.tickers, tickers)
+        c = np.full(len(self.tickers), np.nan)
+        c[pos] = np.asarray(close, dtype=np.float64)
+        if change is not None:
+            chg = np.full(len(self.tickers), np.nan)
+            chg[pos] = np.asarray(change, dtype=np.float64)
+            f = base_factor(c, chg, self.last_close)
+            if (f != 1.0).any():
+                self.rebase(f)
+        present = ~np.isnan(c)
+        cf = np.where(present, c, self.last_close)
+        diff = cf - self.last_close
+
+        a_rsi = 1.0 / RSI_PERIOD
+        self.gain = self._step(self.gain, np.where(np.isnan(diff), np.nan, np.maximum(diff, 0.0)), a_rsi)
+        self.loss = self._step(self.loss, np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0.0)), a_rsi)
+        self.fast = self._step(self.fast, cf, span_alpha(MACD_FAST))
+        self.slow = self._step(self.slow, cf, span_alpha(MACD_SLOW))
+        macd = self.fast - self.slow
+        self.signal = self._step(self.signal, macd, span_alpha(MACD_SIGNAL))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = np.log(cf / self.last_close)
+        self.close_tail = np.vstack([self.close_tail, c[None, :]])[-max(MA_WINDOWS):]
+        self.ret_tail = np.vstack([self.ret_tail, r[None, :]])[-VOL_WINDOW:]
+        self.last_close = cf
+        self.last_date = day
+
+        row = {
+            "rsi14": rsi_from(self.gain, self.loss),
+            "macd": macd,
+            "macd_signal": self.signal,
+            "macd_hist": macd - self.signal,
+            **{f"ma{w}": m[-1] for w, m in rolling.rolling_means(self.close_tail, MA_WINDOWS).items()},
+            "vol20": realized_vol(rolling.rolling_mean(self.ret_tail, VOL_WINDOW)[-1],
+                                  rolling.rolling_mean(self.ret_tail ** 2, VOL_WINDOW)[-1], VOL_WINDOW),
+        }
+        res = pd.DataFrame(row, index=pd.Index(self.tickers, name="ticker"))
+        return res[present]
+
+    def save(self, path: str = STATE_PATH):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, last_date=self.last_date, tickers=self.tickers,
+                 **{k: getattr(self, k) for k in self.EMA_FIELDS + self.TAIL_FIELDS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH) -> "IndicatorState":
+        with np.load(path) as z:
+            return cls(str(z["last_date"]), z["tickers"], **{k: z[k] for k in cls.EMA_FIELDS + cls.TAIL_FIELDS})
+
+
+def to_long(p, out: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """(D, T) 지표 배열 → (date, ticker, 지표...) long 프레임 (행이 있는 칸만)"""
+    di, ti = np.nonzero(np.asarray(p.present))
+    res = {"date": pd.DatetimeIndex(p.dates)[di], "ticker": np.asarray(p.tickers)[ti]}
+    res.update({k: a[di, ti] for k, a in out.items()})
+    return pd.DataFrame(res)
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="종목별 기술 지표 패널")
+    ap.add_argument("--state", default=STATE_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("init", help="전체 이력으로 지표 계산 + 상태 저장")
+    sp.add_argument("--ohlcv", default="kospi_panel", help="panel.py 디렉터리 또는 long 형식 CSV")
+    sp.add_argument("--out", default="", help="지표 long CSV (없으면 상태만)")
+
+    sp = sub.add_parser("update", help="ohlcv_store 의 하루치를 상태에 반영")
+    sp.add_argument("date")
+    sp.add_argument("--store", default="ohlcv_store")
+    sp.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    if args.cmd == "init":
+        if os.path.isdir(args.ohlcv):
+            p = panel_store.load(args.ohlcv, columns=["close"])
+        else:
+            from oscillator import load_ohlcv_csv
+            p = panel_store.build(load_ohlcv_csv(args.ohlcv))
+        out, st = compute(p)
+        st.save(args.state)
+        if args.out:
+            to_long(p, out).to_csv(args.out, index=False, encoding="utf-8-sig")
+        print("상태 저장:", args.state, "마지막 날짜:", st.last_date, "종목", len(st.tickers))
+    else:
+        import warehouse
+        st = IndicatorState.load(args.state)
+        day = warehouse.read(args.date, args.date, columns=["종가", "등락률"], root=args.store, adjusted=False)
+        if day.empty:
+            raise SystemExit(f"{args.date}: 저장소에 행이 없음")
+        res = st.append(args.date, day["ticker"], day["종가"], day["등락률"])
+        st.save(args.state)
+        if args.out:
+            res.reset_index().to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(args.date, "종목", len(res), "→", args.state)
@@ -0,0 +1,165 @@
+#%%
+# 날짜별 전 종목 OHLCV 수집기
+# 노트북은 오늘 상장된 KOSPI 종목(~950개)마다 get_market_ohlcv_by_date 를 직렬로 호출해서
+# 느리고, 그 사이 상장폐지된 종목은 빠진다. 여기서는 거래일마다 시장 전체 단면을 받아
+# (스레드 풀 + 재시도) 노트북과 같은 long 형식 kospi_ohlcv 프레임으로 합친다.
+# 날짜별 단면은 무수정 시세라, 노트북(get_market_ohlcv_by_date 기본 = 수정주가)과 맞추려고
+# 등락률(KRX 기준가 대비)에서 액면분할·유무상증자 같은 기준가 조정을 찾아 수정 계수를 거꾸로 누적한다 (adjust_prices).
+# 계수는 조회 구간 마지막 날 기준 (그 뒤 이벤트는 반영 안 됨, 종목별 상수 배라 등락 판정은 같음). 거래량은 무수정 그대로.
+# 거래정지 행(시가·고가·저가 0, 거래량 0)은 노트북처럼 그대로 둔다.
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["시가", "고가", "저가", "종가", "거래량", "등락률"]
+INDEX_TICKER = "1001"   # 코스피 지수 (거래일 목록용)
+PRICE_COLUMNS = ["시가", "고가", "저가", "종가"]
+ADJ_TOL = 1e-3   # 기준가 / 전일종가 가 이만큼 넘게 다를 때만 조정 (등락률 소수 둘째 자리 반올림 오차 무시)
+
+
+class PykrxSource:
+    """pykrx 기반 데이터 소스"""
+
+    def __init__(self):
+        from pykrx import stock
+        self.stock = stock
+
+    def trading_days(self, start: str, end: str) -> List[str]:
+        idx = self.stock.get_index_ohlcv(start, end, INDEX_TICKER).index
+        return [d.strftime("%Y%m%d") for d in idx]
+
+    def ohlcv_on(self, day: str, market: str = "KOSPI") -> pd.DataFrame:
+        """해당 거래일 시장 전체 단면 (index=ticker)"""
+        return self.stock.get_market_ohlcv(day, market=market)
+
+    def index_close(self, start: str, end: str, ticker: str = INDEX_TICKER) -> pd.Series:
+        """지수 종가 (index=날짜)"""
+        return self.stock.get_index_ohlcv(start, end, ticker)["종가"]
+
+
+class FixtureSource:
+    """
+    long 형식 CSV/프레임(날짜, ticker, 시가...)을 pykrx 대신 쓰는 소스 (테스트·오프라인용).
+    market 컬럼이 있으면 market 인자로 거른다.
+    """
+
+    def __init__(self, data):
+        df = pd.read_csv(data, encoding="utf-8-sig", dtype={"ticker": str}) if isinstance(data, str) else data.copy()
+        df = df.rename(columns={"date": "날짜"})
+        df["날짜"] = pd.to_datetime(df["날짜"])
+        df["ticker"] = df["ticker"].astype(str).str.zfill(6)
+        self.df = df
+        self.by_day = {d.strftime("%Y%m%d"): g for d, g in df.groupby("날짜")}
+
+    def trading_days(self, start: str, end: str) -> List[str]:
+        return [d for d in sorted(self.by_day) if start <= d <= end]
+
+    def ohlcv_on(self, day: str, market: str = "KOSPI") -> pd.DataFrame:
+        g = self.by_day.get(day)
+        if g is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        if "market" in g.columns and market != "ALL":
+            g = g[g["market"] == market]
+        return g.set_index("ticker")[[c for c in OHLCV_COLUMNS if c in g.columns]]
+
+
+def fetch_day(source, day: str, market: str, retries: int = 3, backoff: float = 1.0) -> pd.DataFrame:
+    """거래일 하나의 단면 수집 (실패 시 지수 백오프 재시도)"""
+    for attempt in range(retries + 1):
+        try:
+            df = source.ohlcv_on(day, market=market)
+            break
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+    df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].copy()
+    df.index = df.index.astype(str).str.zfill(6)
+    df.index.name = "ticker"
+    df = df.reset_index()
+    df.insert(0, "날짜", pd.Timestamp(day))
+    return df
+
+
+def base_factor(close, change, prev_close) -> np.ndarray:
+    """
+    기준가 / 전일종가 (기준가 = 종가 / (1 + 등락률/100)). 기준가 조정이 없거나 값이 없는 칸은 1.
+    이 계수를 그 전 날짜 가격에 곱하면 그날 가격과 같은 기준의 수정주가가 된다.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    prev = np.asarray(prev_close, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f = close / (1.0 + np.asarray(change, dtype=np.float64) / 100.0) / prev
+    ok = np.isfinite(f) & (f > 0) & (prev > 0) & (close > 0) & (np.abs(f - 1.0) > ADJ_TOL)
+    return np.where(ok, f, 1.0)
+
+
+def adjust_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    (ticker, 날짜 순) long 프레임의 시가·고가·저가·종가를 수정주가로.
+    기준가 = 종가 / (1 + 등락률/100) 이 전일종가와 다르면 그날 기준가 조정이 있었던 것 →
+    그 전 날짜 가격에 기준가 / 전일종가 를 곱한다. 등락률 컬럼이 없으면 그대로 반환.
+    """
+    if df.empty or "등락률" not in df.columns:
+        return df
+    prev = df.groupby("ticker", sort=False)["종가"].shift(1)
+    f = base_factor(df["종가"], df["등락률"], prev)
+    logf = pd.Series(np.log(f), index=df.index)
+    g = logf.groupby(df["ticker"], sort=False)
+    mult = np.exp(g.transform("sum") - g.cumsum()).to_numpy()   # 이 날 뒤의 조정 계수 곱
+    if (mult == 1.0).all():
+        return df
+    df = df.copy()
+    for c in PRICE_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].to_numpy(dtype=np.float64) * mult
+    return df
+
+
+def fetch_market_ohlcv(start: str, end: str, market: str = "KOSPI", source=None,
+                       workers: int = 8, retries: int = 3, backoff: float = 1.0,
+                       days: Optional[List[str]] = None, adjusted: bool = True) -> pd.DataFrame:
+    """
+    start~end 전 거래일의 시장 단면을 병렬 수집해 long 프레임으로 반환.
+    컬럼/정렬은 노트북의 kospi_ohlcv 와 같음: 날짜, ticker, 시가, 고가, 저가, 종가, 거래량, 등락률 (ticker, 날짜 순)
+    adjusted=False 면 무수정 단면 그대로 (warehouse.py 는 무수정으로 쌓고 읽을 때 수정)
+    """
+    source = source or PykrxSource()
+    days = days if days is not None else source.trading_days(start, end)
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        parts = list(ex.map(lambda d: fetch_day(source, d, market, retries, backoff), days))
+
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=["날짜", "ticker"] + OHLCV_COLUMNS)
+
+    df = pd.concat(parts, ignore_index=True)
+    df = df.sort_values(["ticker", "날짜"]).reset_index(drop=True)
+    n_zero = int((df["종가"] <= 0).sum())
+    if n_zero:   # 노트북처럼 버리지 않고 개수만 알림
+        print(f"market_data: 종가 0 이하 행 {n_zero}개 (그대로 둠)")
+    return adjust_prices(df) if adjusted else df
+
+
+#%%
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="날짜별 전 종목 OHLCV 수집")
+    ap.add_argument("--start", default="20171201")
+    ap.add_argument("--end", default="20251230")
+    ap.add_argument("--market", default="KOSPI")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--out", default="kospi_2018_2025_ohlcv.csv")
+    ap.add_argument("--raw", action="store_true", help="수정주가로 바꾸지 않고 무수정 단면 그대로")
+    args = ap.parse_args()
+
+    t0 = time.time()
+    kospi_ohlcv = fetch_market_ohlcv(args.start, args.end, args.market, workers=args.workers, adjusted=not args.raw)
+    kospi_ohlcv.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print("완료:", kospi_ohlcv.shape, f"{time.time() - t0:.1f}s")
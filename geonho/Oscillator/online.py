@@ -0,0 +1,308 @@
+#%%
+# 하루치 AV/DV 가 들어올 때마다 oscillator / osc_score_0_100 을 O(1) 로 갱신하는 상태 객체
+# 전체 이력을 ewm / rolling 으로 다시 계산하지 않고 EMA 값, summation, 20일·252일 창의 누적합만 들고 간다.
+# pandas 의 ewm(adjust=False), rolling().mean(), rolling().std() 과 같은 식·같은 연산 순서라서
+# 배치 계산(breadth_daily3.csv → osc_score)과 값이 비트 단위로 같다.
+import argparse
+import copy
+import json
+import math
+import os
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+ALPHA_FAST = 0.10
+ALPHA_SLOW = 0.05
+MA_WINDOW = 20
+WINDOW = 252
+CLIP_C = 5
+SCORE_START = "2018-12-21"   # oscillator_range 시작일 (점수 창은 이 날부터 채움)
+
+STATE_PATH = "osc_state.json"
+
+
+# --------------------------------------------------
+# 기본 상태 (pandas window 집계 한 단계씩)
+# --------------------------------------------------
+class Ema:
+    """Series.ewm(alpha=alpha, adjust=False).mean() 한 단계"""
+
+    def __init__(self, alpha: float):
+        # pandas 는 alpha 를 center of mass 로 바꿨다가 다시 alpha 로 되돌려 쓴다 (같은 반올림 재현)
+        com = (1 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + com)
+        self.weighted = None
+        self.old_wt = 1.0
+
+    def update(self, x: float) -> float:
+        if self.weighted is None:
+            self.weighted = x
+        elif self.weighted == self.weighted:
+            # 결측 구간 동안에도 이전 값 가중치는 계속 줄어든다 (ignore_na=False)
+            self.old_wt *= 1.0 - self.alpha
+            if x == x:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif x == x:
+            self.weighted = x
+        return self.weighted
+
+
+class RollingMean:
+    """Series.rolling(window, min_periods).mean() 한 단계 (들어오는 값/나가는 값 각각 Kahan 보정)"""
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = self.neg_ct = self.same = 0
+        self.sum_x = self.comp_add = self.comp_remove = 0.0
+        self.prev_value = None
+
+    def update(self, v: float) -> float:
+        if self.prev_value is None:
+            self.prev_value = v
+        # pandas 순서: 나가는 값 먼저 빼고 들어오는 값 더하기
+        if len(self.values) == self.window:
+            r = self.values.popleft()
+            if r == r:
+                self.nobs -= 1
+                y = -r - self.comp_remove
+                t = self.sum_x + y
+                self.comp_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, r) < 0:
+                    self.neg_ct -= 1
+        self.values.append(v)
+        if v == v:
+            self.nobs += 1
+            y = v - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, v) < 0:
+                self.neg_ct += 1
+            self.same = self.same + 1 if v == self.prev_value else 1
+            self.prev_value = v
+        return self.value()
+
+    def value(self) -> float:
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            res = self.sum_x / self.nobs
+            if self.same >= self.nobs:
+                return self.prev_value
+            if self.neg_ct == 0 and res < 0:
+                return 0.0
+            if self.neg_ct == self.nobs and res > 0:
+                return 0.0
+            return res
+        return float("nan")
+
+
+class RollingStd:
+    """
+    Series.rolling(window, min_periods).std(ddof) 한 단계 (Welford 갱신 + Kahan 보정).
+    pandas 처럼 제곱합이 한 번에 크게 줄면(상쇄 오차 위험) 창 안의 값으로 처음부터 다시 계산한다.
+    """
+
+    INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+
+    def __init__(self, window: int, min_periods: Optional[int] = None, ddof: int = 1):
+        self.window = window
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.ddof = ddof
+        self.values = deque()
+        self.nobs = 0.0
+        self.mean_x = self.ssqdm_x = self.comp_add = self.comp_remove = 0.0
+
+    def _add(self, v: float) -> bool:
+        if v != v:
+            return False
+        prev_m2 = self.ssqdm_x
+        self.nobs += 1
+        prev_mean = self.mean_x - self.comp_add
+        y = v - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (v - prev_mean) * (v - self.mean_x)
+        return prev_m2 * self.INV_COND_TOL > self.ssqdm_x
+
+    def _remove(self, r: float) -> bool:
+        if r != r:
+            return False
+        prev_m2 = self.ssqdm_x
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp_remove
+            y = r - self.comp_remove
+            t = y - self.mean_x
+            self.comp_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (r - prev_mean) * (r - self.mean_x)
+            return prev_m2 * self.INV_COND_TOL > self.ssqdm_x
+        self.mean_x = self.ssqdm_x = 0.0
+        return False
+
+    def update(self, v: float) -> float:
+        unstable = False
+        if len(self.values) == self.window:
+            unstable = self._remove(self.values.popleft())
+        self.values.append(v)
+        unstable = self._add(v) or unstable
+        if unstable:
+            self.nobs = 0.0
+            self.mean_x = self.ssqdm_x = self.comp_add = self.comp_remove = 0.0
+            for x in self.values:
+                self._add(x)
+        return self.value()
+
+    def value(self) -> float:
+        if self.nobs >= self.min_periods and self.nobs > self.ddof:
+            var = self.ssqdm_x / (self.nobs - self.ddof)
+            return math.sqrt(var) if var >= 0 else 0.0
+        return float("nan")
+
+
+# --------------------------------------------------
+# oscillator + 점수
+# --------------------------------------------------
+class OscillatorState:
+    """
+    update(date, AV, DV) 한 번에 breadth_daily3.csv 한 행 + osc_score 한 행을 계산.
+    점수용 252일 창은 score_start 이후 날짜만 받는다 (노트북 oscillator_range → osc_score 와 같음).
+    """
+
+    def __init__(self, alpha_fast: float = ALPHA_FAST, alpha_slow: float = ALPHA_SLOW,
+                 ma_window: int = MA_WINDOW, window: int = WINDOW, clip_c=CLIP_C,
+                 score_start: str = SCORE_START):
+        self.params = {"alpha_fast": alpha_fast, "alpha_slow": alpha_slow, "ma_window": ma_window,
+                       "window": window, "clip_c": clip_c, "score_start": score_start}
+        self.fast = Ema(alpha_fast)
+        self.slow = Ema(alpha_slow)
+        self.ma = RollingMean(ma_window)
+        self.mu = RollingMean(window)
+        self.sd = RollingStd(window)
+        self.summation = 0.0
+        self.last_date: Optional[str] = None
+        self.score_start = pd.Timestamp(score_start)
+        self.clip_c = clip_c
+
+    def update(self, date, av, dv) -> Dict:
+        day = pd.Timestamp(date)
+        if self.last_date is not None and day <= pd.Timestamp(self.last_date):
+            raise ValueError(f"이미 반영된 날짜: {day.date()} (마지막 {self.last_date})")
+
+        net = av - dv
+        trend_fast = self.fast.update(float(net))
+        trend_slow = self.slow.update(float(net))
+        osc = trend_fast - trend_slow
+        self.summation = osc if self.last_date is None else self.summation + osc
+        row = {
+            "date": day, "AV": av, "DV": dv, "net_vol": net,
+            "trend_fast": trend_fast, "trend_slow": trend_slow, "oscillator": osc,
+            "summation": self.summation, "osc_ma20": self.ma.update(osc),
+            "osc_z_1y": float("nan"), "osc_score_0_100": float("nan"),
+        }
+        if day >= self.score_start:
+            mu, sd = self.mu.update(osc), self.sd.update(osc)
+            z = (osc - mu) / sd if sd == sd and sd > 0 else float("nan")   # 창 분산 0 (평평한 구간) → NaN
+            row["osc_z_1y"] = z
+            zc = z if self.clip_c is None or z != z else min(max(z, -self.clip_c), self.clip_c)
+            row["osc_score_0_100"] = float(ndtr(zc) * 100)   # norm.cdf 와 같은 함수, 스칼라 호출 비용만 작음
+        self.last_date = day.strftime("%Y-%m-%d")
+        return row
+
+    def preview(self, date, av, dv) -> Dict:
+        """상태를 바꾸지 않고 계산만 (장중 잠정치)"""
+        return copy.deepcopy(self).update(date, av, dv)
+
+    # --------------------------------------------------
+    # 저장 / 복원
+    # --------------------------------------------------
+    def to_dict(self) -> Dict:
+        def dump(obj):
+            return {k: (list(v) if isinstance(v, deque) else v) for k, v in vars(obj).items()}
+
+        return {
+            "params": self.params,
+            "last_date": self.last_date,
+            "summation": self.summation,
+            "fast": dump(self.fast), "slow": dump(self.slow),
+            "ma": dump(self.ma), "mu": dump(self.mu), "sd": dump(self.sd),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "OscillatorState":
+        st = cls(**d["params"])
+        st.last_date = d["last_date"]
+        st.summation = d["summation"]
+        for name in ("fast", "slow", "ma", "mu", "sd"):
+            obj = getattr(st, name)
+            for k, v in d[name].items():
+                setattr(obj, k, deque(v) if isinstance(getattr(obj, k), deque) else v)
+        return st
+
+    def save(self, path: str = STATE_PATH):
+        # float 는 json 에서 repr 로 왕복하므로 값이 그대로 보존됨 (NaN 포함)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH) -> "OscillatorState":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_history(cls, breadth: pd.DataFrame, **params) -> "OscillatorState":
+        """breadth_daily3.csv (date, AV, DV) 이력을 한 번 흘려 상태 생성"""
+        st = cls(**params)
+        for d, av, dv in zip(breadth["date"], breadth["AV"].to_numpy(), breadth["DV"].to_numpy()):
+            st.update(d, av, dv)
+        return st
+
+
+def replay(breadth: pd.DataFrame, **params) -> pd.DataFrame:
+    """이력 전체를 하루씩 흘린 결과 (배치 계산과 비교용)"""
+    st = OscillatorState(**params)
+    rows = [st.update(d, av, dv) for d, av, dv in zip(breadth["date"], breadth["AV"].to_numpy(),
+                                                     breadth["DV"].to_numpy())]
+    return pd.DataFrame(rows)
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="oscillator / 점수 증분 갱신")
+    ap.add_argument("--state", default=STATE_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("init", help="breadth_daily3.csv 이력으로 상태 생성")
+    p.add_argument("--breadth", default="breadth_daily3.csv")
+
+    p = sub.add_parser("update", help="하루치 AV/DV 반영")
+    p.add_argument("date")
+    p.add_argument("av", type=int)
+    p.add_argument("dv", type=int)
+    p.add_argument("--preview", action="store_true", help="상태 저장 없이 잠정치만 계산")
+    args = ap.parse_args()
+
+    if args.cmd == "init":
+        b = pd.read_csv(args.breadth)
+        st = OscillatorState.from_history(b)
+        st.save(args.state)
+        print("상태 저장:", args.state, "마지막 날짜:", st.last_date)
+    else:
+        st = OscillatorState.load(args.state)
+        row = st.preview(args.date, args.av, args.dv) if args.preview else st.update(args.date, args.av, args.dv)
+        if not args.preview:
+            st.save(args.state)
+        print(json.dumps({k: (str(v.date()) if isinstance(v, pd.Timestamp) else
+                              (None if isinstance(v, float) and np.isnan(v) else v))
+                          for k, v in row.items()}, ensure_ascii=False, default=int))
@@ -0,0 +1,149 @@
+#%%
+# 주가폭.ipynb 의 계산 셀을 함수로 옮긴 모듈 (pipeline.py 에서 단계별로 호출)
+import os
+
+import pandas as pd
+from scipy.stats import norm
+
+import breadth
+import panel
+import warehouse
+from market_data import fetch_market_ohlcv
+
+# --------------------------------------------------
+# 설정 (노트북과 동일한 기본값)
+# --------------------------------------------------
+START = "20171201"
+END = "20251230"
+
+ALPHA_FAST = 0.10
+ALPHA_SLOW = 0.05
+
+OSC_START = "2018-12-21"
+OSC_END = "2025-12-30"
+
+OHLCV_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), warehouse.STORE_DIR)
+
+WINDOW = 252   # 최근 1년
+CLIP_C = 5     # 점수용 클립(None 이면 끄기)
+
+
+# --------------------------------------------------
+# 1) KOSPI 종목별 OHLCV
+# --------------------------------------------------
+def fetch_kospi_ohlcv(start: str = START, end: str = END, source=None, workers: int = 8) -> pd.DataFrame:
+    """거래일별 KOSPI 전 종목 단면을 병렬 수집 (상장폐지 종목 포함, market_data.py)"""
+    return fetch_market_ohlcv(start, end, market="KOSPI", source=source, workers=workers)
+
+
+def load_ohlcv_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype={"ticker": str})
+    return df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")])
+
+
+# --------------------------------------------------
+# 2) 일별 AV/DV + McClellan Volume Oscillator
+# --------------------------------------------------
+def breadth_daily(kospi_ohlcv: pd.DataFrame, alpha_fast: float = ALPHA_FAST,
+                  alpha_slow: float = ALPHA_SLOW) -> pd.DataFrame:
+    """long 형식 OHLCV → breadth_daily3.csv 와 같은 일별 프레임 (노트북 그대로, 기준 구현. 파이프라인은 breadth.py 사용)"""
+    df = kospi_ohlcv.rename(columns={"날짜": "date"})
+
+    need_cols = {"date", "ticker", "종가", "거래량"}
+    missing = need_cols - set(df.columns)
+    if missing:
+        raise ValueError(f"필수 컬럼 누락: {missing} / 현재 컬럼: {list(df.columns)}")
+
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df["ticker"] = df["ticker"].astype(str).str.zfill(6)
+
+    # 정렬 + 전일종가 계산
+    df = df.sort_values(["ticker", "date"])
+    df["prev_close"] = df.groupby("ticker")["종가"].shift(1)
+
+    # 상승/하락 판정 (prev_close 없는 행, 보합 제외)
+    valid = df["prev_close"].notna()
+    up = valid & (df["종가"] > df["prev_close"])
+    down = valid & (df["종가"] < df["prev_close"])
+
+    df["up_vol"] = df["거래량"].where(up, 0)
+    df["down_vol"] = df["거래량"].where(down, 0)
+
+    daily = (
+        df.groupby("date", as_index=False)[["up_vol", "down_vol"]]
+          .sum()
+          .rename(columns={"up_vol": "AV", "down_vol": "DV"})
+    )
+    daily["net_vol"] = daily["AV"] - daily["DV"]
+
+    # EMA: trend(t) = (1-alpha)*trend(t-1) + alpha*net_vol(t)
+    daily["trend_fast"] = daily["net_vol"].ewm(alpha=alpha_fast, adjust=False).mean()
+    daily["trend_slow"] = daily["net_vol"].ewm(alpha=alpha_slow, adjust=False).mean()
+    daily["oscillator"] = daily["trend_fast"] - daily["trend_slow"]
+
+    daily["summation"] = daily["oscillator"].cumsum()
+    daily["osc_ma20"] = daily["oscillator"].rolling(20).mean()
+    return daily
+
+
+# --------------------------------------------------
+# 3) 기간 필터
+# --------------------------------------------------
+def oscillator_range(daily: pd.DataFrame, start: str = OSC_START, end: str = OSC_END) -> pd.DataFrame:
+    daily = daily.copy()
+    daily["date"] = pd.to_datetime(daily["date"])
+    mask = (daily["date"] >= start) & (daily["date"] <= end)
+    return daily.loc[mask, ["date", "oscillator"]].copy()
+
+
+# --------------------------------------------------
+# 4) rolling z-score → 0~100 점수
+# --------------------------------------------------
+def osc_score(out: pd.DataFrame, window: int = WINDOW, clip_c=CLIP_C) -> pd.DataFrame:
+    out = out.copy()
+    out["date"] = pd.to_datetime(out["date"])
+    out = out.sort_values("date")
+
+    roll = out["oscillator"].rolling(window, min_periods=window)
+    mu = roll.mean()
+    sd = roll.std(ddof=1)
+    out["osc_z_1y"] = (out["oscillator"] - mu) / sd
+
+    z_for_score = out["osc_z_1y"]
+    if clip_c is not None:
+        z_for_score = z_for_score.clip(-clip_c, clip_c)
+
+    out["osc_score_0_100"] = norm.cdf(z_for_score) * 100
+    return out.loc[out["osc_score_0_100"].notna(), ["date", "osc_score_0_100"]].copy()
+
+
+# --------------------------------------------------
+# 파일 단위 래퍼 (pipeline 단계)
+# --------------------------------------------------
+def save_csv(df: pd.DataFrame, path: str):
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def run_fetch(out_csv: str, start: str = START, end: str = END, store_dir: str = OHLCV_STORE, source=None):
+    """저장소(warehouse.py)에 없는 거래일만 받아 채운 뒤 기간 조회 결과를 수정주가 CSV 로 저장 (노트북과 같게)"""
+    new_days = warehouse.update(start, end, market="KOSPI", source=source, root=store_dir)
+    print(f"ohlcv: 새 거래일 {len(new_days)}개")
+    save_csv(warehouse.read(start, end, root=store_dir, adjusted=True), out_csv)
+
+
+def run_breadth(ohlcv_csv: str, out_csv: str, alpha_fast: float = ALPHA_FAST, alpha_slow: float = ALPHA_SLOW):
+    """ohlcv_csv 가 디렉터리면 panel.py 의 compact 패널을 memory-map 으로 열어 CSV 파싱을 건너뜀"""
+    if os.path.isdir(ohlcv_csv):
+        p = panel.load(ohlcv_csv, columns=["close", "volume"])
+        save_csv(breadth.breadth_from_panel(p.breadth_panel(), alpha_fast, alpha_slow), out_csv)
+        return
+    save_csv(breadth.breadth_daily(load_ohlcv_csv(ohlcv_csv), alpha_fast, alpha_slow), out_csv)
+
+
+def run_oscillator(breadth_csv: str, out_csv: str, start: str = OSC_START, end: str = OSC_END):
+    save_csv(oscillator_range(pd.read_csv(breadth_csv), start, end), out_csv)
+
+
+def run_score(osc_csv: str, out_csv: str, window: int = WINDOW, clip_c=CLIP_C):
+    save_csv(osc_score(pd.read_csv(osc_csv), window, clip_c), out_csv)
@@ -0,0 +1,183 @@
+#%%
+# KOSPI OHLCV 를 날짜×종목 compact 패널로 저장 / memory-map 으로 열기
+# long 형식 frame(object ticker, 컬럼마다 int64/float64)과 CSV 왕복 대신
+#   dates.npy    datetime64[D] (D,)
+#   tickers.npy  '<U6' (T,)  → 종목 코드 = 이 배열의 int16 인덱스
+#   close.npy / open.npy / high.npy / low.npy   float32 (D, T), 행 없는 칸 NaN
+#   change.npy   등락률 float32 (D, T)
+#   volume.npy   uint32 (최댓값이 넘치면 int64) (D, T), 행 없는 칸 0
+#   present.npy  bool (D, T), (날짜, 종목) 행이 있었는지
+# 로 나눠 저장하고, np.load(mmap_mode="r") 로 복사 없이 연다.
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from breadth import Panel
+
+PANEL_DIR = "kospi_panel"
+PRICE_COLUMNS = {"시가": "open", "고가": "high", "저가": "low", "종가": "close", "등락률": "change"}
+FLOAT32_EXACT = 2 ** 24   # 이보다 작은 정수 가격은 float32 로 정확히 표현됨
+
+
+@dataclass
+class OhlcvPanel:
+    dates: np.ndarray                    # datetime64[D] (D,)
+    tickers: np.ndarray                  # '<U6' (T,)
+    arrays: Dict[str, np.ndarray]        # close/open/high/low/change/volume/present (D, T)
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.tickers)
+
+    def codes(self, tickers: Iterable[str]) -> np.ndarray:
+        """ticker 문자열 → int16 종목 코드 (없는 종목은 KeyError)"""
+        t = np.asarray([str(x).zfill(6) for x in tickers])
+        idx = np.searchsorted(self.tickers, t)
+        idx = np.minimum(idx, len(self.tickers) - 1)
+        bad = self.tickers[idx] != t
+        if bad.any():
+            raise KeyError(f"없는 종목: {list(t[bad])[:5]}")
+        return idx.astype(np.int16)
+
+    def date_slice(self, start=None, end=None) -> slice:
+        """날짜 범위 → 행 slice (정렬된 dates 에 searchsorted)"""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), "D"))
+        hi = len(self.dates) if end is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(end).date(), "D"), side="right")
+        return slice(int(lo), int(hi))
+
+    def breadth_panel(self) -> Panel:
+        """breadth.py 엔진 입력 (mmap 배열을 그대로 넘김)"""
+        return Panel(pd.DatetimeIndex(self.dates), self.tickers, self.close, self.volume, self.present)
+
+    def to_long(self) -> pd.DataFrame:
+        """노트북 kospi_ohlcv 와 같은 long 형식으로 되돌리기 (ticker, 날짜 순)"""
+        di, ti = np.nonzero(self.present.T)   # 종목 순 → 날짜 순
+        out = {"날짜": pd.DatetimeIndex(self.dates[ti]), "ticker": self.tickers[di]}
+        for ko, en in PRICE_COLUMNS.items():
+            if en in self.arrays:
+                out[ko] = self.arrays[en].T[di, ti].astype(np.float64)
+        out["거래량"] = self.volume.T[di, ti].astype(np.int64)
+        cols = ["날짜", "ticker", "시가", "고가", "저가", "종가", "거래량", "등락률"]
+        return pd.DataFrame(out)[[c for c in cols if c in out]]
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays.values()) + self.dates.nbytes + self.tickers.nbytes
+
+
+# --------------------------------------------------
+# long → panel
+# --------------------------------------------------
+def price_dtype(values: np.ndarray):
+    """float32 로 손실 없이 담기면 float32, 아니면 float64"""
+    v = values[~np.isnan(values)]
+    if len(v) == 0 or (np.abs(v).max() < FLOAT32_EXACT and np.array_equal(v.astype(np.float32), v)):
+        return np.float32
+    return np.float64
+
+
+def build(kospi_ohlcv: pd.DataFrame) -> OhlcvPanel:
+    df = kospi_ohlcv.rename(columns={"date": "날짜"})
+    date_codes, dates = pd.factorize(pd.to_datetime(df["날짜"]), sort=True)
+    raw_codes, raw_tickers = pd.factorize(df["ticker"].astype(str))
+    remap, tickers = pd.factorize(pd.Index(raw_tickers).str.zfill(6), sort=True)
+    tick_codes = remap[raw_codes]
+    D, T = len(dates), len(tickers)
+    if T > np.iinfo(np.int16).max:
+        raise ValueError(f"종목 수 {T} 가 int16 범위를 넘음")
+
+    flat = date_codes.astype(np.int64) * T + tick_codes
+    present = np.zeros(D * T, dtype=bool)
+    present[flat] = True
+    if present.sum() != len(flat):
+        raise ValueError("같은 (날짜, ticker) 행이 중복됨")
+
+    arrays = {}
+    for ko, en in PRICE_COLUMNS.items():
+        if ko not in df.columns:
+            continue
+        v = pd.to_numeric(df[ko], errors="coerce").to_numpy(dtype=np.float64)
+        dt = np.float32 if en == "change" else price_dtype(v)
+        a = np.full(D * T, np.nan, dtype=dt)
+        a[flat] = v
+        arrays[en] = a.reshape(D, T)
+
+    vol = pd.to_numeric(df["거래량"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    vdt = np.uint32 if len(vol) == 0 or (vol.min() >= 0 and vol.max() <= np.iinfo(np.uint32).max) else np.int64
+    a = np.zeros(D * T, dtype=vdt)
+    a[flat] = vol
+    arrays["volume"] = a.reshape(D, T)
+    arrays["present"] = present.reshape(D, T)
+
+    return OhlcvPanel(np.asarray(dates.values, dtype="datetime64[D]"),
+                      np.asarray(tickers, dtype="<U6"), arrays)
+
+
+# --------------------------------------------------
+# 저장 / 열기
+# --------------------------------------------------
+def save(panel: OhlcvPanel, path: str = PANEL_DIR):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "dates.npy"), panel.dates)
+    np.save(os.path.join(path, "tickers.npy"), panel.tickers)
+    for name, a in panel.arrays.items():
+        tmp = os.path.join(path, f".{name}.npy")
+        np.save(tmp, np.ascontiguousarray(a))
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+    meta = {
+        "shape": list(panel.shape),
+        "first": str(panel.dates[0]) if len(panel.dates) else None,
+        "last": str(panel.dates[-1]) if len(panel.dates) else None,
+        "dtypes": {k: str(a.dtype) for k, a in panel.arrays.items()},
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+
+def load(path: str = PANEL_DIR, columns: Optional[Iterable[str]] = None, mmap: bool = True) -> OhlcvPanel:
+    """memory-map 으로 열기 (실제로 읽은 페이지만 메모리에 올라옴). columns 로 필요한 배열만"""
+    mode = "r" if mmap else None
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    names = list(meta["dtypes"]) if columns is None else list(columns) + ["present"]
+    arrays = {n: np.load(os.path.join(path, f"{n}.npy"), mmap_mode=mode) for n in dict.fromkeys(names)}
+    return OhlcvPanel(np.load(os.path.join(path, "dates.npy")), np.load(os.path.join(path, "tickers.npy")), arrays)
+
+
+def long_frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="OHLCV compact 패널 생성")
+    ap.add_argument("--csv", default="", help="kospi_2018_2025_ohlcv.csv (없으면 ohlcv_store)")
+    ap.add_argument("--store", default="ohlcv_store")
+    ap.add_argument("--out", default=PANEL_DIR)
+    args = ap.parse_args()
+
+    if args.csv:
+        from oscillator import load_ohlcv_csv
+        long_df = load_ohlcv_csv(args.csv)
+    else:
+        import warehouse
+        long_df = warehouse.read(root=args.store)
+
+    p = build(long_df)
+    save(p, args.out)
+    t0 = time.perf_counter()
+    q = load(args.out)
+    print(f"패널 {p.shape}: {p.nbytes() / 2**20:.1f}MB (long frame {long_frame_nbytes(long_df) / 2**20:.1f}MB), "
+          f"열기 {1e3 * (time.perf_counter() - t0):.1f}ms → {args.out}")
@@ -0,0 +1,113 @@
+#%%
+# 날짜×종목 패널(axis 0 = 날짜)용 rolling 연산
+# rolling max/min 은 van Herk / Gil-Werman: 길이 w 블록마다 앞→뒤 누적 max(g), 뒤→앞 누적 max(h)를 만들면
+# 창 [i-w+1, i] 의 max 는 max(h[i-w+1], g[i]) 두 값으로 끝나서 창 길이와 무관하게 원소당 비교 3번 (O(n)).
+# 모든 종목을 열 방향으로 한 번에 처리한다. NaN(행 없는 칸)은 건너뛰고, 창 안 관측치 수로 min_periods 판정.
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def valid_count(a: np.ndarray, w: int) -> np.ndarray:
+    """창 [i-w+1, i] 안의 NaN 아닌 값 개수 (a 와 같은 shape, int64)"""
+    c = np.cumsum(~np.isnan(a), axis=0, dtype=np.int64)
+    out = c.copy()
+    out[w:] -= c[:-w]
+    return out
+
+
+def _block_max(a: np.ndarray, w: int) -> np.ndarray:
+    """van Herk / Gil-Werman. NaN 이 없는 a 에 대해 rolling(w, min_periods=1).max()"""
+    n = a.shape[0]
+    if n == 0:
+        return a.copy()
+    nb = -(-n // w)
+    pad = np.full((nb * w,) + a.shape[1:], -np.inf, dtype=a.dtype)
+    pad[:n] = a
+    blocks = pad.reshape((nb, w) + a.shape[1:])
+    g = np.maximum.accumulate(blocks, axis=1).reshape(pad.shape)
+    h = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(pad.shape)
+
+    out = g[:n].copy()   # i < w 는 첫 블록 앞부분이라 g[i] 가 곧 [0, i] 의 max
+    if n >= w:
+        np.maximum(h[:n - w + 1], g[w - 1:n], out=out[w - 1:])
+    return out
+
+
+def rolling_max(a: np.ndarray, w: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """axis 0 방향 rolling max. 창 안 관측치가 min_periods(기본 w) 보다 적으면 NaN"""
+    a = np.asarray(a)
+    if not np.issubdtype(a.dtype, np.floating):
+        a = a.astype(np.float64)
+    min_periods = w if min_periods is None else min_periods
+    out = _block_max(np.where(np.isnan(a), -np.inf, a), w)
+    out[valid_count(a, w) < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_min(a: np.ndarray, w: int, min_periods: Optional[int] = None) -> np.ndarray:
+    return -rolling_max(-np.asarray(a), w, min_periods)
+
+
+def rolling_means(a: np.ndarray, windows: Iterable[int], min_periods: Optional[int] = None) -> Dict[int, np.ndarray]:
+    """
+    axis 0 방향 rolling 평균을 여러 창에 대해 (float64 누적합은 한 번만 만들고 창마다 차이만).
+    KRX 가격처럼 정수 값이면 누적합이 2^53 까지 정확해서 창 합도 정확하다.
+    """
+    a = np.asarray(a)
+    s = np.cumsum(np.nan_to_num(a, nan=0.0), axis=0, dtype=np.float64)
+    c = np.cumsum(~np.isnan(a), axis=0, dtype=np.int64)
+    out = {}
+    for w in windows:
+        tot, cnt = s.copy(), c.copy()
+        tot[w:] -= s[:-w]
+        cnt[w:] -= c[:-w]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m = tot / cnt
+        m[cnt < max(w if min_periods is None else min_periods, 1)] = np.nan
+        out[w] = m
+    return out
+
+
+def rolling_mean(a: np.ndarray, w: int, min_periods: Optional[int] = None) -> np.ndarray:
+    return rolling_means(a, [w], min_periods)[w]
+
+
+def ffill(x: np.ndarray) -> np.ndarray:
+    """종목별로 NaN 칸을 직전 값으로 채움 (첫 값 이전은 NaN 그대로)"""
+    D = x.shape[0]
+    rows = np.where(np.isnan(x), -1, np.arange(D)[:, None])
+    last = np.maximum.accumulate(rows, axis=0)
+    out = x[np.maximum(last, 0), np.arange(x.shape[1])]
+    out[last < 0] = np.nan
+    return out
+
+
+def shift(a: np.ndarray, k: int = 1) -> np.ndarray:
+    """axis 0 방향으로 k 칸 뒤로 밀기 (앞은 NaN)"""
+    out = np.full(a.shape, np.nan, dtype=np.result_type(a.dtype, np.float32))
+    if k < a.shape[0]:
+        out[k:] = a[:a.shape[0] - k]
+    return out
+
+
+def new_extremes(high: np.ndarray, low: np.ndarray, present: np.ndarray,
+                 window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (window) 거래일 신고가 / 신저가 마스크 (highlow.py, breadth.py 가 같은 정의를 쓰도록 여기 하나만 둠).
+      new_high : 오늘 고가 >= 직전 (window - 1) 거래일 고가 최고
+      new_low  : 오늘 저가 <= 직전 (window - 1) 거래일 저가 최저
+      eligible : 오늘 행이 있고 직전 (window - 1) 거래일 행이 모두 있는 칸 (상장 기간이 짧으면 제외)
+    고가/저가가 0 이하인 칸(거래정지 행)은 NaN 으로 보고 최고/최저에서 뺀다. 반환: (new_high, new_low, eligible)
+    """
+    prior = window - 1
+    with np.errstate(invalid="ignore"):
+        high = np.where(high > 0, high, np.nan)
+        low = np.where(low > 0, low, np.nan)
+    hi = shift(rolling_max(high, prior, min_periods=1))
+    lo = shift(rolling_min(low, prior, min_periods=1))
+    listed = shift(valid_count(np.where(present, 0.0, np.nan), prior).astype(np.float64)) == prior
+
+    eligible = present & ~np.isnan(high) & ~np.isnan(low) & listed & ~np.isnan(hi) & ~np.isnan(lo)
+    with np.errstate(invalid="ignore"):
+        return eligible & (high >= hi), eligible & (low <= lo), eligible
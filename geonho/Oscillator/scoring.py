@@ -0,0 +1,268 @@
+#%%
+# 여러 rolling 창(60/126/252/504일) × 여러 clip 값의 z-score / 0~100 점수를 한 번에 계산
+# x, x² 의 누적합(prefix sum)을 한 번만 만들고 각 창의 합은 S[t] - S[t-w] 로 구한다.
+# 누적합은 평균을 뺀 값으로, Neumaier 보정(오차항을 따로 누적)하며 더해서 긴 시계열에서도 상쇄 오차가 작다.
+# osc_score(pandas rolling) 와는 float 반올림 수준(상대오차 ~1e-12)까지만 같다. 비트 단위 일치는 online.py.
+# 꼬리가 두꺼운 oscillator 용으로 정규분포 CDF 대신 창 안 백분위 순위 점수(rank_grid)도 제공.
+import argparse
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+WINDOWS = [60, 126, 252, 504]
+CLIPS = [3, 5, None]
+
+
+# --------------------------------------------------
+# 누적합
+# --------------------------------------------------
+def compensated_cumsum(x: np.ndarray):
+    """Neumaier 보정 누적합: (hi, lo) 를 반환하고 실제 누적합 ≈ hi + lo. 길이 n+1 (S[0] = 0)"""
+    n = len(x)
+    hi = np.zeros(n + 1)
+    lo = np.zeros(n + 1)
+    s = c = 0.0
+    for i, v in enumerate(x.tolist()):
+        t = s + v
+        if abs(s) >= abs(v):
+            c += (s - t) + v
+        else:
+            c += (v - t) + s
+        s = t
+        hi[i + 1] = s
+        lo[i + 1] = c
+    return hi, lo
+
+
+def window_sum(hi: np.ndarray, lo: np.ndarray, w: int) -> np.ndarray:
+    """길이 n 의 창 합 배열 (앞쪽 w-1 개는 0 부터의 부분합)"""
+    n = len(hi) - 1
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - w, 0)
+    return (hi[end] - hi[start]) + (lo[end] - lo[start])
+
+
+# --------------------------------------------------
+# rolling mean / std (여러 창을 한 번에)
+# --------------------------------------------------
+def rolling_moments(x: Sequence[float], windows: Iterable[int] = WINDOWS, ddof: int = 1):
+    """
+    반환: (mean, std) 각각 (n, len(windows)) 배열.
+    창 안 관측치 수가 창 길이보다 적으면 NaN (rolling(w, min_periods=w) 와 같음).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    windows = list(windows)
+    valid = ~np.isnan(x)
+    # 평균을 빼고 누적하면 x² 누적합이 커지지 않아 분산 계산 시 상쇄 오차가 줄어든다
+    shift = x[valid].mean() if valid.any() else 0.0
+    xc = np.where(valid, x - shift, 0.0)
+
+    s1 = compensated_cumsum(xc)
+    s2 = compensated_cumsum(xc * xc)
+    cnt = np.concatenate([[0], np.cumsum(valid)])
+
+    n = len(x)
+    mean = np.full((n, len(windows)), np.nan)
+    std = np.full((n, len(windows)), np.nan)
+    end = np.arange(1, n + 1)
+    for j, w in enumerate(windows):
+        nobs = (cnt[end] - cnt[np.maximum(end - w, 0)]).astype(np.float64)
+        sx = window_sum(*s1, w)
+        sxx = window_sum(*s2, w)
+        ok = nobs >= w
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m = sx / nobs
+            var = (sxx - sx * m) / (nobs - ddof)
+        var = np.maximum(var, 0.0)
+        mean[ok, j] = m[ok] + shift
+        std[ok, j] = np.sqrt(var[ok])
+    return mean, std
+
+
+# --------------------------------------------------
+# z-score → 점수
+# --------------------------------------------------
+def clip_label(c: Optional[float]) -> str:
+    return "cnone" if c is None else f"c{c:g}"
+
+
+def score_grid(out: pd.DataFrame, windows: Iterable[int] = WINDOWS, clips: Iterable[Optional[float]] = CLIPS,
+               col: str = "oscillator") -> pd.DataFrame:
+    """
+    oscillator_2019_2025.csv(date, oscillator) → 창·clip 조합별 컬럼을 가진 wide 프레임
+    osc_z_{w}, osc_score_{w}_c{clip} (clip 없음은 cnone)
+    """
+    out = out.copy()
+    out["date"] = pd.to_datetime(out["date"])
+    out = out.sort_values("date").reset_index(drop=True)
+    windows, clips = list(windows), list(clips)
+
+    x = out[col].to_numpy(dtype=np.float64)
+    mean, std = rolling_moments(x, windows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (x[:, None] - mean) / std                      # (n, W)
+
+    # clip 별 (n, W) 를 쌓아 (C, n, W) 한 번에 정규분포 CDF
+    bounds = np.array([np.inf if c is None else c for c in clips], dtype=np.float64)[:, None, None]
+    scores = ndtr(np.clip(z[None, :, :], -bounds, bounds)) * 100
+
+    res = {"date": out["date"]}
+    for j, w in enumerate(windows):
+        res[f"osc_z_{w}"] = z[:, j]
+    for k, c in enumerate(clips):
+        for j, w in enumerate(windows):
+            res[f"osc_score_{w}_{clip_label(c)}"] = scores[k, :, j]
+    return pd.DataFrame(res)
+
+
+# --------------------------------------------------
+# rolling 백분위 순위 (정규분포 가정 없는 점수)
+# --------------------------------------------------
+class Fenwick:
+    """
+    열 K 개의 Fenwick tree (값 순위별 개수). 한 번의 add / prefix 가 K 개 열을 동시에 처리하고 O(log m).
+    idx 는 1..m, 0 이면 그 열은 건너뜀.
+    """
+
+    def __init__(self, k: int, m: int):
+        self.m = m
+        self.tree = np.zeros((k, m + 1), dtype=np.int64)
+        self.rows = np.arange(k)
+
+    def add(self, idx: np.ndarray, delta: int):
+        idx = idx.copy()
+        while True:
+            on = (idx > 0) & (idx <= self.m)
+            if not on.any():
+                return
+            self.tree[self.rows[on], idx[on]] += delta   # 열마다 한 칸이라 중복 인덱스 없음
+            idx[on] += idx[on] & -idx[on]
+            idx[~on] = 0
+
+    def prefix(self, idx: np.ndarray) -> np.ndarray:
+        """순위 1..idx 의 개수 합"""
+        idx = idx.copy()
+        out = np.zeros(len(idx), dtype=np.int64)
+        while True:
+            on = idx > 0
+            if not on.any():
+                return out
+            out[on] += self.tree[self.rows[on], idx[on]]
+            idx[on] -= idx[on] & -idx[on]
+
+
+def dense_ranks(x: np.ndarray) -> np.ndarray:
+    """열마다 값 → 1..m 조밀 순위 (같은 값은 같은 순위, NaN 은 0)"""
+    ids = np.zeros(x.shape, dtype=np.int64)
+    for k in range(x.shape[1]):
+        col = x[:, k]
+        ok = ~np.isnan(col)
+        ids[ok, k] = np.unique(col[ok], return_inverse=True)[1] + 1
+    return ids
+
+
+def rolling_pct_rank(x, windows: Iterable[int] = WINDOWS, min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    오늘 값의 직전 w 일 창 안 백분위 순위 (Series.rolling(w).rank(pct=True) 와 같음, 동점은 평균 순위).
+    x: (n,) 또는 (n, S) → 반환 (n, S, len(windows)), 0~1.
+    창 안 값들을 값 순위별 개수 Fenwick tree 로 들고 가서 하루에 추가 1번 / 삭제 1번 / 순위 조회 2번,
+    각 O(log m) (m = 고유값 수, rolling().apply(rank) 의 O(n·w) 대신).
+    모든 (series, window) 조합을 열로 묶어 날짜 루프 한 번에 계산한다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    windows = list(windows)
+    n, S = x.shape
+    W = len(windows)
+
+    # (series, window) 조합 = 열. 같은 series 는 같은 순위 배열을 공유
+    ids = np.repeat(dense_ranks(x), W, axis=1)                        # (n, S*W)
+    w_of = np.tile(np.asarray(windows, dtype=np.int64), S)
+    need = np.tile(np.asarray([w if min_periods is None else min_periods for w in windows], dtype=np.int64), S)
+    K = S * W
+
+    fw = Fenwick(K, int(ids.max()) if ids.size else 0)
+    nobs = np.zeros(K, dtype=np.int64)
+    cols = np.arange(K)
+    out = np.full((n, K), np.nan)
+    for t in range(n):
+        cur = ids[t]
+        fw.add(cur, 1)
+        nobs += cur > 0
+        old_t = t - w_of
+        old = np.where(old_t >= 0, ids[np.maximum(old_t, 0), cols], 0)
+        fw.add(old, -1)
+        nobs -= old > 0
+
+        ok = (cur > 0) & (nobs >= np.maximum(need, 1))
+        if ok.any():
+            less = fw.prefix(np.where(ok, cur - 1, 0))
+            leq = fw.prefix(np.where(ok, cur, 0))
+            rank = less + (leq - less + 1) / 2.0
+            out[t, ok] = rank[ok] / nobs[ok]
+    return out.reshape(n, S, W)
+
+
+def rank_grid(out: pd.DataFrame, windows: Iterable[int] = WINDOWS, cols: Sequence[str] = ("oscillator",)) -> pd.DataFrame:
+    """
+    oscillator_2019_2025.csv → 창별 rolling 백분위 순위 점수(0~100) 컬럼
+    oscillator 는 osc_rank_{w}, 다른 컬럼은 {col}_rank_{w}
+    """
+    out = out.copy()
+    out["date"] = pd.to_datetime(out["date"])
+    out = out.sort_values("date").reset_index(drop=True)
+    windows, cols = list(windows), list(cols)
+
+    pct = rolling_pct_rank(out[cols].to_numpy(dtype=np.float64), windows)
+    res = {"date": out["date"]}
+    for i, c in enumerate(cols):
+        prefix = "osc" if c == "oscillator" else c
+        for j, w in enumerate(windows):
+            res[f"{prefix}_rank_{w}"] = pct[:, i, j] * 100
+    return pd.DataFrame(res)
+
+
+def to_long(grid: pd.DataFrame) -> pd.DataFrame:
+    """
+    wide 결과 → (date, window, clip_c, z, score) tidy 형식 (점수 없는 행 제외).
+    rank_grid 를 합친 grid 면 같은 창의 osc_rank_{w} 를 rank 컬럼으로 붙인다.
+    """
+    parts: List[pd.DataFrame] = []
+    for c in grid.columns:
+        if not c.startswith("osc_score_"):
+            continue
+        w, clip = c[len("osc_score_"):].split("_c")
+        parts.append(pd.DataFrame({
+            "date": grid["date"],
+            "window": int(w),
+            "clip_c": None if clip == "none" else float(clip),
+            "z": grid[f"osc_z_{w}"],
+            "score": grid[c],
+            **({"rank": grid[f"osc_rank_{w}"]} if f"osc_rank_{w}" in grid.columns else {}),
+        }))
+    long = pd.concat(parts, ignore_index=True)
+    return long[long["score"].notna()].reset_index(drop=True)
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="여러 창 / clip 조합 점수 한 번에 계산")
+    ap.add_argument("--osc", default="oscillator_2019_2025.csv")
+    ap.add_argument("--windows", nargs="*", type=int, default=WINDOWS)
+    ap.add_argument("--clips", nargs="*", default=[str(c) for c in CLIPS], help="숫자 또는 None")
+    ap.add_argument("--long", action="store_true", help="tidy 형식으로 저장")
+    ap.add_argument("--rank", action="store_true", help="창별 백분위 순위 점수 osc_rank_{w} 컬럼 추가 (--long 이면 rank 컬럼)")
+    ap.add_argument("--out", default="osc_score_grid.csv")
+    args = ap.parse_args()
+
+    clips = [None if c.lower() == "none" else float(c) for c in args.clips]
+    osc = pd.read_csv(args.osc)
+    grid = score_grid(osc, args.windows, clips)
+    if args.rank:
+        grid = grid.merge(rank_grid(osc, args.windows), on="date")
+    res = to_long(grid) if args.long else grid
+    res.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print("저장:", args.out, res.shape)
@@ -0,0 +1,239 @@
+#%%
+# oscillator 파라미터 sweep (alpha_fast × alpha_slow × window × clip_c)
+# 파라미터와 무관한 일별 net_vol 과 KOSPI 선행 수익률은 shared memory 에 한 번만 올리고,
+# 프로세스 풀의 각 작업이 (alpha_fast, alpha_slow) 하나에 대해 모든 window × clip 조합을 계산한다.
+# 조합별로 노트북의 이상치 비율(IQR, 1~99%, 0.5~99.5%), 점수 분포, 선행 수익률과의 상관을 모아 CSV 로 저장.
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from scipy.special import ndtr
+
+from scoring import rolling_moments
+
+ALPHA_FAST = [0.05, 0.08, 0.10, 0.15, 0.20]
+ALPHA_SLOW = [0.02, 0.03, 0.05, 0.07]
+WINDOWS = [60, 126, 252, 504]
+CLIPS = [3, 5, None]
+HORIZONS = [5, 20, 60]   # 선행 수익률 기간 (거래일)
+
+OSC_START = "2018-12-21"
+OSC_END = "2025-12-30"
+
+# worker 프로세스에서 shared memory 를 붙인 배열
+_SHARED: Dict[str, np.ndarray] = {}
+_HANDLES: List[shared_memory.SharedMemory] = []
+
+
+# --------------------------------------------------
+# shared memory
+# --------------------------------------------------
+def to_shared(arrays: Dict[str, np.ndarray]):
+    """배열들을 shared memory 블록으로 복사. 반환: (블록 목록, worker 에 넘길 메타)"""
+    blocks, meta = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr, dtype=np.float64)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        meta[name] = (shm.name, arr.shape)
+    return blocks, meta
+
+
+def attach(meta: Dict):
+    """worker initializer: 복사 없이 shared memory 를 numpy 배열로 참조 (worker 종료 때 detach)"""
+    for name, (shm_name, shape) in meta.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _HANDLES.append(shm)
+        _SHARED[name] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    # worker 는 os._exit 로 끝나 atexit 이 돌지 않으므로 multiprocessing finalizer 로 등록
+    util.Finalize(None, detach, exitpriority=10)
+
+
+def detach():
+    """worker 쪽 매핑 해제 (블록 삭제(unlink)는 만든 쪽 sweep() 에서)"""
+    _SHARED.clear()   # 배열 view 를 먼저 놓아야 close 가능
+    while _HANDLES:
+        _HANDLES.pop().close()
+
+
+# --------------------------------------------------
+# 지표
+# --------------------------------------------------
+def ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    """trend(t) = (1-alpha)*trend(t-1) + alpha*x(t), trend(0) = x(0) (ewm(adjust=False) 와 같은 점화식)"""
+    return lfilter([alpha], [1.0, -(1.0 - alpha)], x, zi=[(1.0 - alpha) * x[0]])[0]
+
+
+def outlier_ratios(s: np.ndarray) -> Dict[str, float]:
+    """노트북 이상치 셀: IQR 1.5배 밖, 1~99% 밖, 0.5~99.5% 밖 비율"""
+    q005, q01, q1, q3, q99, q995 = np.quantile(s, [0.005, 0.01, 0.25, 0.75, 0.99, 0.995])
+    iqr = q3 - q1
+    return {
+        "outlier_iqr": float(((s < q1 - 1.5 * iqr) | (s > q3 + 1.5 * iqr)).mean()),
+        "outlier_1_99": float(((s < q01) | (s > q99)).mean()),
+        "outlier_05_995": float(((s < q005) | (s > q995)).mean()),
+    }
+
+
+def rank(a: np.ndarray) -> np.ndarray:
+    return pd.Series(a).rank().to_numpy()
+
+
+def corr(a: np.ndarray, b: np.ndarray) -> float:
+    ok = ~(np.isnan(a) | np.isnan(b))
+    if ok.sum() < 3:
+        return float("nan")
+    return float(np.corrcoef(a[ok], b[ok])[0, 1])
+
+
+def evaluate(params) -> List[Dict]:
+    """(alpha_fast, alpha_slow, windows, clips) 하나 → window × clip 조합별 요약 지표 행"""
+    alpha_fast, alpha_slow, windows, clips = params
+    net = _SHARED["net_vol"]
+    in_range = _SHARED["in_range"].astype(bool)
+
+    osc = ema(net, alpha_fast) - ema(net, alpha_slow)
+    x = osc[in_range]
+    base = {"alpha_fast": alpha_fast, "alpha_slow": alpha_slow, **outlier_ratios(x)}
+
+    mean, std = rolling_moments(x, windows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (x[:, None] - mean) / std
+
+    fwd = {h: _SHARED[f"fwd_{h}"][in_range] for h in HORIZONS if f"fwd_{h}" in _SHARED}
+
+    rows = []
+    for j, w in enumerate(windows):
+        zj = z[:, j]
+        ok = ~np.isnan(zj)
+        for c in clips:
+            if not ok.any():
+                # 창보다 기간이 짧거나 oscillator 가 상수(std 0)인 경우
+                rows.append({**base, "window": w, "clip_c": c, "n_scores": 0})
+                continue
+            score = ndtr(zj if c is None else np.clip(zj, -c, c)) * 100
+            sv = score[ok]
+            row = {
+                **base,
+                "window": w,
+                "clip_c": c,
+                "n_scores": int(ok.sum()),
+                "score_mean": float(sv.mean()),
+                "score_std": float(sv.std(ddof=1)),
+                "score_p05": float(np.quantile(sv, 0.05)),
+                "score_p50": float(np.quantile(sv, 0.50)),
+                "score_p95": float(np.quantile(sv, 0.95)),
+                "frac_below_20": float((sv < 20).mean()),
+                "frac_above_80": float((sv > 80).mean()),
+                "frac_clipped": float((np.abs(zj[ok]) > c).mean()) if c is not None else 0.0,
+            }
+            for h in fwd:
+                row[f"corr_fwd_{h}"] = corr(score, fwd[h])
+                # 순위는 점수와 선행 수익률이 둘 다 있는 행에서만 매김 (서로 다른 표본의 순위끼리 상관 X)
+                both = ok & ~np.isnan(fwd[h])
+                row[f"spearman_fwd_{h}"] = corr(rank(score[both]), rank(fwd[h][both]))
+            rows.append(row)
+    return rows
+
+
+# --------------------------------------------------
+# 입력 준비
+# --------------------------------------------------
+def forward_returns(dates: pd.Series, index_close: Optional[pd.Series]) -> Dict[str, np.ndarray]:
+    """거래일 t 의 h 거래일 뒤 KOSPI 수익률 (close[t+h] / close[t] - 1)"""
+    if index_close is None:
+        return {}
+    close = index_close.copy()
+    close.index = pd.to_datetime(close.index)
+    close = close.reindex(pd.to_datetime(dates).to_numpy()).to_numpy(dtype=np.float64)
+    out = {}
+    for h in HORIZONS:
+        fwd = np.full(len(close), np.nan)
+        fwd[:-h] = close[h:] / close[:-h] - 1
+        out[f"fwd_{h}"] = fwd
+    return out
+
+
+def load_index_close(path: str = "", start: str = "20171201", end: str = "20251230") -> Optional[pd.Series]:
+    """KOSPI 지수 종가: CSV(날짜/date, 종가/close) 또는 pykrx. 둘 다 안 되면 None (상관 지표 생략)"""
+    if path:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+        date_col = "날짜" if "날짜" in df.columns else "date"
+        close_col = "종가" if "종가" in df.columns else "close"
+        return df.set_index(pd.to_datetime(df[date_col]))[close_col]
+    try:
+        from market_data import PykrxSource
+        return PykrxSource().index_close(start, end)
+    except Exception as e:
+        print("KOSPI 지수 로드 실패, 선행 수익률 상관 생략:", e)
+        return None
+
+
+def sweep(breadth: pd.DataFrame, index_close: Optional[pd.Series] = None,
+          alpha_fast: List[float] = ALPHA_FAST, alpha_slow: List[float] = ALPHA_SLOW,
+          windows: List[int] = WINDOWS, clips: List[Optional[float]] = CLIPS,
+          osc_start: str = OSC_START, osc_end: str = OSC_END, workers: int = os.cpu_count()) -> pd.DataFrame:
+    """breadth_daily3.csv(date, net_vol) → 파라미터 조합별 요약 지표 프레임"""
+    b = breadth.copy()
+    b["date"] = pd.to_datetime(b["date"])
+    b = b.sort_values("date").reset_index(drop=True)
+    in_range = ((b["date"] >= osc_start) & (b["date"] <= osc_end)).to_numpy()
+
+    arrays = {"net_vol": b["net_vol"].to_numpy(dtype=np.float64), "in_range": in_range.astype(np.float64)}
+    arrays.update(forward_returns(b["date"], index_close))
+    blocks, meta = to_shared(arrays)
+
+    # fast 가 slow 보다 빨라야 oscillator 의미가 있으므로 alpha_fast > alpha_slow 조합만
+    tasks = [(af, asl, list(windows), list(clips))
+             for af, asl in itertools.product(alpha_fast, alpha_slow) if af > asl]
+    rows: List[Dict] = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(meta,)) as ex:
+            for res in ex.map(evaluate, tasks, chunksize=max(1, len(tasks) // (4 * (workers or 1)))):
+                rows.extend(res)
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def grid(start: float, stop: float, num: int) -> List[float]:
+    return [round(v, 6) for v in np.linspace(start, stop, num)]
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="oscillator 파라미터 sweep")
+    ap.add_argument("--breadth", default="breadth_daily3.csv")
+    ap.add_argument("--kospi_csv", default="", help="KOSPI 지수 종가 CSV (없으면 pykrx)")
+    ap.add_argument("--alpha_fast", nargs="*", type=float, default=ALPHA_FAST)
+    ap.add_argument("--alpha_slow", nargs="*", type=float, default=ALPHA_SLOW)
+    ap.add_argument("--fast_grid", nargs=3, type=float, metavar=("START", "STOP", "NUM"),
+                    help="alpha_fast 를 linspace 로 (예: 0.05 0.30 20)")
+    ap.add_argument("--slow_grid", nargs=3, type=float, metavar=("START", "STOP", "NUM"))
+    ap.add_argument("--windows", nargs="*", type=int, default=WINDOWS)
+    ap.add_argument("--clips", nargs="*", default=[str(c) for c in CLIPS], help="숫자 또는 None")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--out", default="osc_sweep.csv")
+    args = ap.parse_args()
+
+    fast = grid(*args.fast_grid[:2], int(args.fast_grid[2])) if args.fast_grid else args.alpha_fast
+    slow = grid(*args.slow_grid[:2], int(args.slow_grid[2])) if args.slow_grid else args.alpha_slow
+    clips = [None if c.lower() == "none" else float(c) for c in args.clips]
+
+    t0 = time.time()
+    b = pd.read_csv(args.breadth)
+    dates = pd.to_datetime(b["date"])
+    idx = load_index_close(args.kospi_csv, dates.min().strftime("%Y%m%d"), dates.max().strftime("%Y%m%d"))
+    res = sweep(b, idx, fast, slow, args.windows, clips, workers=args.workers)
+    res.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print(f"{len(res)}개 조합, {time.time() - t0:.1f}s → {args.out}")
@@ -0,0 +1,83 @@
+#%%
+# breadth.py(패널 벡터화) vs oscillator.breadth_daily(노트북 long 형식) 속도·메모리 비교
+# 실제 CSV(--csv) 또는 합성 데이터(종목 수 × 거래일 수)로 측정하고, 두 결과가 완전히 같은지 확인한다.
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import breadth  # noqa: E402
+import oscillator  # noqa: E402
+
+
+def synthetic_ohlcv(n_tickers: int = 950, start: str = "2017-12-01", end: str = "2025-12-30",
+                    missing: float = 0.02, seed: int = 0) -> pd.DataFrame:
+    """노트북 kospi_ohlcv 와 같은 long 형식 합성 데이터 (missing 비율만큼 행이 빠짐: 거래정지·상장 전후)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    D, T = len(dates), n_tickers
+    ret = rng.normal(0, 0.02, (D, T))
+    ret[rng.random((D, T)) < 0.05] = 0.0   # 보합
+    close = np.maximum(np.round(rng.integers(1_000, 100_000, T) * np.exp(np.cumsum(ret, axis=0))), 1.0)
+    volume = rng.integers(0, 2_000_000, (D, T))
+    keep = rng.random((D, T)) >= missing
+    di, ti = np.nonzero(keep)
+    tickers = np.array([f"{t:06d}" for t in range(T)])
+    df = pd.DataFrame({
+        "날짜": dates[di],
+        "ticker": tickers[ti],
+        "시가": close[di, ti],
+        "고가": close[di, ti],
+        "저가": close[di, ti],
+        "종가": close[di, ti],
+        "거래량": volume[di, ti],
+        "등락률": 0.0,
+    })
+    return df.sort_values(["ticker", "날짜"]).reset_index(drop=True)
+
+
+def measure(func, *args, repeat: int = 3):
+    """최소 실행 시간(초), peak 메모리(MB, tracemalloc), 결과"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return best, peak, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="breadth 계산 벤치마크")
+    ap.add_argument("--csv", default="", help="kospi_2018_2025_ohlcv.csv (없으면 합성 데이터)")
+    ap.add_argument("--tickers", type=int, default=950)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.csv:
+        df = oscillator.load_ohlcv_csv(args.csv)
+    else:
+        df = synthetic_ohlcv(args.tickers)
+    print("rows:", len(df), "tickers:", df["ticker"].nunique(), "days:", df["날짜"].nunique())
+
+    t_old, m_old, old = measure(oscillator.breadth_daily, df, repeat=args.repeat)
+    t_new, m_new, new = measure(breadth.breadth_daily, df, repeat=args.repeat)
+    pd.testing.assert_frame_equal(old, new, check_exact=True)
+
+    print("impl\tseconds\tpeak_mb")
+    print(f"notebook\t{t_old:.3f}\t{m_old:.0f}")
+    print(f"panel\t{t_new:.3f}\t{m_new:.0f}")
+    print(f"speedup: {t_old / t_new:.1f}x (결과 동일)")
+
+
+if __name__ == "__main__":
+    main()
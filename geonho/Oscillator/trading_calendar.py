@@ -0,0 +1,173 @@
+#%%
+# KRX 거래일 달력: 기사·댓글 작성 시각 → 그 글이 반영되는 거래 세션
+# 기사(date / loop_date / pub_date)와 댓글(reg_time / comment_at)은 주말·휴일·장 마감 후에도 달리는데,
+# osc_score_0_100 같은 일별 시장 시계열은 거래일에만 있다. 여기서는 OHLCV 날짜 목록으로 달력을 만들고
+#   15:30 KST 장 마감 이전 → 그날 (거래일이면), 이후 → 다음 거래일, 휴일 → 다음 거래일
+# 로 정한 세션을 searchsorted 한 번으로 수백만 행에 붙인다 (행마다 파이썬 루프 없음).
+import argparse
+import json
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+KST = "Asia/Seoul"
+MARKET_CLOSE = pd.Timedelta(hours=15, minutes=30)
+# 댓글 regTime ('2025-01-02T23:38:23+0900') / 기사 date·pub_date 형식
+AWARE_FORMATS = ["%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%d %H:%M:%S%z"]
+NAIVE_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d", "%Y%m%d"]
+
+
+def _parse(s: pd.Series, utc: bool) -> pd.Series:
+    """
+    자주 쓰는 형식은 Arrow strptime(C++)으로 한 번에, 남은 값만 format="mixed"(행마다 dateutil) 로 다시.
+    pandas strptime 은 고유값마다 비용이 들어 댓글 시각처럼 값이 다 다른 수백만 행에서는 느리다.
+    """
+    arr = pa.array(s.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    parsed = None
+    for fmt in (AWARE_FORMATS if utc else NAIVE_FORMATS):
+        r = pc.strptime(arr, format=fmt, unit="s", error_is_null=True)
+        parsed = r if parsed is None else pc.coalesce(parsed, r)
+    t = parsed.to_pandas().set_axis(s.index)   # 위치 그대로 (index=... 로 주면 label 정렬이 일어남)
+    if utc:
+        t = t.dt.tz_convert(KST).dt.tz_localize(None)
+    t = t.astype("datetime64[ns]")
+
+    retry = (t.isna() & s.notna()).to_numpy()
+    if retry.any():
+        r = pd.to_datetime(s[retry], format="mixed", errors="coerce", utc=utc)
+        if utc:
+            r = r.dt.tz_convert(KST).dt.tz_localize(None)
+        t[retry] = r.astype("datetime64[ns]").to_numpy()
+    return t
+
+
+class TradingCalendar:
+    """거래일(세션) 정렬 배열 하나로 된 달력"""
+
+    def __init__(self, sessions: Iterable, close: pd.Timedelta = MARKET_CLOSE):
+        s = pd.to_datetime(pd.Index(sessions)).values.astype("datetime64[D]")
+        self.sessions = np.unique(s[~np.isnat(s)])
+        if len(self.sessions) == 0:
+            raise ValueError("거래일이 없음")
+        self.close = close
+
+    # --------------------------------------------------
+    # 만들기
+    # --------------------------------------------------
+    @classmethod
+    def from_store(cls, root: str = "ohlcv_store") -> "TradingCalendar":
+        """warehouse.py 저장소 watermarks.json 의 거래일"""
+        with open(os.path.join(root, "watermarks.json"), "r", encoding="utf-8") as f:
+            return cls(pd.to_datetime(list(json.load(f)["dates"]), format="%Y%m%d"))
+
+    @classmethod
+    def from_panel(cls, path: str = "kospi_panel") -> "TradingCalendar":
+        """panel.py 디렉터리의 dates.npy"""
+        return cls(np.load(os.path.join(path, "dates.npy")))
+
+    @classmethod
+    def from_csv(cls, path: str, col: str = "date") -> "TradingCalendar":
+        """breadth_daily3.csv / OHLCV CSV 등 날짜 컬럼이 있는 CSV"""
+        df = pd.read_csv(path, encoding="utf-8-sig", usecols=lambda c: c in (col, "날짜"))
+        return cls(df[col if col in df.columns else "날짜"])
+
+    @classmethod
+    def load(cls, src: str) -> "TradingCalendar":
+        if os.path.isdir(src):
+            if os.path.exists(os.path.join(src, "watermarks.json")):
+                return cls.from_store(src)
+            return cls.from_panel(src)
+        return cls.from_csv(src)
+
+    # --------------------------------------------------
+    # 조회
+    # --------------------------------------------------
+    @staticmethod
+    def to_kst(ts) -> pd.Series:
+        """
+        문자열 / timestamp → KST 기준 tz 없는 timestamp.
+        '+0900' 같은 offset 이 붙은 값은 KST 로 바꾸고, offset 없는 값은 KST 로 간주.
+        기사 date 의 'YYYY.MM.DD', pub_date 의 'YYYYMMDD' 도 받음.
+        """
+        ts = pd.Series(ts)
+        if pd.api.types.is_datetime64_any_dtype(ts):
+            return ts.dt.tz_convert(KST).dt.tz_localize(None) if ts.dt.tz is not None else ts
+        s = ts.astype("string").str.replace(r"^(\d{4})\.(\d{2})\.(\d{2})", r"\1-\2-\3", regex=True)
+        aware = s.str.contains(r"(?:[+-]\d{2}:?\d{2}|Z)$", regex=True).fillna(False).to_numpy(dtype=bool)
+        out = pd.Series(pd.NaT, index=ts.index, dtype="datetime64[ns]")
+        for mask, utc in ((aware, True), (~aware, False)):
+            if mask.any():
+                out[mask] = _parse(s[mask], utc).to_numpy()
+        return out
+
+    def session_index(self, ts, has_time: bool = True) -> np.ndarray:
+        """
+        각 시각의 세션 번호 (self.sessions 인덱스). 달력 범위 밖은 -1.
+        has_time=False (날짜만 있는 기사 date 등) 이면 장 마감 기준 없이 그날 또는 다음 거래일.
+        """
+        t = self.to_kst(ts).to_numpy(dtype="datetime64[ns]")
+        nat = np.isnat(t)
+        day = t.astype("datetime64[D]")
+        if has_time:
+            after_close = (t - day) >= self.close.to_timedelta64()
+            day = day + after_close.astype("timedelta64[D]")
+        idx = np.searchsorted(self.sessions, day, side="left")
+        # 달력 시작 전 / 마지막 거래일 이후는 어느 세션인지 모름
+        idx[nat | (idx >= len(self.sessions)) | (day < self.sessions[0])] = -1
+        return idx
+
+    def session(self, ts, has_time: bool = True) -> pd.Series:
+        """각 시각의 세션 날짜 (범위 밖 NaT)"""
+        idx = self.session_index(ts, has_time)
+        out = self.sessions[np.maximum(idx, 0)].astype("datetime64[ns]")
+        out[idx < 0] = np.datetime64("NaT")
+        return pd.Series(out, index=getattr(ts, "index", None))
+
+    def attach(self, df: pd.DataFrame, col: str, daily: pd.DataFrame, columns: Optional[Iterable[str]] = None,
+               has_time: bool = True, date_col: str = "date") -> pd.DataFrame:
+        """
+        df[col] 시각의 세션에 일별 시장 시계열(daily, date_col + 값 컬럼들)을 붙여 반환.
+        daily 를 세션 배열에 한 번 맞춘 뒤 세션 번호로 바로 꺼내므로 merge 정렬 없이 O(n).
+        """
+        idx = self.session_index(df[col], has_time)
+        d = daily.copy()
+        d[date_col] = pd.to_datetime(d[date_col]).values.astype("datetime64[D]")
+        cols = [c for c in (columns or d.columns) if c != date_col]
+        aligned = d.set_index(date_col)[cols].reindex(self.sessions)
+
+        out = df.copy()
+        out["session"] = self.session(df[col], has_time).to_numpy()
+        for c in cols:
+            vals = aligned[c].to_numpy()
+            if vals.dtype.kind in "iub":
+                vals = vals.astype(np.float64)
+            picked = vals[np.maximum(idx, 0)]
+            out[c] = np.where(idx >= 0, picked, np.nan)
+        return out
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="기사/댓글 시각 → KRX 거래 세션 정렬")
+    ap.add_argument("--calendar", default="ohlcv_store", help="ohlcv_store / kospi_panel 디렉터리 또는 날짜 CSV")
+    ap.add_argument("--input", required=True, help="기사·댓글 CSV")
+    ap.add_argument("--col", default="reg_time", help="시각 컬럼 (reg_time / comment_at / pub_date / date ...)")
+    ap.add_argument("--date_only", action="store_true", help="시각 없이 날짜만 있는 컬럼 (장 마감 기준 없이 그날/다음 거래일)")
+    ap.add_argument("--join", default="", help="붙일 일별 시계열 CSV (예: osc_score_2020_2025.csv)")
+    ap.add_argument("--chunksize", type=int, default=1_000_000)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    cal = TradingCalendar.load(args.calendar)
+    daily = pd.read_csv(args.join) if args.join else pd.DataFrame({"date": []})
+    out = args.out or os.path.splitext(args.input)[0] + "_session.csv"
+    n = 0
+    for i, chunk in enumerate(pd.read_csv(args.input, encoding="utf-8-sig", dtype=str, chunksize=args.chunksize)):
+        res = cal.attach(chunk, args.col, daily, has_time=not args.date_only)
+        res.to_csv(out, mode="w" if i == 0 else "a", header=i == 0, index=False, encoding="utf-8-sig")
+        n += len(res)
+    print(f"{n}행 → {out} (세션 {cal.sessions[0]} ~ {cal.sessions[-1]})")
@@ -0,0 +1,266 @@
+#%%
+# 로컬 OHLCV 저장소 (date 파티션 parquet + watermark)
+# 매번 2017-12 ~ 2025-12 전체를 다시 받지 않고, 저장소에 없는 거래일만 market_data 로 받아 추가한다.
+# 쌓는 것은 무수정 단면 (나중 이벤트로 과거 파티션을 고쳐 쓸 일이 없게), 수정주가는 read(adjusted=True) 에서.
+# ohlcv_store/
+#   date=YYYY-MM-DD/part-0.parquet   거래일 하나의 전 종목 단면 (ticker 순 정렬)
+#   watermarks.json                  거래일별 행 수 / 종목별 최초·최종 거래일
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pds
+import pyarrow.parquet as pq
+
+from market_data import OHLCV_COLUMNS, PykrxSource, adjust_prices, fetch_market_ohlcv
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+STORE_DIR = "ohlcv_store"
+WATERMARK_FILE = "watermarks.json"
+
+SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("ticker", pa.string()),
+    ("시가", pa.float64()),
+    ("고가", pa.float64()),
+    ("저가", pa.float64()),
+    ("종가", pa.float64()),
+    ("거래량", pa.int64()),
+    ("등락률", pa.float64()),
+])
+
+PARTITIONING = pds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+# --------------------------------------------------
+# watermark
+# --------------------------------------------------
+def load_watermarks(root: str = STORE_DIR) -> Dict:
+    """dates: {YYYYMMDD: 행 수}, tickers: {ticker: [최초 거래일, 최종 거래일]}"""
+    path = os.path.join(root, WATERMARK_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"market": None, "dates": {}, "tickers": {}}
+
+
+def save_watermarks(wm: Dict, root: str = STORE_DIR):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, WATERMARK_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(wm, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def update_watermarks(wm: Dict, days: Iterable[str], dates: np.ndarray, tickers: np.ndarray):
+    """새로 저장한 거래일(days)과 그 행들의 날짜/ticker 배열을 watermark 에 반영"""
+    day_str = np.datetime_as_string(dates, unit="D")
+    uniq, counts = np.unique(day_str, return_counts=True)
+    n_by_day = {u.replace("-", ""): int(c) for u, c in zip(uniq, counts)}
+    for d in days:
+        wm["dates"][d] = n_by_day.get(d, 0)
+
+    if len(tickers):
+        span = pd.DataFrame({"ticker": tickers, "d": day_str}).groupby("ticker")["d"].agg(["min", "max"])
+        known = wm["tickers"]
+        for t, lo, hi in zip(span.index, span["min"], span["max"]):
+            lo, hi = lo.replace("-", ""), hi.replace("-", "")
+            if t in known:
+                lo, hi = min(lo, known[t][0]), max(hi, known[t][1])
+            known[t] = [lo, hi]
+
+
+def last_date(wm: Dict) -> Optional[str]:
+    return max(wm["dates"]) if wm["dates"] else None
+
+
+# --------------------------------------------------
+# 쓰기
+# --------------------------------------------------
+def partition_dir(day: str, root: str = STORE_DIR) -> str:
+    return os.path.join(root, f"date={pd.Timestamp(day).strftime('%Y-%m-%d')}")
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """long 형식 OHLCV → 날짜, ticker 순으로 정렬된 Arrow Table (SCHEMA)"""
+    out = df.rename(columns={"날짜": "date"})
+    out = out.assign(
+        date=pd.to_datetime(out["date"]).dt.date,
+        ticker=out["ticker"].astype(str).str.zfill(6),
+        거래량=pd.to_numeric(out["거래량"], errors="coerce").fillna(0).astype("int64"),
+        **{c: pd.to_numeric(out[c], errors="coerce").astype("float64") for c in ("시가", "고가", "저가", "종가", "등락률")},
+    )
+    out = out.sort_values(["date", "ticker"])[SCHEMA.names]
+    return pa.Table.from_pandas(out, schema=SCHEMA, preserve_index=False)
+
+
+def write_day(table: pa.Table, day: str, root: str = STORE_DIR):
+    """거래일 하나의 단면을 파티션에 기록 (같은 날을 다시 받으면 통째로 교체)"""
+    d = partition_dir(day, root)
+    os.makedirs(d, exist_ok=True)
+    # 파티션 값은 디렉터리 이름에 있으므로 파일에는 date 컬럼을 빼고 저장
+    tmp = os.path.join(d, ".part-0.parquet.tmp")
+    pq.write_table(table.drop(["date"]), tmp)
+    os.replace(tmp, os.path.join(d, "part-0.parquet"))
+
+
+def store(df: pd.DataFrame, days: Iterable[str], root: str = STORE_DIR, wm: Optional[Dict] = None,
+          workers: int = 8):
+    """long 형식 OHLCV(날짜, ticker, ...)를 거래일별 파티션에 쓰고 watermark 갱신"""
+    wm = wm if wm is not None else load_watermarks(root)
+    days = list(days)
+    table = to_table(df)
+
+    # 날짜순으로 정렬돼 있으므로 거래일 경계만 찾아 slice (복사 없음)
+    dates = np.asarray(table.column("date").to_numpy(), dtype="datetime64[D]")
+    keys = np.array([np.datetime64(pd.Timestamp(d).date(), "D") for d in days], dtype="datetime64[D]")
+    lo = np.searchsorted(dates, keys, side="left")
+    hi = np.searchsorted(dates, keys, side="right")
+    parts = [(table.slice(a, b - a), d) for a, b, d in zip(lo, hi, days) if b > a]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(lambda p: write_day(p[0], p[1], root), parts))
+
+    update_watermarks(wm, days, dates, table.column("ticker").to_numpy(zero_copy_only=False))
+    save_watermarks(wm, root)
+    return wm
+
+
+# --------------------------------------------------
+# 증분 갱신
+# --------------------------------------------------
+def missing_days(trading_days: List[str], wm: Dict, refresh: int = 0) -> List[str]:
+    """저장소에 없는 거래일 (+ 마지막으로 저장된 refresh 개 거래일은 다시 받기: 장중 수집분 보정)"""
+    have = set(wm["dates"])
+    if refresh > 0:
+        for d in sorted(have)[-refresh:]:
+            have.discard(d)
+    return [d for d in trading_days if d not in have]
+
+
+def update(start: str, end: str, market: str = "KOSPI", source=None, workers: int = 8,
+           refresh: int = 0, root: str = STORE_DIR) -> List[str]:
+    """start~end 중 저장소에 없는 거래일만 받아 추가. 반환: 새로 받은 거래일 목록"""
+    wm = load_watermarks(root)
+    if wm["market"] not in (None, market):
+        raise ValueError(f"저장소 market={wm['market']} 와 요청 market={market} 가 다름: {root}")
+    wm["market"] = market
+
+    source = source or PykrxSource()
+    days = missing_days(source.trading_days(start, end), wm, refresh)
+    if not days:
+        return []
+    df = fetch_market_ohlcv(start, end, market=market, source=source, workers=workers, days=days, adjusted=False)
+    store(df, days, root, wm, workers)
+    return days
+
+
+def import_csv(path: str, market: str = "KOSPI", root: str = STORE_DIR) -> int:
+    """기존 kospi_2018_2025_ohlcv.csv 를 저장소로 옮김 (이미 있는 거래일은 건너뜀)"""
+    wm = load_watermarks(root)
+    wm["market"] = wm["market"] or market
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype={"ticker": str})
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")]).rename(columns={"date": "날짜"})
+    df["날짜"] = pd.to_datetime(df["날짜"])
+    days = [d for d in sorted(df["날짜"].dt.strftime("%Y%m%d").unique()) if d not in wm["dates"]]
+    df = df[df["날짜"].dt.strftime("%Y%m%d").isin(days)]
+    store(df, days, root, wm)
+    return len(days)
+
+
+# --------------------------------------------------
+# 읽기
+# --------------------------------------------------
+def open_dataset(root: str = STORE_DIR) -> pds.Dataset:
+    return pds.dataset(root, schema=SCHEMA, format="parquet", partitioning=PARTITIONING,
+                       ignore_prefixes=[".", "_", WATERMARK_FILE])
+
+
+def read(start=None, end=None, tickers: Optional[Iterable[str]] = None,
+         columns: Optional[List[str]] = None, root: str = STORE_DIR, adjusted: bool = False) -> pd.DataFrame:
+    """
+    date 범위(파티션 pruning) / ticker 조건으로 읽어 노트북 kospi_ohlcv 와 같은 long 프레임 반환
+    (날짜, ticker, 시가, 고가, 저가, 종가, 거래량, 등락률 / ticker, 날짜 순)
+    저장소는 무수정 시세. adjusted=True 면 읽은 구간 마지막 날 기준 수정주가 (market_data.adjust_prices,
+    종가·등락률 컬럼 필요)
+    """
+    if not load_watermarks(root)["dates"]:
+        return pd.DataFrame(columns=["날짜", "ticker"] + OHLCV_COLUMNS)
+
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    if start is not None:
+        expr = _and(pds.field("date") >= pd.Timestamp(start).date())
+    if end is not None:
+        expr = _and(pds.field("date") <= pd.Timestamp(end).date())
+    if tickers is not None:
+        expr = _and(pds.field("ticker").isin([str(t).zfill(6) for t in tickers]))
+
+    cols = None if columns is None else ["date", "ticker"] + [c for c in columns if c not in ("date", "날짜", "ticker")]
+    df = open_dataset(root).to_table(columns=cols, filter=expr).to_pandas()
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.rename(columns={"date": "날짜"})
+    df = df.sort_values(["ticker", "날짜"]).reset_index(drop=True)
+    return adjust_prices(df) if adjusted else df
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="로컬 OHLCV 저장소 증분 갱신")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("update", help="없는 거래일만 받아서 추가")
+    p.add_argument("--start", default="20171201")
+    p.add_argument("--end", default=time.strftime("%Y%m%d"))
+    p.add_argument("--market", default="KOSPI")
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--refresh", type=int, default=0, help="마지막 N 거래일은 다시 받기")
+
+    p = sub.add_parser("import", help="기존 OHLCV CSV 적재")
+    p.add_argument("csv")
+    p.add_argument("--market", default="KOSPI")
+
+    p = sub.add_parser("export", help="기간 조회 결과를 CSV 로 저장")
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p.add_argument("--out", default="kospi_2018_2025_ohlcv.csv")
+    p.add_argument("--raw", action="store_true", help="수정주가로 바꾸지 않고 무수정 그대로")
+
+    sub.add_parser("stats", help="watermark 요약")
+
+    for p in sub.choices.values():
+        p.add_argument("--root", default=STORE_DIR)
+    args = ap.parse_args()
+
+    t0 = time.time()
+    if args.cmd == "update":
+        days = update(args.start, args.end, args.market, workers=args.workers, refresh=args.refresh, root=args.root)
+        print(f"새 거래일 {len(days)}개", f"({days[0]}~{days[-1]})" if days else "")
+    elif args.cmd == "import":
+        print("적재한 거래일:", import_csv(args.csv, args.market, args.root))
+    elif args.cmd == "export":
+        df = read(args.start, args.end, root=args.root, adjusted=not args.raw)
+        df.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print("저장:", args.out, df.shape)
+    else:
+        wm = load_watermarks(args.root)
+        print(json.dumps({
+            "market": wm["market"],
+            "days": len(wm["dates"]),
+            "first": min(wm["dates"]) if wm["dates"] else None,
+            "last": last_date(wm),
+            "rows": sum(wm["dates"].values()),
+            "tickers": len(wm["tickers"]),
+        }, ensure_ascii=False))
+    print(f"{time.time() - t0:.1f}s")
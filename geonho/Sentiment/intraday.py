@@ -0,0 +1,321 @@
+#%%
+# 댓글 작성 시각 → KRX 장 구간 / 고정 폭 시간 구간 별 댓글 수·감성 시계열
+# reg_time / comment_at ('2025-01-02T23:38:23+0900') 을 행마다 정규식으로 날짜만 떼던 것(yyyymmdd_from_timestr) 대신
+# 문자열 바이트를 한 번에 숫자로 바꿔 수백만 행을 한 번에 파싱하고 (형식이 다른 값만 trading_calendar 파서로),
+#   - 장 구간: 장전(08:00~09:00) / 정규장(09:00~15:30) / 장후(15:30~18:00) / 장외(그 밖, 휴장일 전체)
+#   - 고정 폭 구간 (기본 5분)
+# 에 bincount 로 쌓는다. chunk 단위로 읽어 누적하므로 메모리는 구간 수에만 비례한다.
+# 구간별 댓글 수는 직전 20일 같은 시각(거래일은 거래일끼리, 휴장일은 휴장일끼리) 대비 z 로 장중 관심 급증을 표시.
+import argparse
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "..", "Oscillator"))
+
+from trading_calendar import TradingCalendar  # noqa: E402
+
+from score_comments import ID_COL  # noqa: E402
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+CALENDAR = "../Oscillator/ohlcv_store"
+COMMENT_CSV = "../data/NAVER/comments/comments_2025_adj.csv"
+OUTPUT_DIR = "../data/NAVER/intraday"
+
+TIME_COLS = ["reg_time", "comment_at"]   # comments_crawling_adj / yeowon
+FREQ = "5min"
+BASELINE = 20      # 급증 z 의 비교 기간 (같은 종류의 직전 날 수)
+CHUNKSIZE = 1_000_000
+
+PHASES = ["overnight", "pre_open", "regular", "after_hours"]
+PRE_OPEN = 8 * 3600
+OPEN = 9 * 3600
+CLOSE = 15 * 3600 + 30 * 60
+AFTER_END = 18 * 3600
+DAY = 86400
+FIELDS = ["n", "n_scored", "score_sum", "n_pos", "n_neg"]
+
+# 'YYYY-MM-DDTHH:MM:SS+0900' (24 byte) / 'YYYY-MM-DD HH:MM:SS' (19 byte, KST 로 간주)
+_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_SEPS = {4: b"-", 7: b"-", 13: b":", 16: b":"}
+
+
+# --------------------------------------------------
+# 파싱
+# --------------------------------------------------
+def _num(u: np.ndarray, i: int, j: int) -> np.ndarray:
+    r = u[:, i].astype(np.int32) - 48
+    for k in range(i + 1, j):
+        r = r * 10 + (u[:, k].astype(np.int32) - 48)
+    return r
+
+
+def _days_from_civil(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """그레고리력 (y, m, d) → 1970-01-01 부터 날 수 (H. Hinnant 공식, 정수 연산만)"""
+    y = y - (m <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * ((m + 9) % 12) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return (era * 146097 + doe - 719468).astype(np.int64)
+
+
+def parse_times(values) -> np.ndarray:
+    """
+    작성 시각 문자열 → KST 기준 datetime64[s] (못 읽으면 NaT).
+    고정 형식은 Arrow 문자열 버퍼를 (n, 24) 바이트 배열로 모아 자리별 숫자 연산으로, 나머지만 TradingCalendar.to_kst.
+    """
+    s = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return TradingCalendar.to_kst(s).to_numpy(dtype="datetime64[s]")
+    arr = pa.array(s.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    n = len(arr)
+    out = np.full(n, np.datetime64("NaT"), dtype="datetime64[s]")
+    if n == 0:
+        return out
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int32)[arr.offset:arr.offset + n + 1]
+    data = np.frombuffer(arr.buffers()[2], dtype=np.uint8) if arr.buffers()[2] is not None else np.zeros(1, np.uint8)
+    lens = np.diff(offsets)
+    null = arr.is_null().to_numpy(zero_copy_only=False)
+    cand = ~null & ((lens == 24) | (lens == 19))
+
+    rows = np.flatnonzero(cand)
+    u = data[np.minimum(offsets[rows][:, None] + np.arange(24), len(data) - 1)]
+    aware = lens[rows] == 24
+    u[~aware, 19:] = np.frombuffer(b"+0900", dtype=np.uint8)   # offset 없는 값은 KST
+    ok = (u[:, _DIGITS + [20, 21, 22, 23]] - 48 <= 9).all(axis=1)   # uint8 이라 '0' 미만도 큼
+    for pos, ch in _SEPS.items():
+        ok &= u[:, pos] == ch[0]
+    ok &= (u[:, 10] == ord("T")) | (u[:, 10] == ord(" "))
+    ok &= (u[:, 19] == ord("+")) | (u[:, 19] == ord("-"))
+
+    u = u[ok]
+    Y, M, D = _num(u, 0, 4), _num(u, 5, 7), _num(u, 8, 10)
+    h, m, sec = _num(u, 11, 13), _num(u, 14, 16), _num(u, 17, 19)
+    sign = np.where(u[:, 19] == ord("-"), -1, 1)
+    off = sign * (_num(u, 20, 22) * 3600 + _num(u, 22, 24) * 60)
+    secs = _days_from_civil(Y, M, D) * DAY + (h * 3600 + m * 60 + sec - off + 9 * 3600)
+    good = (M >= 1) & (M <= 12) & (D >= 1) & (D <= 31) & (h < 24) & (m < 60) & (sec < 61)
+    out[rows[ok][good]] = secs[good].astype("datetime64[s]")
+
+    rest = ~null
+    rest[rows[ok][good]] = False
+    if rest.any():
+        out[rest] = TradingCalendar.to_kst(s[rest]).to_numpy(dtype="datetime64[s]")
+    return out
+
+
+# --------------------------------------------------
+# 구간 나누기
+# --------------------------------------------------
+def phase_of(t: np.ndarray, cal: TradingCalendar) -> np.ndarray:
+    """각 시각의 장 구간 코드 (PHASES 순서). 휴장일은 하루 종일 overnight"""
+    day = t.astype("datetime64[D]")
+    tod = (t - day).astype(np.int64)
+    pos = np.searchsorted(cal.sessions, day)
+    trading = cal.sessions[np.minimum(pos, len(cal.sessions) - 1)] == day
+    code = np.zeros(len(t), dtype=np.int8)
+    code[trading & (tod >= PRE_OPEN) & (tod < OPEN)] = 1
+    code[trading & (tod >= OPEN) & (tod < CLOSE)] = 2
+    code[trading & (tod >= CLOSE) & (tod < AFTER_END)] = 3
+    return code
+
+
+class BinCounter:
+    """정수 구간 번호별 합계 배열. 처음 보는 범위가 들어오면 양쪽으로 늘림"""
+
+    def __init__(self, fields: Iterable[str] = FIELDS):
+        self.lo: Optional[int] = None
+        self.data: Dict[str, np.ndarray] = {f: np.zeros(0) for f in fields}
+
+    def _grow(self, lo: int, hi: int):
+        if self.lo is None:
+            self.lo = lo
+            self.data = {f: np.zeros(hi - lo) for f in self.data}
+            return
+        cur_hi = self.lo + len(next(iter(self.data.values())))
+        new_lo, new_hi = min(lo, self.lo), max(hi, cur_hi)
+        if new_lo == self.lo and new_hi == cur_hi:
+            return
+        for f, a in self.data.items():
+            b = np.zeros(new_hi - new_lo)
+            b[self.lo - new_lo:self.lo - new_lo + len(a)] = a
+            self.data[f] = b
+        self.lo = new_lo
+
+    def add(self, ids: np.ndarray, values: Dict[str, Optional[np.ndarray]]):
+        """values 에 있는 항목만 더함 (weights None = 행 수). 없는 항목은 0 그대로"""
+        if len(ids) == 0:
+            return
+        self._grow(int(ids.min()), int(ids.max()) + 1)
+        off = ids - self.lo
+        size = len(next(iter(self.data.values())))
+        for f, w in values.items():
+            self.data[f] += np.bincount(off, weights=w, minlength=size)
+
+
+def chunk_values(score: Optional[np.ndarray]) -> Dict[str, Optional[np.ndarray]]:
+    if score is None:   # 점수 없음: 댓글 수만 (n_scored = 0 → sentiment NaN)
+        return {"n": None}
+    has = ~np.isnan(score)
+    s = np.where(has, score, 0.0)
+    return {"n": None, "n_scored": has.astype(np.float64), "score_sum": s,
+            "n_pos": (s > 0).astype(np.float64), "n_neg": (s < 0).astype(np.float64)}
+
+
+def finish(data: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    out = {f: data[f].astype(np.int64) for f in FIELDS if f != "score_sum"}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["sentiment"] = np.where(data["n_scored"] > 0, data["score_sum"] / data["n_scored"], np.nan)
+    return out
+
+
+def spike_z(counts: np.ndarray, trading: np.ndarray, baseline: int = BASELINE) -> np.ndarray:
+    """
+    counts: (날, 하루 구간 수). 같은 시각 구간의 직전 baseline 일(거래일 / 휴장일 따로) 평균·표준편차 대비 z.
+    누적합으로 창 합을 구하므로 O(날 × 구간).
+    """
+    z = np.full(counts.shape, np.nan)
+    for kind in (True, False):
+        rows = np.flatnonzero(trading == kind)
+        if len(rows) <= baseline:
+            continue
+        x = counts[rows].astype(np.float64)
+        c1 = np.vstack([np.zeros(x.shape[1]), np.cumsum(x, axis=0)])
+        c2 = np.vstack([np.zeros(x.shape[1]), np.cumsum(x * x, axis=0)])
+        i = np.arange(baseline, len(rows))
+        s1 = c1[i] - c1[i - baseline]
+        s2 = c2[i] - c2[i - baseline]
+        mu = s1 / baseline
+        var = np.maximum((s2 - s1 * mu) / (baseline - 1), 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            zz = np.where(var > 0, (x[baseline:] - mu) / np.sqrt(var), np.nan)
+        z[rows[baseline:]] = zz
+    return z
+
+
+# --------------------------------------------------
+# 파일 단위
+# --------------------------------------------------
+def load_scores(paths: List[str]) -> Optional[pd.Series]:
+    """score_comments.py 출력 → comment_id(int64) → score"""
+    if not paths:
+        return None
+    parts = [pd.read_csv(p, encoding="utf-8-sig", usecols=[ID_COL, "score"]) for p in paths]
+    s = pd.concat(parts, ignore_index=True)
+    s[ID_COL] = pd.to_numeric(s[ID_COL], errors="coerce")
+    s = s.dropna(subset=[ID_COL]).drop_duplicates(ID_COL, keep="last")
+    return pd.Series(s["score"].to_numpy(dtype=np.float64), index=s[ID_COL].astype(np.int64).to_numpy())
+
+
+def time_column(path: str) -> str:
+    header = pd.read_csv(path, encoding="utf-8-sig", nrows=0).columns
+    for c in TIME_COLS:
+        if c in header:
+            return c
+    raise ValueError(f"{path}: 작성 시각 컬럼({'/'.join(TIME_COLS)})이 없음")
+
+
+def bucket(paths: List[str], cal: TradingCalendar, freq: str = FREQ, scores: Optional[pd.Series] = None,
+           baseline: int = BASELINE, chunksize: int = CHUNKSIZE):
+    """
+    댓글 CSV 들 → (구간 시계열, 세션 × 장 구간 요약).
+    구간 시계열: bin_start, phase, session(그 구간 글이 반영되는 거래일), n, n_scored, sentiment, n_pos, n_neg, spike_z
+    세션 요약: session, phase, n, n_scored, sentiment, n_pos, n_neg
+    """
+    width = int(pd.Timedelta(freq).total_seconds())
+    if width <= 0 or DAY % width:
+        raise ValueError(f"구간 폭은 하루를 나누어떨어지게: {freq}")
+    bins = BinCounter()
+    phases = BinCounter()
+    n_bad = 0
+    for path in paths:
+        col = time_column(path)
+        usecols = [col] + ([ID_COL] if scores is not None else [])
+        for df in pd.read_csv(path, encoding="utf-8-sig", usecols=usecols, dtype=str, chunksize=chunksize):
+            t = parse_times(df[col])
+            ok = ~np.isnat(t)
+            n_bad += int((~ok).sum())
+            t = t[ok]
+            sc = None
+            if scores is not None:
+                ids = pd.to_numeric(df[ID_COL], errors="coerce").to_numpy()[ok]
+                sc = scores.reindex(ids).to_numpy(dtype=np.float64)
+            vals = chunk_values(sc)
+            secs = t.astype(np.int64)
+            bins.add(secs // width, vals)
+
+            sess = cal.session_index(t)
+            keep = sess >= 0
+            ph = phase_of(t, cal)
+            pvals = {k: (v[keep] if v is not None else None) for k, v in vals.items()}
+            phases.add(sess[keep].astype(np.int64) * len(PHASES) + ph[keep], pvals)
+    if bins.lo is None:
+        raise ValueError("읽은 작성 시각이 없음")
+    if n_bad:
+        print(f"작성 시각을 못 읽은 행: {n_bad}")
+
+    # 고정 폭 구간: 하루 단위로 맞춰 (날, 하루 구간 수) 격자로
+    per_day = DAY // width
+    lo = bins.lo - bins.lo % per_day
+    hi = bins.lo + len(bins.data["n"])
+    hi = hi + (-hi) % per_day
+    bins._grow(lo, hi)
+    grid = finish(bins.data)
+    start = (np.arange(lo, hi, dtype=np.int64) * width).astype("datetime64[s]")
+    n_days = (hi - lo) // per_day
+    day0 = start[::per_day].astype("datetime64[D]")
+    pos = np.searchsorted(cal.sessions, day0)
+    trading = cal.sessions[np.minimum(pos, len(cal.sessions) - 1)] == day0
+    z = spike_z(grid["n"].reshape(n_days, per_day), trading, baseline).ravel()
+
+    sess = cal.session_index(start)
+    series = pd.DataFrame({
+        "bin_start": start.astype("datetime64[ns]"),
+        "phase": np.asarray(PHASES, dtype=object)[phase_of(start, cal)],
+        "session": np.where(sess >= 0, cal.sessions[np.maximum(sess, 0)], np.datetime64("NaT")).astype("datetime64[ns]"),
+        **grid,
+        "spike_z": z,
+    })
+
+    pg = finish(phases.data)
+    pid = np.arange(phases.lo, phases.lo + len(phases.data["n"]))
+    nz = pg["n"] > 0
+    summary = pd.DataFrame({
+        "session": cal.sessions[pid[nz] // len(PHASES)].astype("datetime64[ns]"),
+        "phase": np.asarray(PHASES, dtype=object)[pid[nz] % len(PHASES)],
+        **{k: v[nz] for k, v in pg.items()},
+    })
+    return series, summary
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="댓글 작성 시각 → 장 구간 / 고정 폭 구간 댓글 수·감성 시계열")
+    ap.add_argument("inputs", nargs="*", default=[COMMENT_CSV], help="댓글 CSV (reg_time / comment_at)")
+    ap.add_argument("--calendar", default=CALENDAR, help="ohlcv_store / kospi_panel / 날짜 CSV")
+    ap.add_argument("--scores", nargs="*", default=[], help="score_comments.py 출력 (comment_id, score)")
+    ap.add_argument("--freq", default=FREQ, help="구간 폭 (5min, 15min, 1h ...)")
+    ap.add_argument("--baseline", type=int, default=BASELINE)
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    ap.add_argument("--out_dir", default=OUTPUT_DIR)
+    args = ap.parse_args()
+
+    cal = TradingCalendar.load(args.calendar)
+    series, summary = bucket(args.inputs, cal, args.freq, load_scores(args.scores), args.baseline, args.chunksize)
+    os.makedirs(args.out_dir, exist_ok=True)
+    tag = args.freq.replace(" ", "")
+    p1 = os.path.join(args.out_dir, f"comment_activity_{tag}.csv")
+    p2 = os.path.join(args.out_dir, "comment_activity_phase.csv")
+    series.to_csv(p1, index=False, encoding="utf-8-sig")
+    summary.to_csv(p2, index=False, encoding="utf-8-sig")
+    print("저장:", p1, series.shape, "/", p2, summary.shape)
+    top = series[series["phase"] == "regular"].nlargest(5, "spike_z")
+    print(top[["bin_start", "n", "sentiment", "spike_z"]])
@@ -0,0 +1,355 @@
+#%%
+# K-Fear&Greed 지수 엔진
+# 댓글 감성 점수(score_cache 경유) × 기사 메타(news_id, keyword, section, rank_in_section)
+#   → 거래 세션 × keyword × section 별 공감 가중 감성 → 창 안 z-score → 0~100 → osc_score_0_100 과 합친 지수
+# 날짜 파티션(storage.py parquet store) 하루치 댓글을 부분합(n, Σw, Σw·score ...) 한 묶음으로 줄여 저장하고,
+# 지수는 부분합을 다시 더해 만든다. 하루를 추가/수정하면 그날 댓글만 읽어 점수를 매기고(새 본문만),
+# rolling 정규화는 영향받는 세션(그날 세션 이후)만 다시 계산한다.
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.special import ndtr
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "..", "Naver_comments"))
+sys.path.append(os.path.join(HERE, "..", "Oscillator"))
+
+import storage  # noqa: E402
+from trading_calendar import TradingCalendar  # noqa: E402
+
+from score_cache import CACHE_PATH, ScoreCache  # noqa: E402
+from score_comments import load_scorer  # noqa: E402
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+STORE_DIR = storage.STORE_DIR
+KFG_DIR = "../data/NAVER/kfg"
+CALENDAR = "../Oscillator/ohlcv_store"
+OSC_SCORE_CSV = "../Oscillator/osc_score_2020_2025.csv"
+
+WINDOW = 60          # 감성 정규화 창 (거래 세션 수, 댓글 데이터가 2025 년부터라 osc_score 의 252 보다 짧게)
+MIN_PERIODS = 20
+CLIP_C = 3
+SENT_WEIGHT = 0.5    # 지수 = SENT_WEIGHT × 감성 점수 + (1 - SENT_WEIGHT) × osc_score_0_100
+ALL = "전체"          # keyword / section 합계 행
+NONE = "-"           # 값 없음 (comments_crawling_adj 댓글은 section 이 없음)
+
+# 댓글 데이터셋별 컬럼 (storage.SCHEMAS)
+SOURCES = {
+    "comments": {"text": "contents", "time": "reg_time", "up": "sympathy", "down": "antipathy"},
+    "comments_top5": {"text": "text_raw", "time": "comment_at", "up": "like_count", "down": "dislike_count"},
+}
+KEYS = ["session", "keyword", "section"]
+SUMS = ["n", "w", "ws", "n_pos", "n_neg"]
+DTYPES = {"src_date": "datetime64[ns]", "session": "datetime64[ns]", "keyword": object, "section": object,
+          "n": np.int64, "w": np.float64, "ws": np.float64, "n_pos": np.int64, "n_neg": np.int64}
+
+
+def comment_weight(up: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """
+    공감 - 비공감 으로 댓글 가중치: 1 + sign(net)·log(1 + |net|), 0 아래는 0.
+    공감이 많을수록 (로그로 완만하게) 크게, 비공감이 2개 이상 많으면 반영 안 함.
+    """
+    net = np.nan_to_num(up.astype(np.float64)) - np.nan_to_num(down.astype(np.float64))
+    return np.maximum(1.0 + np.sign(net) * np.log1p(np.abs(net)), 0.0)
+
+
+def empty_partials() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in DTYPES.items()})
+
+
+def label(s: pd.Series) -> np.ndarray:
+    return s.astype("string").fillna(NONE).replace("", NONE).to_numpy(dtype=object)
+
+
+def store_days(root: str = STORE_DIR) -> List[str]:
+    """댓글 데이터셋에 있는 date 파티션 (YYYY-MM-DD)"""
+    days = set()
+    for ds in SOURCES:
+        d = storage.dataset_dir(ds, root)
+        if os.path.isdir(d):
+            days.update(n.split("=", 1)[1] for n in os.listdir(d) if n.startswith("date="))
+    return sorted(days)
+
+
+def news_meta(root: str = STORE_DIR) -> pd.DataFrame:
+    """news_top5 의 news_id → section, keyword, rank (rank_in_section). 작은 테이블이라 한 번에"""
+    if not os.path.isdir(storage.dataset_dir("news_top5", root)):
+        return pd.DataFrame(columns=["news_id", "section", "keyword", "rank"]).set_index("news_id")
+    meta = storage.read("news_top5", columns=["news_id", "section", "keyword", "rank"], root=root)
+    return meta.drop_duplicates("news_id", keep="last").set_index("news_id")
+
+
+# --------------------------------------------------
+# 하루치 부분합
+# --------------------------------------------------
+class KfgEngine:
+    """
+    KFG_DIR 아래
+      partials.parquet : 원본 날짜(src_date) × 세션 × keyword × section 부분합
+      index.parquet    : 세션 × keyword × section 감성 / 점수 / 지수 (keyword, section 에 '전체' 합계 포함)
+      meta.json        : 파라미터 + 점수기 버전 (바뀌면 rebuild 필요)
+    """
+
+    def __init__(self, root: str = KFG_DIR, store: str = STORE_DIR, calendar: str = CALENDAR,
+                 osc_csv: str = OSC_SCORE_CSV, cache: str = CACHE_PATH, lexicon: str = "", model: str = "",
+                 window: int = WINDOW, min_periods: int = MIN_PERIODS, clip_c: Optional[float] = CLIP_C,
+                 sent_weight: float = SENT_WEIGHT, max_rank: Optional[int] = None):
+        self.root, self.store, self.osc_csv = root, store, osc_csv
+        self.cal = TradingCalendar.load(calendar)
+        self.scorer = load_scorer(lexicon, False, model)
+        self.version = ScoreCache.version_of("model" if model else "lexicon", self.scorer.version)
+        self.cache = ScoreCache(cache)
+        self.params = {"window": window, "min_periods": min_periods, "clip_c": clip_c,
+                       "sent_weight": sent_weight, "max_rank": max_rank, "scorer": self.version}
+        self._meta = None
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def read_day(self, day: str) -> pd.DataFrame:
+        """하루 파티션 댓글 두 데이터셋 → (text, time, up, down, keyword, section) 한 프레임"""
+        if self._meta is None:
+            self._meta = news_meta(self.store)
+        parts = []
+        for ds, c in SOURCES.items():
+            if not os.path.isdir(os.path.join(storage.dataset_dir(ds, self.store), f"date={day}")):
+                continue
+            cols = ["news_id", "keyword", c["text"], c["time"], c["up"], c["down"]]
+            if ds == "comments_top5":
+                cols.append("section")
+            df = storage.read(ds, start=day, end=day, columns=cols, root=self.store)
+            if df.empty:
+                continue
+            meta = self._meta.reindex(df["news_id"])
+            meta.index = df.index
+            kw = df["keyword"].astype("string").fillna(meta["keyword"].astype("string"))
+            sec = df["section"] if "section" in df.columns else pd.Series(pd.NA, index=df.index)
+            sec = sec.astype("string").fillna(meta["section"].astype("string"))
+            part = pd.DataFrame({
+                "text": df[c["text"]].to_numpy(dtype=object),
+                "time": df[c["time"]],
+                "up": pd.to_numeric(df[c["up"]], errors="coerce").to_numpy(dtype=np.float64),
+                "down": pd.to_numeric(df[c["down"]], errors="coerce").to_numpy(dtype=np.float64),
+                "keyword": label(kw),
+                "section": label(sec),
+                "rank": pd.to_numeric(meta["rank"], errors="coerce").to_numpy(dtype=np.float64),
+            })
+            if self.params["max_rank"] is not None:   # 섹션 상위 기사 댓글만 (rank 없는 adj 댓글은 유지)
+                part = part[~(part["rank"] > self.params["max_rank"])]
+            parts.append(part)
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def day_partial(self, day: str) -> pd.DataFrame:
+        """하루치 댓글 → 세션 × keyword × section 부분합 (점수는 캐시에 없는 본문만 새로 계산)"""
+        df = self.read_day(day)
+        if df.empty:
+            return empty_partials()
+        s = self.cache.score(self.version, df["text"].tolist(), self.scorer.score_texts)["score"]
+        w = comment_weight(df["up"].to_numpy(), df["down"].to_numpy())
+        idx = self.cal.session_index(df["time"])
+        ok = idx >= 0                                   # 달력 밖 (마지막 거래일 이후 등) 은 제외
+        agg = pd.DataFrame({
+            "session": self.cal.sessions[idx[ok]].astype("datetime64[ns]"),
+            "keyword": df["keyword"].to_numpy()[ok],
+            "section": df["section"].to_numpy()[ok],
+            "n": 1,
+            "w": w[ok],
+            "ws": (w * s)[ok],
+            "n_pos": (s > 0)[ok].astype(np.int64),
+            "n_neg": (s < 0)[ok].astype(np.int64),
+        }).groupby(KEYS, sort=True)[SUMS].sum().reset_index()
+        agg.insert(0, "src_date", pd.Timestamp(day))
+        return agg
+
+    # --------------------------------------------------
+    # 상태 파일
+    # --------------------------------------------------
+    def load_partials(self) -> pd.DataFrame:
+        p = self.path("partials.parquet")
+        return pd.read_parquet(p) if os.path.exists(p) else empty_partials()
+
+    def load_index(self) -> pd.DataFrame:
+        p = self.path("index.parquet")
+        return pd.read_parquet(p) if os.path.exists(p) else pd.DataFrame()
+
+    def check_meta(self, rebuild: bool):
+        p = self.path("meta.json")
+        if not rebuild and os.path.exists(p):
+            with open(p, "r", encoding="utf-8") as f:
+                old = json.load(f)
+            if old != self.params:
+                raise ValueError(f"파라미터/점수기가 바뀜 ({old} → {self.params}): build --rebuild 로 다시 만들 것")
+
+    def save(self, partials: pd.DataFrame, index: pd.DataFrame):
+        for name, df in (("partials.parquet", partials), ("index.parquet", index)):
+            tmp = self.path(name + ".tmp")
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, self.path(name))
+        with open(self.path("meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.params, f, ensure_ascii=False)
+
+    # --------------------------------------------------
+    # 갱신
+    # --------------------------------------------------
+    def update(self, days: Iterable[str], rebuild: bool = False) -> pd.DataFrame:
+        """
+        days 의 부분합을 다시 만들고 (이전 값 교체), 영향받은 첫 세션부터 지수 재계산.
+        rebuild=True 면 기존 상태를 버리고 days 만으로 새로.
+        """
+        self.check_meta(rebuild)
+        days = sorted({pd.Timestamp(d).strftime("%Y-%m-%d") for d in days})
+        partials = empty_partials() if rebuild else self.load_partials()
+        index = pd.DataFrame() if rebuild else self.load_index()
+
+        new = [self.day_partial(d) for d in days]
+        stamps = pd.to_datetime(days)
+        old = partials[partials["src_date"].isin(stamps)]
+        partials = pd.concat([partials[~partials["src_date"].isin(stamps)]] + new, ignore_index=True)
+        partials = partials.astype(DTYPES).sort_values(["src_date"] + KEYS, kind="stable").reset_index(drop=True)
+
+        touched = pd.concat([old["session"]] + [p["session"] for p in new])
+        if touched.empty:
+            return index
+        start = pd.Timestamp(touched.min()) if len(index) else None
+        index = self.refresh(partials, index, start)
+        self.save(partials, index)
+        return index
+
+    def refresh(self, partials: pd.DataFrame, index: pd.DataFrame, start: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """start 세션 이후 행만 다시 계산해 index 에 덮어씀 (start=None 이면 전체)"""
+        series = group_series(partials)
+        if series.empty:
+            return series
+        axis = self.cal.sessions[(self.cal.sessions >= series["session"].min().to_datetime64().astype("datetime64[D]"))
+                                 & (self.cal.sessions <= series["session"].max().to_datetime64().astype("datetime64[D]"))]
+        axis = axis.astype("datetime64[ns]")
+        s0 = 0 if start is None else int(np.searchsorted(axis, np.datetime64(start, "ns")))
+
+        groups = series[["keyword", "section"]].drop_duplicates().reset_index(drop=True)
+        gid = pd.MultiIndex.from_frame(groups).get_indexer(pd.MultiIndex.from_frame(series[["keyword", "section"]]))
+        row = np.searchsorted(axis, series["session"].to_numpy(dtype="datetime64[ns]"))
+        x = np.full((len(axis), len(groups)), np.nan)
+        x[row, gid] = series["sentiment"].to_numpy()
+
+        p = self.params
+        z = rolling_z(x, s0, p["window"], p["min_periods"])                # (len(axis) - s0, G)
+        keep = row >= s0
+        out = series[keep].reset_index(drop=True)
+        zz = z[row[keep] - s0, gid[keep]]
+        out["sent_z"] = zz
+        zc = zz if p["clip_c"] is None else np.clip(zz, -p["clip_c"], p["clip_c"])
+        out["sent_score"] = ndtr(zc) * 100
+
+        osc = load_osc(self.osc_csv)
+        out["osc_score_0_100"] = osc.reindex(out["session"]).to_numpy()
+        out["kfg_0_100"] = blend(out["sent_score"].to_numpy(), out["osc_score_0_100"].to_numpy(), p["sent_weight"])
+
+        if start is not None and len(index):
+            index = index[index["session"] < start]
+            out = pd.concat([index, out], ignore_index=True)
+        return out.sort_values(KEYS, kind="stable").reset_index(drop=True)
+
+
+# --------------------------------------------------
+# 벡터화 계산
+# --------------------------------------------------
+def group_series(partials: pd.DataFrame) -> pd.DataFrame:
+    """부분합 → (세션, keyword, section) 감성. keyword / section 각각 '전체' 합계 수준도 함께"""
+    if partials.empty:
+        return pd.DataFrame(columns=KEYS + SUMS + ["sentiment", "bull_ratio"])
+    base = partials.groupby(KEYS, sort=False)[SUMS].sum().reset_index()
+    levels = [base,
+              base.assign(section=ALL).groupby(KEYS, sort=False)[SUMS].sum().reset_index(),
+              base.assign(keyword=ALL).groupby(KEYS, sort=False)[SUMS].sum().reset_index(),
+              base.assign(keyword=ALL, section=ALL).groupby(KEYS, sort=False)[SUMS].sum().reset_index()]
+    s = pd.concat(levels, ignore_index=True).drop_duplicates(KEYS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s["sentiment"] = np.where(s["w"] > 0, s["ws"] / s["w"], np.nan)
+        s["bull_ratio"] = s["n_pos"] / (s["n_pos"] + s["n_neg"])
+    s["session"] = pd.to_datetime(s["session"])
+    return s.sort_values(KEYS, kind="stable").reset_index(drop=True)
+
+
+def rolling_z(x: np.ndarray, start: int, window: int, min_periods: int) -> np.ndarray:
+    """
+    x: (세션, 그룹) 감성 (댓글 없는 세션 NaN). 행 start 이후의 창(직전 window 세션, 오늘 포함) z-score.
+    start 앞 window-1 행만 창 채우기용으로 읽으므로 하루 추가 시 계산량은 O(window × 그룹).
+    """
+    T, G = x.shape
+    if start >= T:
+        return np.empty((0, G))
+    lo = max(0, start - window + 1)
+    pad = np.full((window - 1 - (start - lo), G), np.nan)
+    win = sliding_window_view(np.vstack([pad, x[lo:]]), window, axis=0)    # (T - start, G, window)
+    ok = ~np.isnan(win)
+    cnt = ok.sum(axis=-1)
+    v = np.where(ok, win, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = v.sum(axis=-1) / cnt
+        var = (np.where(ok, win - mu[..., None], 0.0) ** 2).sum(axis=-1) / (cnt - 1)
+        z = (x[start:] - mu) / np.sqrt(var)
+    z[(cnt < max(min_periods, 2)) | ~(var > 0)] = np.nan
+    return z
+
+
+def blend(sent: np.ndarray, osc: np.ndarray, w: float) -> np.ndarray:
+    """있는 구성요소만 가중 평균 (osc_score 가 없는 날은 감성 점수만)"""
+    ws = np.where(np.isnan(sent), 0.0, w)
+    wo = np.where(np.isnan(osc), 0.0, 1.0 - w)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (ws * np.nan_to_num(sent) + wo * np.nan_to_num(osc)) / (ws + wo)
+
+
+def load_osc(path: str) -> pd.Series:
+    if not path or not os.path.exists(path):
+        return pd.Series(dtype=np.float64)
+    o = pd.read_csv(path)
+    return pd.Series(o["osc_score_0_100"].to_numpy(), index=pd.to_datetime(o["date"]))
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="K-Fear&Greed 지수 (댓글 감성 + osc_score) 증분 계산")
+    ap.add_argument("--root", default=KFG_DIR)
+    ap.add_argument("--store", default=STORE_DIR, help="storage.py parquet store")
+    ap.add_argument("--calendar", default=CALENDAR, help="ohlcv_store / kospi_panel / 날짜 CSV")
+    ap.add_argument("--osc", default=OSC_SCORE_CSV)
+    ap.add_argument("--cache", default=CACHE_PATH)
+    ap.add_argument("--lexicon", default="")
+    ap.add_argument("--model", default="", help="train_model.py 모델 (주면 사전 대신)")
+    ap.add_argument("--window", type=int, default=WINDOW)
+    ap.add_argument("--min_periods", type=int, default=MIN_PERIODS)
+    ap.add_argument("--sent_weight", type=float, default=SENT_WEIGHT)
+    ap.add_argument("--max_rank", type=int, default=None, help="섹션 내 순위 이하 기사 댓글만")
+    ap.add_argument("--out", default="", help="기본: <root>/kfg_index.csv")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("build", help="store 의 모든 (또는 기간) 날짜로 새로 계산")
+    p.add_argument("--start", default="")
+    p.add_argument("--end", default="")
+    p = sub.add_parser("update", help="날짜 파티션 추가/수정분만 반영")
+    p.add_argument("days", nargs="+")
+    args = ap.parse_args()
+
+    eng = KfgEngine(args.root, args.store, args.calendar, args.osc, args.cache, args.lexicon, args.model,
+                    args.window, args.min_periods, CLIP_C, args.sent_weight, args.max_rank)
+    if args.cmd == "build":
+        days = [d for d in store_days(args.store)
+                if (not args.start or d >= args.start) and (not args.end or d <= args.end)]
+        index = eng.update(days, rebuild=True)
+    else:
+        index = eng.update(args.days)
+    out = args.out or os.path.join(args.root, "kfg_index.csv")
+    index.to_csv(out, index=False, encoding="utf-8-sig")
+    total = index[(index["keyword"] == ALL) & (index["section"] == ALL)] if len(index) else index
+    print(f"저장: {out} {index.shape}, 세션 {len(total)}개")
+    if len(total):
+        print(total[["session", "n", "sentiment", "sent_score", "osc_score_0_100", "kfg_0_100"]].tail())
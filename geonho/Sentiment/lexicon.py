@@ -0,0 +1,165 @@
+#%%
+# 한국어 금융 감성 사전 + 댓글 점수 계산 (CPU, 오프라인, 형태소 분석기 없음)
+# 사전 단어(떡상/떡락/존버/손절 등)를 긴 것부터 하나의 정규식 alternation 으로 묶어 댓글마다 한 번만 훑는다.
+# 한국어는 어미·조사가 붙으므로('떡락했네', '손절각') 어절 단위가 아니라 부분 문자열로 찾고,
+# 바로 앞의 '안/못' 또는 바로 뒤의 '~지 않/못/없' 은 부정으로 보고 부호를 뒤집는다.
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# 기본 사전 (단어 → 가중치, 양수 = 탐욕/긍정, 음수 = 공포/부정)
+# --------------------------------------------------
+DEFAULT_LEXICON: Dict[str, float] = {
+    # 긍정 / 탐욕
+    "떡상": 2.0, "불장": 2.0, "가즈아": 1.5, "가즈아ㅏ": 1.5, "풀매수": 1.5, "영끌": 1.0,
+    "급등": 1.5, "폭등": 2.0, "상한가": 2.0, "신고가": 1.5, "호재": 1.5, "대박": 1.5,
+    "상승": 1.0, "반등": 1.0, "회복": 1.0, "오른다": 1.0, "올랐": 1.0, "오르네": 1.0,
+    "저평가": 1.0, "매수": 0.5, "줍줍": 1.0, "존버": 0.5, "익절": 0.5, "수익": 1.0,
+    "흑자": 1.0, "성장": 0.5, "기대": 0.5, "최고": 1.0, "좋다": 1.0, "좋네": 1.0, "굿": 1.0,
+    "화이팅": 0.5, "믿는다": 0.5, "돈복사": 1.5,
+    # 부정 / 공포
+    "떡락": -2.0, "폭락": -2.0, "급락": -1.5, "하한가": -2.0, "신저가": -1.5, "반토막": -2.0,
+    "나락": -2.0, "폭망": -2.0, "쪽박": -2.0, "망했": -2.0, "망한": -1.5, "한강": -2.0,
+    "손절": -1.0, "물렸": -1.0, "물림": -1.0, "개미털기": -1.0, "설거지": -1.5, "탈출": -1.0,
+    "하락": -1.0, "내린다": -1.0, "떨어": -1.0, "빠지": -0.5, "악재": -1.5, "손실": -1.0,
+    "적자": -1.0, "거품": -1.0, "고점": -0.5, "매도": -0.5, "팔아": -0.5, "패닉": -2.0,
+    "공포": -1.5, "위기": -1.5, "쇼크": -1.5, "불안": -1.0, "무섭": -1.0, "최악": -1.5,
+    "망하": -1.5, "개잡주": -1.5, "곡소리": -1.5, "상폐": -2.0, "깡통": -2.0,
+    "ㅠㅠ": -0.5, "ㅜㅜ": -0.5,
+}
+
+# 강조어: 바로 뒤 사전 단어 가중치에 곱함
+INTENSIFIERS: Dict[str, float] = {"개": 1.5, "완전": 1.5, "진짜": 1.3, "너무": 1.3, "존나": 1.5, "핵": 1.5, "역대급": 1.5}
+
+# 부정어·강조어는 어절 첫머리일 때만 ('한동안 하락', '불안 폭락' 의 '안', '10개 떡상' 의 '개' 제외)
+WORD_START = r"(?:^|[^가-힣0-9])"
+NEG_BEFORE = re.compile(rf"{WORD_START}(?:안|못)\s*$")
+NEG_AFTER = re.compile(r"^[가-힣]{0,3}\s*(?:않|못\s*(?:하|해|했|함|한)|없)")
+CONTEXT = 6   # 부정/강조어를 볼 앞뒤 글자 수
+RULES_VERSION = 3   # 부정/강조 규칙을 바꾸면 올림 (version 이 바뀌어 이전 점수 캐시와 섞이지 않게)
+
+
+class Lexicon:
+    """
+    단어 → 가중치 사전. 정규식은 처음 쓸 때 한 번 컴파일 (worker 프로세스마다 한 번).
+    version 은 사전 내용 해시라 사전이 바뀌면 점수 캐시·산출물을 구분할 수 있다.
+    """
+
+    def __init__(self, terms: Dict[str, float], intensifiers: Optional[Dict[str, float]] = None):
+        self.terms = {str(k).strip(): float(v) for k, v in terms.items() if str(k).strip() and float(v) != 0.0}
+        if not self.terms:
+            raise ValueError("사전이 비어 있음")
+        self.intensifiers = dict(INTENSIFIERS if intensifiers is None else intensifiers)
+        self._pattern = None
+        self._intense = None
+
+    # --------------------------------------------------
+    # 만들기
+    # --------------------------------------------------
+    @classmethod
+    def default(cls) -> "Lexicon":
+        return cls(DEFAULT_LEXICON)
+
+    @classmethod
+    def load(cls, path: str = "", replace: bool = False) -> "Lexicon":
+        """
+        사용자 사전 (CSV: term, weight / JSON: {"term": weight}) 을 기본 사전 위에 덮어씀.
+        replace=True 면 기본 사전 없이 파일만 사용. weight 0 인 줄은 기본 사전 단어 삭제.
+        """
+        terms = {} if replace else dict(DEFAULT_LEXICON)
+        if path:
+            if os.path.splitext(path)[1].lower() == ".json":
+                with open(path, "r", encoding="utf-8") as f:
+                    user = {k: float(v) for k, v in json.load(f).items()}
+            else:
+                df = pd.read_csv(path, encoding="utf-8-sig")
+                user = dict(zip(df["term"].astype(str), df["weight"].astype(float)))
+            for k, v in user.items():
+                if v == 0.0:
+                    terms.pop(k, None)
+                else:
+                    terms[k] = v
+        return cls(terms)
+
+    @property
+    def version(self) -> str:
+        payload = json.dumps([sorted(self.terms.items()), sorted(self.intensifiers.items()), RULES_VERSION],
+                             ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+    # --------------------------------------------------
+    # 점수
+    # --------------------------------------------------
+    @property
+    def pattern(self) -> "re.Pattern":
+        if self._pattern is None:
+            # 긴 단어 먼저 ('가즈아ㅏ' 가 '가즈아' 보다, '개잡주' 가 강조어 '개' 보다 우선)
+            alt = "|".join(re.escape(t) for t in sorted(self.terms, key=len, reverse=True))
+            self._pattern = re.compile(alt)
+            inten = "|".join(re.escape(t) for t in sorted(self.intensifiers, key=len, reverse=True))
+            self._intense = re.compile(rf"{WORD_START}({inten})\s*$") if inten else None
+        return self._pattern
+
+    def score_text(self, text) -> Tuple[float, float, int]:
+        """댓글 하나 → (pos, neg, hits). pos / neg 는 가중치 절댓값 합"""
+        if not isinstance(text, str) or not text:
+            return 0.0, 0.0, 0
+        pos = neg = 0.0
+        hits = 0
+        for m in self.pattern.finditer(text):
+            w = self.terms[m.group()]
+            # 앞쪽은 잘라내지 않고 pos 로 범위만 지정: 창 시작이 본문 시작이 아니면 '^' 가 맞지 않아
+            # 창 첫 글자에 걸친 어절을 어절 첫머리로 잘못 보지 않음
+            lo = max(0, m.start() - CONTEXT)
+            after = text[m.end():m.end() + CONTEXT]
+            if NEG_BEFORE.search(text, lo, m.start()) or NEG_AFTER.match(after):
+                w = -w
+            if self._intense is not None:
+                k = self._intense.search(text, lo, m.start())
+                if k:
+                    w *= self.intensifiers[k.group(1)]
+            if w > 0:
+                pos += w
+            else:
+                neg -= w
+            hits += 1
+        return pos, neg, hits
+
+    def score_texts(self, texts: Iterable) -> Dict[str, np.ndarray]:
+        """
+        댓글 여러 개 → pos, neg, hits, score 배열.
+        score = (pos - neg) / (pos + neg) ∈ [-1, 1], 사전 단어가 없으면 0
+        """
+        res = np.array([self.score_text(t) for t in texts], dtype=np.float64).reshape(-1, 3)
+        pos, neg = res[:, 0], res[:, 1]
+        tot = pos + neg
+        with np.errstate(invalid="ignore", divide="ignore"):
+            score = np.where(tot > 0, (pos - neg) / tot, 0.0)
+        return {"pos": pos, "neg": neg, "hits": res[:, 2].astype(np.int32), "score": score}
+
+
+#%%
+# 확인용: 부정 / 강조 규칙
+if __name__ == "__main__":
+    lex = Lexicon.default()
+    checks = [
+        ("떡상", 1.0), ("안 떡상", -1.0), ("못 올랐", -1.0), ("떡상하지 않", -1.0),
+        ("상승하지 못했다", -1.0), ("떡상 못함", -1.0), ("반등하지 못한", -1.0),
+        ("한동안 하락", -1.0),    # '한동안' 의 '안' 은 부정 아님
+        ("불안 폭락", -1.0),      # '불안' 의 '안' 은 부정 아님 (둘 다 부정 단어)
+        ("안 폭락", 1.0),
+    ]
+    for text, want in checks:
+        got = lex.score_texts([text])["score"][0]
+        print(f"{text!r}: {got:+.2f}", "" if got == want else f"← 기대 {want:+.2f}")
+        assert got == want
+    # 강조어: '개떡상' / '완전 떡상' 은 1.5배, '10개 떡상' 의 '개' 는 수량
+    assert lex.score_text("개떡상")[0] == lex.score_text("완전 떡상")[0] == 3.0
+    assert lex.score_text("10개 떡상")[0] == 2.0
+    print("ok, 버전", lex.version)
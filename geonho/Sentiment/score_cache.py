@@ -0,0 +1,179 @@
+#%%
+# 댓글 감성 점수 캐시 (내용 주소 방식)
+# key = (점수기 버전, 정규화한 본문의 blake2b 해시). 'ㅋㅋㅋㅋ' / '줍줍' 처럼 기사마다 반복되는 댓글과
+# 이전 실행에서 본 댓글은 다시 점수 매기지 않고, 처음 보는 본문(cache miss)만 점수기에 보낸다.
+# 점수는 항상 정규화한 본문으로 매기므로 캐시를 쓰든 안 쓰든 결과가 같다.
+import hashlib
+import os
+import re
+import sqlite3
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+CACHE_PATH = "../data/NAVER/sentiment/score_cache.db"
+NORM_VERSION = 1       # normalize() 를 바꾸면 올려서 이전 key 와 섞이지 않게
+QUERY_BATCH = 10_000   # IN (...) 한 번에 조회할 key 수
+FIELDS = ["pos", "neg", "hits", "score"]
+
+_SPACE = re.compile(r"\s+")
+_REPEAT = re.compile(r"(.)\1{2,}")   # 같은 글자 3번 이상 → 2번 ('ㅋㅋㅋㅋㅋ' → 'ㅋㅋ')
+
+
+def normalize(text) -> str:
+    """
+    NFC, 소문자, 공백 하나로, 같은 글자 반복은 2번까지.
+    NFKC 는 'ㅋ', 'ㅠ' 같은 호환 자모를 조합형 자모로 바꿔 사전 단어('ㅠㅠ', '가즈아ㅏ')와 안 맞게 되므로 쓰지 않음.
+    """
+    if not isinstance(text, str):
+        return ""
+    t = text if unicodedata.is_normalized("NFC", text) else unicodedata.normalize("NFC", text)
+    t = t.lower()
+    t = _REPEAT.sub(r"\1\1", t)
+    return _SPACE.sub(" ", t).strip()
+
+
+def text_key(norm: str) -> bytes:
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+
+
+def prepare(texts: Iterable) -> Dict:
+    """
+    본문 목록 → 정규화 + 중복 제거.
+    norm(고유 본문), keys, inverse(행 → 고유 번호), values(고유 본문별 점수, 처음엔 NaN), miss(점수 매길 고유 번호)
+    """
+    uniq: Dict[str, int] = {}
+    inverse = np.fromiter((uniq.setdefault(normalize(t), len(uniq)) for t in texts), dtype=np.int64)
+    norm = list(uniq)
+    return {"norm": norm, "keys": [text_key(t) for t in norm], "inverse": inverse,
+            "values": {f: np.full(len(norm), np.nan) for f in FIELDS},
+            "miss": np.arange(len(norm), dtype=np.int64)}
+
+
+def assemble(batch: Dict, scored: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """miss 점수를 채워 행 순서 배열로 (중복 본문은 같은 점수)"""
+    miss = batch["miss"]
+    if len(miss):
+        for f in FIELDS:
+            batch["values"][f][miss] = scored[f]
+    inv = batch["inverse"]
+    out = {f: batch["values"][f][inv] for f in FIELDS}
+    out["hits"] = out["hits"].astype(np.int32)
+    return out
+
+
+class ScoreCache:
+    """
+    SQLite (WAL) 한 테이블: (version, key) → pos, neg, hits, score.
+    version 은 점수기 이름 + 사전/모델 버전 + 정규화 버전이라 사전을 고치면 자동으로 새 key 공간.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self.path = path
+        self.con = sqlite3.connect(path)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " version TEXT NOT NULL, key BLOB NOT NULL,"
+            " pos REAL, neg REAL, hits INTEGER, score REAL,"
+            " PRIMARY KEY (version, key)"
+            ") WITHOUT ROWID"
+        )
+
+    @staticmethod
+    def version_of(name: str, scorer_version: str) -> str:
+        return f"{name}:{scorer_version}:n{NORM_VERSION}"
+
+    # --------------------------------------------------
+    # 조회 / 저장
+    # --------------------------------------------------
+    def get_many(self, version: str, keys: Sequence[bytes]) -> Dict[bytes, tuple]:
+        """있는 key 만 {key: (pos, neg, hits, score)}"""
+        found: Dict[bytes, tuple] = {}
+        for i in range(0, len(keys), QUERY_BATCH):
+            part = keys[i:i + QUERY_BATCH]
+            q = ("SELECT key, pos, neg, hits, score FROM scores WHERE version = ? AND key IN ("
+                 + ",".join("?" * len(part)) + ")")
+            for row in self.con.execute(q, (version, *part)):
+                found[row[0]] = row[1:]
+        return found
+
+    def put_many(self, version: str, keys: Sequence[bytes], values: Dict[str, np.ndarray]):
+        if len(keys) == 0:
+            return
+        rows = zip([version] * len(keys), keys, values["pos"].tolist(), values["neg"].tolist(),
+                   values["hits"].tolist(), values["score"].tolist())
+        with self.con:
+            self.con.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def count(self, version: Optional[str] = None) -> int:
+        if version is None:
+            return self.con.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        return self.con.execute("SELECT COUNT(*) FROM scores WHERE version = ?", (version,)).fetchone()[0]
+
+    def versions(self) -> List[tuple]:
+        return self.con.execute("SELECT version, COUNT(*) FROM scores GROUP BY version").fetchall()
+
+    def drop(self, version: str) -> int:
+        with self.con:
+            return self.con.execute("DELETE FROM scores WHERE version = ?", (version,)).rowcount
+
+    def close(self):
+        self.con.close()
+
+    # --------------------------------------------------
+    # 배치 점수
+    # --------------------------------------------------
+    def lookup(self, version: str, texts: Iterable) -> Dict:
+        """prepare() 후 캐시에 있는 고유 본문 점수를 채우고 miss 는 그대로 둠"""
+        batch = prepare(texts)
+        found = self.get_many(version, batch["keys"])
+        miss = []
+        for i, k in enumerate(batch["keys"]):
+            r = found.get(k)
+            if r is None:
+                miss.append(i)
+                continue
+            for f, v in zip(FIELDS, r):
+                batch["values"][f][i] = v
+        batch["miss"] = np.asarray(miss, dtype=np.int64)
+        return batch
+
+    def fill(self, version: str, batch: Dict, scored: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """miss 자리에 새 점수를 채우고 캐시에 저장, 행 순서 배열로 반환"""
+        miss = batch["miss"]
+        self.put_many(version, [batch["keys"][i] for i in miss], {f: np.asarray(scored[f]) for f in FIELDS})
+        return assemble(batch, scored)
+
+    def score(self, version: str, texts: Sequence, scorer: Callable[[List[str]], Dict[str, np.ndarray]]
+              ) -> Dict[str, np.ndarray]:
+        """texts 점수 (scorer 는 miss 인 정규화 본문만 받음)"""
+        batch = self.lookup(version, texts)
+        miss = batch["miss"]
+        scored = scorer([batch["norm"][i] for i in miss]) if len(miss) else {f: np.empty(0) for f in FIELDS}
+        return self.fill(version, batch, scored)
+
+
+#%%
+# 확인용
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="감성 점수 캐시 현황 / 정리")
+    ap.add_argument("--path", default=CACHE_PATH)
+    ap.add_argument("--drop", default="", help="지울 버전")
+    args = ap.parse_args()
+
+    cache = ScoreCache(args.path)
+    if args.drop:
+        print("삭제:", cache.drop(args.drop))
+    for v, n in cache.versions():
+        print(v, n)
+    cache.close()
@@ -0,0 +1,147 @@
+#%%
+# 댓글 CSV → 댓글별 사전 감성 점수 (comment_id, pos, neg, hits, score)
+# comments_crawling_adj.py 출력(contents) / yeowon 스크립트 출력(text_raw) 을 chunk 단위로 읽고
+# 프로세스 풀에서 점수를 매긴 뒤 입력 순서대로 이어 쓴다.
+# 동시에 들고 있는 chunk 수를 worker 수 × 2 로 묶어 두어 입력 크기와 관계없이 메모리가 일정하다.
+# 본문은 정규화 후 chunk 안에서 중복 제거하고, score_cache.py 캐시에 없는 본문만 worker 로 보낸다.
+# --model 을 주면 사전 대신 train_model.py 로 학습한 분류기로 점수 (출력 형식 같음).
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lexicon import Lexicon
+from score_cache import CACHE_PATH, FIELDS, ScoreCache, assemble, prepare
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+DATA_DIR = "../data/NAVER"
+COMMENT_CSV = f"{DATA_DIR}/comments/comments_2025_adj.csv"
+OUTPUT_DIR = f"{DATA_DIR}/sentiment"
+
+TEXT_COLS = ["contents", "text_raw"]   # comments_crawling_adj / yeowon
+ID_COL = "comment_id"
+CHUNKSIZE = 50_000
+
+_SCORER = None
+
+
+def load_scorer(lexicon: str = "", replace: bool = False, model: str = ""):
+    """사전(Lexicon) 또는 학습한 분류기(HashedModel). 둘 다 score_texts / version 을 가짐"""
+    if model:
+        from train_model import HashedModel
+        return HashedModel.load(model)
+    return Lexicon.load(lexicon, replace)
+
+
+def init_worker(lexicon: str, replace: bool, model: str = ""):
+    """worker initializer: 점수기를 프로세스마다 한 번 읽음 (사전은 정규식 컴파일까지)"""
+    global _SCORER
+    _SCORER = load_scorer(lexicon, replace, model)
+    if isinstance(_SCORER, Lexicon):
+        _SCORER.pattern
+
+
+def score_texts(texts: List[str]) -> Dict[str, np.ndarray]:
+    return _SCORER.score_texts(texts)
+
+
+def text_column(path: str) -> str:
+    header = pd.read_csv(path, encoding="utf-8-sig", nrows=0).columns
+    for c in TEXT_COLS:
+        if c in header:
+            return c
+    raise ValueError(f"{path}: 댓글 본문 컬럼({'/'.join(TEXT_COLS)})이 없음")
+
+
+def read_chunks(path: str, chunksize: int = CHUNKSIZE) -> Iterator[Tuple[List[str], List]]:
+    """(comment_id 목록, 본문 목록) chunk. comment_id 는 문자열 그대로 (큰 정수 / 앞자리 0 보존)"""
+    col = text_column(path)
+    for df in pd.read_csv(path, encoding="utf-8-sig", usecols=[ID_COL, col], dtype=str, chunksize=chunksize):
+        yield df[ID_COL].tolist(), df[col].tolist()
+
+
+def score_csv(path: str, out: str, lexicon: str = "", replace: bool = False,
+              workers: int = os.cpu_count(), chunksize: int = CHUNKSIZE,
+              cache: Optional[ScoreCache] = None, model: str = "") -> Dict[str, int]:
+    """
+    path 의 댓글을 모두 점수 매겨 out 에 저장. 반환: 댓글 수 / 고유 본문 수 / 실제로 점수 매긴 본문 수.
+    결과는 임시 파일에 쓰고 끝나면 교체하므로 중간에 멈춰도 이전 out 이 깨지지 않는다.
+    """
+    workers = max(1, workers or 1)
+    scorer = load_scorer(lexicon, replace, model)
+    version = ScoreCache.version_of("model" if model else "lexicon", scorer.version)
+    tmp = out + ".tmp"
+    stats = {"comments": 0, "unique": 0, "scored": 0}
+    first = True
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(lexicon, replace, model)) as ex:
+        pending = deque()
+
+        def flush_one():
+            nonlocal first
+            ids, batch, fut = pending.popleft()
+            scored = fut.result() if fut is not None else {f: np.empty(0) for f in FIELDS}
+            vals = cache.fill(version, batch, scored) if cache is not None else assemble(batch, scored)
+            res = pd.DataFrame(vals)
+            res.insert(0, ID_COL, ids)
+            res.to_csv(tmp, mode="w" if first else "a", header=first, index=False, encoding="utf-8-sig")
+            first = False
+            stats["comments"] += len(res)
+            stats["unique"] += len(batch["keys"])
+            stats["scored"] += len(batch["miss"])
+
+        for ids, texts in read_chunks(path, chunksize):
+            batch = cache.lookup(version, texts) if cache is not None else prepare(texts)
+            miss = batch["miss"]
+            fut = ex.submit(score_texts, [batch["norm"][i] for i in miss]) if len(miss) else None
+            pending.append((ids, batch, fut))
+            if len(pending) >= 2 * workers:
+                flush_one()
+        while pending:
+            flush_one()
+
+    if first:   # 댓글 없음: 헤더만
+        pd.DataFrame(columns=[ID_COL] + FIELDS).to_csv(tmp, index=False, encoding="utf-8-sig")
+    os.replace(tmp, out)
+    return stats
+
+
+def default_output(path: str) -> str:
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(OUTPUT_DIR, f"{name}_sentiment.csv")
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="댓글 CSV 사전 기반 감성 점수")
+    ap.add_argument("inputs", nargs="*", default=[COMMENT_CSV],
+                    help="댓글 CSV (comments_2025_adj.csv / yeowon comments_2025_top5.csv ...)")
+    ap.add_argument("--lexicon", default="", help="사용자 사전 CSV(term, weight) 또는 JSON")
+    ap.add_argument("--replace", action="store_true", help="기본 사전 없이 --lexicon 만 사용")
+    ap.add_argument("--model", default="", help="train_model.py 로 학습한 모델 (주면 사전 대신 사용)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    ap.add_argument("--cache", default=CACHE_PATH, help="점수 캐시 SQLite 경로")
+    ap.add_argument("--no_cache", action="store_true", help="캐시 없이 모두 다시 점수")
+    ap.add_argument("--out", default="", help="입력이 하나일 때 출력 경로 (기본: data/NAVER/sentiment/<입력>_sentiment.csv)")
+    args = ap.parse_args()
+
+    print("점수기 버전:", load_scorer(args.lexicon, args.replace, args.model).version)
+    cache = None if args.no_cache else ScoreCache(args.cache)
+    for src in args.inputs:
+        dst = args.out if args.out and len(args.inputs) == 1 else default_output(src)
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+        t0 = time.time()
+        st = score_csv(src, dst, args.lexicon, args.replace, args.workers, args.chunksize, cache, args.model)
+        dt = time.time() - t0
+        n = st["comments"]
+        print(f"{src}: {n}개 (고유 본문 {st['unique']}, 새로 점수 {st['scored']}) → {dst} "
+              f"({dt:.1f}s, {n / max(dt, 1e-9) * 3600:,.0f}개/시간)")
+    if cache is not None:
+        cache.close()
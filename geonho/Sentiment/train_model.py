@@ -0,0 +1,251 @@
+#%%
+# 댓글 감성 분류기 out-of-core 학습 (hashing 특징 + SGD partial_fit)
+# 전체 댓글을 DataFrame 하나로 읽고 어휘 사전을 만드는 대신,
+#   - 본문(text_raw / contents)을 chunk 단위로 읽고
+#   - 문자 n-gram 을 고정 크기 공간으로 해시 (HashingVectorizer, 상태 없음 → 형태소 분석기 없이 한국어에 적합,
+#     worker 마다 따로 만들어도 같은 특징)
+#   - 특징 만들기는 프로세스 풀에서 병렬, 선형 모델 갱신(partial_fit)은 순서대로 한 프로세스에서
+# 하므로 학습 시간은 데이터 크기에 선형, 메모리는 chunk 몇 개 분량으로 일정하다.
+# 각 chunk 는 학습 전에 현재 모델로 먼저 예측해 정확도를 누적 (progressive validation, 따로 떼어 둘 검증셋 불필요).
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from lexicon import Lexicon
+from score_cache import normalize
+from score_comments import ID_COL, text_column
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+MODEL_PATH = "../data/NAVER/sentiment/sgd_model.pkl"
+N_FEATURES = 2 ** 20
+NGRAM = (1, 3)
+CHUNKSIZE = 20_000
+WEAK_MIN_HITS = 1       # --weak: 사전 단어가 이만큼 이상 있고
+WEAK_MIN_ABS = 0.5      #         |score| 가 이 이상인 댓글만 라벨로 사용
+
+_VEC: Optional[HashingVectorizer] = None
+
+
+def make_vectorizer(n_features: int = N_FEATURES, ngram=NGRAM) -> HashingVectorizer:
+    # char_wb: 어절 경계 안에서 n-gram ('떡락했네' → '떡락', '락했' ...). alternate_sign 끔 → 값이 모두 양수
+    return HashingVectorizer(analyzer="char_wb", ngram_range=tuple(ngram), n_features=n_features,
+                             alternate_sign=False, norm="l2", dtype=np.float32)
+
+
+def init_worker(n_features: int, ngram):
+    global _VEC
+    _VEC = make_vectorizer(n_features, ngram)
+
+
+def featurize(texts: List[str]):
+    return _VEC.transform(texts)
+
+
+# --------------------------------------------------
+# 라벨이 붙은 chunk 읽기
+# --------------------------------------------------
+def labeled_chunks(path: str, label_col: str = "label", labels: Optional[Dict[str, float]] = None,
+                   weak: Optional[Lexicon] = None, chunksize: int = CHUNKSIZE) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """
+    (정규화 본문, 라벨) chunk. 라벨 출처 우선순위:
+      labels (comment_id → 라벨, 따로 라벨링한 작은 파일) > 입력 CSV 의 label_col > weak (사전 점수 부호, 약한 라벨)
+    라벨 없는 행은 버림.
+    """
+    col = text_column(path)
+    header = pd.read_csv(path, encoding="utf-8-sig", nrows=0).columns
+    use_col = labels is None and label_col in header
+    if labels is None and not use_col and weak is None:
+        raise ValueError(f"{path}: 라벨 컬럼 '{label_col}' 이 없음 (--labels 또는 --weak 지정)")
+    usecols = [ID_COL, col] + ([label_col] if use_col else [])
+    for df in pd.read_csv(path, encoding="utf-8-sig", usecols=usecols, dtype=str, chunksize=chunksize):
+        texts = [normalize(t) for t in df[col].tolist()]
+        if labels is not None:
+            y = df[ID_COL].map(labels).to_numpy(dtype=np.float64)
+        elif use_col:
+            y = pd.to_numeric(df[label_col], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            s = weak.score_texts(texts)
+            strong = (s["hits"] >= WEAK_MIN_HITS) & (np.abs(s["score"]) >= WEAK_MIN_ABS)
+            y = np.where(strong, np.sign(s["score"]), np.nan)
+        ok = ~np.isnan(y)
+        if ok.any():
+            yield [t for t, k in zip(texts, ok) if k], y[ok]
+
+
+def scan_classes(paths: List[str], label_col: str) -> np.ndarray:
+    """partial_fit 은 처음부터 전체 class 목록이 필요 → 라벨 컬럼만 한 번 훑음"""
+    seen = set()
+    for p in paths:
+        for df in pd.read_csv(p, encoding="utf-8-sig", usecols=[label_col], chunksize=1_000_000):
+            seen.update(pd.to_numeric(df[label_col], errors="coerce").dropna().unique().tolist())
+    return np.array(sorted(seen), dtype=np.float64)
+
+
+# --------------------------------------------------
+# 모델 / checkpoint
+# --------------------------------------------------
+class HashedModel:
+    """vectorizer 설정 + SGDClassifier + 학습 진행 상황. pickle 하나로 저장"""
+
+    def __init__(self, classes: np.ndarray, n_features: int = N_FEATURES, ngram=NGRAM, alpha: float = 1e-6,
+                 chunksize: int = CHUNKSIZE):
+        self.classes = np.asarray(classes, dtype=np.float64)
+        self.n_features = n_features
+        self.ngram = tuple(ngram)
+        self.clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=0)
+        self.progress: Dict[str, int] = {}   # "epoch:파일" → 학습 끝난 chunk 수
+        self.chunksize = chunksize             # progress 의 chunk 단위 (--resume 때 같아야 함)
+        self.seen = 0        # 학습한 샘플 수
+        self.evaluated = 0   # 학습 전에 예측해 본 샘플 수 (첫 chunk 는 모델이 없어 제외)
+        self.correct = 0
+        self._vec = None
+
+    def partial_fit(self, X, y: np.ndarray):
+        if self.seen:   # test-then-train
+            self.correct += int((self.clf.predict(X) == y).sum())
+            self.evaluated += len(y)
+        self.clf.partial_fit(X, y, classes=self.classes)
+        self.seen += len(y)
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.evaluated if self.evaluated else float("nan")
+
+    def save(self, path: str):
+        """속성 dict 만 pickle (python train_model.py 로 저장해도 __main__ 클래스에 묶이지 않게)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {k: v for k, v in self.__dict__.items() if k != "_vec"}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedModel":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        model = cls.__new__(cls)
+        model.chunksize = None   # 이 항목이 생기기 전 checkpoint
+        model.__dict__.update(state)
+        if "evaluated" not in state:   # 예전 checkpoint: 첫 chunk 도 분모에 있었음
+            model.evaluated = model.seen
+        model._vec = None
+        return model
+
+    # --------------------------------------------------
+    # 점수 (score_comments / score_cache 와 같은 형식)
+    # --------------------------------------------------
+    @property
+    def version(self) -> str:
+        h = hashlib.sha1(self.clf.coef_.tobytes())
+        h.update(self.clf.intercept_.tobytes())
+        h.update(repr((self.n_features, self.ngram, self.classes.tolist())).encode())
+        return h.hexdigest()[:12]
+
+    def score_texts(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        pos = 가장 큰 class 확률, neg = 가장 작은 class 확률, hits = 0,
+        score = 라벨 기댓값 Σ p_k · class_k (라벨이 -1/0/1 이면 -1~1)
+        """
+        if self._vec is None:
+            self._vec = make_vectorizer(self.n_features, self.ngram)
+        if len(texts) == 0:
+            return {"pos": np.empty(0), "neg": np.empty(0), "hits": np.empty(0, dtype=np.int32), "score": np.empty(0)}
+        p = self.clf.predict_proba(self._vec.transform(texts))
+        return {"pos": p[:, -1], "neg": p[:, 0], "hits": np.zeros(len(texts), dtype=np.int32),
+                "score": p @ self.clf.classes_}
+
+
+def train(paths: List[str], model_path: str = MODEL_PATH, label_col: str = "label",
+          labels_path: str = "", weak: bool = False, epochs: int = 1, resume: bool = False,
+          workers: int = os.cpu_count(), chunksize: int = CHUNKSIZE, checkpoint_every: int = 20,
+          n_features: int = N_FEATURES, ngram=NGRAM, alpha: float = 1e-6) -> HashedModel:
+    labels = None
+    if labels_path:
+        lab = pd.read_csv(labels_path, encoding="utf-8-sig", dtype={ID_COL: str})
+        labels = dict(zip(lab[ID_COL], pd.to_numeric(lab[label_col], errors="coerce")))
+    lex = Lexicon.default() if weak and labels is None else None
+
+    if resume and os.path.exists(model_path):
+        model = HashedModel.load(model_path)
+        if model.progress and model.chunksize not in (None, chunksize):
+            raise ValueError(f"checkpoint 는 chunksize={model.chunksize} 로 학습됨 (지금 {chunksize}): "
+                             f"chunk 번호로 이어 가므로 같은 --chunksize 로 실행해야 함")
+        model.chunksize = chunksize
+        print(f"이어서 학습: {model.seen}개 학습됨, progressive acc {model.accuracy:.4f}")
+    else:
+        if labels is not None:
+            classes = np.array(sorted({v for v in labels.values() if not np.isnan(v)}))
+        elif lex is not None:
+            classes = np.array([-1.0, 1.0])
+        else:
+            classes = scan_classes(paths, label_col)
+        model = HashedModel(classes, n_features, ngram, alpha, chunksize)
+
+    workers = max(1, workers or 1)
+    since = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(model.n_features, model.ngram)) as ex:
+        for ep in range(epochs):
+            for path in paths:
+                key = f"{ep}:{os.path.abspath(path)}"
+                done = model.progress.get(key, 0)
+                pending = deque()
+
+                def step():
+                    nonlocal since
+                    y, fut = pending.popleft()
+                    model.partial_fit(fut.result(), y)
+                    model.progress[key] = model.progress.get(key, 0) + 1
+                    since += 1
+                    if since >= checkpoint_every:
+                        model.save(model_path)
+                        since = 0
+
+                for i, (texts, y) in enumerate(labeled_chunks(path, label_col, labels, lex, chunksize)):
+                    if i < done:   # 이전 실행에서 학습한 chunk
+                        continue
+                    pending.append((y, ex.submit(featurize, texts)))
+                    if len(pending) >= 2 * workers:
+                        step()
+                while pending:
+                    step()
+                print(f"epoch {ep + 1} {path}: 누적 {model.seen}개, progressive acc {model.accuracy:.4f}")
+    model.save(model_path)
+    return model
+
+
+#%%
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="hashing 특징 + SGD 감성 분류기 out-of-core 학습")
+    ap.add_argument("inputs", nargs="+", help="댓글 CSV (text_raw / contents 컬럼)")
+    ap.add_argument("--label_col", default="label", help="라벨 컬럼 (-1/0/1 같은 숫자)")
+    ap.add_argument("--labels", default="", help="comment_id, label 라벨 파일 (입력 CSV 와 comment_id 로 연결)")
+    ap.add_argument("--weak", action="store_true", help="라벨 없이 사전 점수 부호를 약한 라벨로 사용")
+    ap.add_argument("--epochs", type=int, default=1)
+    ap.add_argument("--resume", action="store_true", help="checkpoint 에서 이어서")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    ap.add_argument("--checkpoint_every", type=int, default=20, help="chunk 몇 개마다 저장할지")
+    ap.add_argument("--n_features", type=int, default=N_FEATURES)
+    ap.add_argument("--ngram", nargs=2, type=int, default=list(NGRAM))
+    ap.add_argument("--alpha", type=float, default=1e-6)
+    ap.add_argument("--out", default=MODEL_PATH)
+    args = ap.parse_args()
+
+    t0 = time.time()
+    m = train(args.inputs, args.out, args.label_col, args.labels, args.weak, args.epochs, args.resume,
+              args.workers, args.chunksize, args.checkpoint_every, args.n_features, args.ngram, args.alpha)
+    print(f"저장: {args.out} (버전 {m.version}, {m.seen}개, acc {m.accuracy:.4f}, {time.time() - t0:.1f}s)")
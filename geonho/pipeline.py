@@ -0,0 +1,344 @@
+#%%
+# 기사 수집 → 댓글 수집 / OHLCV → breadth → oscillator → score 단계 DAG 실행기
+# 각 산출물마다 입력 파일 해시 + 파라미터 + 코드 해시(단계가 실제로 쓰는 모듈 소스 파일)를 기록해 두고,
+# 바뀐 것이 없는 단계는 건너뛴다. 서로 의존하지 않는 단계(시장 데이터 / 댓글)는 병렬 실행.
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, "Oscillator"))
+
+import oscillator  # noqa: E402
+
+# --------------------------------------------------
+# 설정
+# --------------------------------------------------
+STATE_PATH = os.path.join(ROOT, ".pipeline_state.json")
+
+NAVER_DIR = os.path.join(ROOT, "Naver_comments")
+OSC_DIR = os.path.join(ROOT, "Oscillator")
+ARTICLE_CSV = os.path.join(ROOT, "data/NAVER/article/articles_2025_financial.csv")
+COMMENT_CSV = os.path.join(ROOT, "data/NAVER/comments/comments_2025_adj.csv")
+OHLCV_CSV = os.path.join(OSC_DIR, "kospi_2018_2025_ohlcv.csv")
+BREADTH_CSV = os.path.join(OSC_DIR, "breadth_daily3.csv")
+OSC_CSV = os.path.join(OSC_DIR, "oscillator_2019_2025.csv")
+SCORE_CSV = os.path.join(OSC_DIR, "osc_score_2020_2025.csv")
+
+
+@dataclass
+class Stage:
+    """
+    func 단계: func(*inputs, *outputs, **params) 호출
+    cmd 단계: cwd 에서 cmd 실행 (크롤러 스크립트). 입력 파일이 없으면 산출물이 없을 때만 실행.
+    deps: 코드 해시에 더할 소스 파일 (자동으로 못 찾는 것, 예: 동적으로 import 하는 모듈)
+    """
+    name: str
+    outputs: List[str]
+    inputs: List[str] = field(default_factory=list)
+    func: Optional[Callable] = None
+    cmd: Optional[List[str]] = None
+    cwd: Optional[str] = None
+    params: Dict = field(default_factory=dict)
+    deps: List[str] = field(default_factory=list)
+
+
+def default_stages() -> List[Stage]:
+    py = sys.executable
+    return [
+        # 댓글 브랜치
+        Stage("articles", cmd=[py, "article_crawling.py"], cwd=NAVER_DIR,
+              outputs=[ARTICLE_CSV]),
+        Stage("comments", cmd=[py, "comments_crawling_adj.py"], cwd=NAVER_DIR,
+              inputs=[ARTICLE_CSV], outputs=[COMMENT_CSV]),
+        # 시장 데이터 브랜치
+        Stage("ohlcv", func=oscillator.run_fetch, outputs=[OHLCV_CSV],
+              params={"start": oscillator.START, "end": oscillator.END}),
+        Stage("breadth", func=oscillator.run_breadth, inputs=[OHLCV_CSV], outputs=[BREADTH_CSV],
+              params={"alpha_fast": oscillator.ALPHA_FAST, "alpha_slow": oscillator.ALPHA_SLOW}),
+        Stage("oscillator", func=oscillator.run_oscillator, inputs=[BREADTH_CSV], outputs=[OSC_CSV],
+              params={"start": oscillator.OSC_START, "end": oscillator.OSC_END}),
+        Stage("score", func=oscillator.run_score, inputs=[OSC_CSV], outputs=[SCORE_CSV],
+              params={"window": oscillator.WINDOW, "clip_c": oscillator.CLIP_C}),
+    ]
+
+
+# --------------------------------------------------
+# 해시 / 상태 파일
+# --------------------------------------------------
+def load_state(path: str = STATE_PATH) -> Dict:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"files": {}, "stages": {}}
+
+
+def save_state(state: Dict, path: str = STATE_PATH):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def file_hash(path: str, state: Dict) -> Optional[str]:
+    """파일 내용 sha256 (size, mtime 이 같으면 이전 해시 재사용)"""
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    cached = state["files"].get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    state["files"][path] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def code_names(code) -> set:
+    """함수 본문(중첩 함수 포함)에서 쓰는 전역 이름"""
+    names = set(code.co_names)
+    for c in code.co_consts:
+        if inspect.iscode(c):
+            names |= code_names(c)
+    return names
+
+
+def home_names(home, func: Callable) -> set:
+    """func 와, func 가 부르는 같은 모듈 안 함수들이 쓰는 전역 이름 (전이적으로)"""
+    names, stack, done = set(), [func], set()
+    while stack:
+        f = stack.pop()
+        if f in done:
+            continue
+        done.add(f)
+        for n in code_names(f.__code__):
+            names.add(n)
+            v = vars(home).get(n)
+            if inspect.isfunction(v) and v.__module__ == home.__name__:
+                stack.append(v)
+    return names
+
+
+def referenced_module(mod, name: str):
+    v = vars(mod).get(name)
+    if inspect.ismodule(v):
+        return v
+    if inspect.isfunction(v) or inspect.isclass(v):
+        return sys.modules.get(v.__module__)
+    return None
+
+
+def local_module_files(func: Callable) -> List[str]:
+    """
+    func 가 정의된 모듈과, 그 모듈이 (전이적으로) import 한 이 저장소 안 모듈의 소스 파일.
+    oscillator.run_breadth 처럼 얇은 wrapper 가 실제로 돌리는 breadth.py 등이 바뀌어도 다시 실행되게.
+    """
+    files = set()
+    home = inspect.getmodule(func)
+    todo = [home]
+    seen = set()
+    if home is not None:
+        # 정의된 모듈 자체는 파일만 넣고, 따라갈 모듈은 func 가 실제로 쓰는 이름에서 시작
+        seen.add(home.__name__)
+        files.add(os.path.abspath(home.__file__))
+        todo = [referenced_module(home, n) for n in home_names(home, func)]
+    while todo:
+        mod = todo.pop()
+        if mod is None or mod.__name__ in seen:
+            continue
+        seen.add(mod.__name__)
+        path = getattr(mod, "__file__", None)
+        if not path or not os.path.abspath(path).startswith(ROOT + os.sep):
+            continue
+        files.add(os.path.abspath(path))
+        for v in vars(mod).values():
+            if inspect.ismodule(v):
+                todo.append(v)
+            elif inspect.isfunction(v) or inspect.isclass(v):
+                todo.append(sys.modules.get(v.__module__))
+    return sorted(files)
+
+
+def script_module_files(path: str) -> List[str]:
+    """
+    스크립트와, 그 스크립트가 (전이적으로) import 하는 같은 디렉터리 모듈의 소스 파일.
+    cmd 단계는 import 할 수 없으니 소스를 ast 로 읽어 import 문만 본다 (함수 안 import 포함).
+    """
+    files, todo = set(), [os.path.abspath(path)]
+    while todo:
+        p = todo.pop()
+        if p in files or not os.path.exists(p):
+            continue
+        files.add(p)
+        with open(p, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=p)
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names += [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.append(node.module)
+        todo += [os.path.join(os.path.dirname(p), n.split(".")[0] + ".py") for n in names]
+    return sorted(files)
+
+
+def code_files(stage: Stage) -> List[str]:
+    if stage.func is not None:
+        files = local_module_files(stage.func)
+    else:   # cmd 단계: 실행하는 스크립트와 그 스크립트가 import 하는 로컬 모듈
+        files = [f for a in stage.cmd if a.endswith(".py")
+                 for f in script_module_files(os.path.join(stage.cwd or ".", a))]
+    return sorted(set(os.path.abspath(p) for p in files + list(stage.deps)))
+
+
+def code_hash(stage: Stage, state: Dict) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps(stage.cmd if stage.func is None else stage.func.__qualname__).encode("utf-8"))
+    for p in code_files(stage):
+        h.update(f"{os.path.relpath(p, ROOT)}:{file_hash(p, state)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def stage_key(stage: Stage, state: Dict) -> str:
+    payload = {
+        "inputs": {p: file_hash(p, state) for p in stage.inputs},
+        "params": stage.params,
+        "code": code_hash(stage, state),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def is_up_to_date(stage: Stage, key: str, state: Dict) -> bool:
+    rec = state["stages"].get(stage.name)
+    if not rec and not stage.inputs and stage.outputs and all(os.path.exists(p) for p in stage.outputs):
+        # 입력이 없는 수집 단계는 기존 산출물을 그대로 채택 (몇 시간짜리 크롤링 재실행 방지)
+        record(stage, key, state)
+        return True
+    if not rec or rec["key"] != key:
+        return False
+    # 산출물이 지워졌거나 손으로 바뀌었으면 다시 실행
+    return all(file_hash(p, state) == rec["outputs"].get(p) for p in stage.outputs)
+
+
+def record(stage: Stage, key: str, state: Dict):
+    state["stages"][stage.name] = {
+        "key": key,
+        "outputs": {p: file_hash(p, state) for p in stage.outputs},
+        "params": stage.params,
+        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# --------------------------------------------------
+# 실행
+# --------------------------------------------------
+def run_stage(stage: Stage):
+    """worker 프로세스에서 단계 하나 실행"""
+    for p in stage.outputs:
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+    t0 = time.time()
+    if stage.func is not None:
+        stage.func(*stage.inputs, *stage.outputs, **stage.params)
+    else:
+        subprocess.run(stage.cmd, cwd=stage.cwd, check=True)
+    return time.time() - t0
+
+
+def upstream(stages: List[Stage]) -> Dict[str, List[str]]:
+    """단계별 선행 단계 이름 (입력 파일을 만드는 단계)"""
+    producer = {p: s.name for s in stages for p in s.outputs}
+    return {s.name: [producer[p] for p in s.inputs if p in producer] for s in stages}
+
+
+def select(stages: List[Stage], targets: List[str]) -> List[Stage]:
+    """targets 와 그 선행 단계만 남김"""
+    if not targets:
+        return stages
+    deps = upstream(stages)
+    keep, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name in keep:
+            continue
+        keep.add(name)
+        todo.extend(deps[name])
+    return [s for s in stages if s.name in keep]
+
+
+def run_pipeline(stages: List[Stage], jobs: int = 2, force: Optional[List[str]] = None,
+                 dry_run: bool = False, state_path: str = STATE_PATH) -> Dict[str, str]:
+    """
+    준비된 단계부터 병렬 실행. 반환: 단계 이름 → 'ran' | 'skipped' | 'stale'
+    dry_run: 실행도 상태 파일 저장도 하지 않음. 선행 단계가 stale 이면 입력이 바뀔 것이라 후행 단계도 stale.
+    """
+    force = set(force or [])
+    state = load_state(state_path)
+    deps = upstream(stages)
+    by_name = {s.name: s for s in stages}
+    status: Dict[str, str] = {}
+    pending = [s.name for s in stages]
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        while pending or running:
+            for name in list(pending):
+                if any(d not in status for d in deps[name]):
+                    continue
+                pending.remove(name)
+                stage = by_name[name]
+                key = stage_key(stage, state)
+                upstream_stale = any(status[d] == "stale" for d in deps[name])
+                if name not in force and not upstream_stale and is_up_to_date(stage, key, state):
+                    status[name] = "skipped"
+                    print(f"[skip] {name}")
+                    continue
+                if dry_run:
+                    status[name] = "stale"
+                    print(f"[stale] {name}")
+                    continue
+                print(f"[run ] {name}")
+                running[ex.submit(run_stage, stage)] = (name, key)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, key = running.pop(fut)
+                elapsed = fut.result()
+                record(by_name[name], key, state)
+                save_state(state, state_path)
+                status[name] = "ran"
+                print(f"[done] {name} ({elapsed:.1f}s)")
+
+    if not dry_run:
+        save_state(state, state_path)
+    return status
+
+
+def main():
+    ap = argparse.ArgumentParser(description="크롤링 → 공포·탐욕 점수 파이프라인")
+    ap.add_argument("targets", nargs="*", help="실행할 단계 (생략 시 전체)")
+    ap.add_argument("--jobs", type=int, default=2)
+    ap.add_argument("--force", nargs="*", default=[], help="해시와 무관하게 다시 실행할 단계")
+    ap.add_argument("--dry_run", action="store_true", help="실행하지 않고 갱신 필요한 단계만 출력")
+    args = ap.parse_args()
+
+    stages = select(default_stages(), args.targets)
+    status = run_pipeline(stages, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    print(json.dumps(status, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
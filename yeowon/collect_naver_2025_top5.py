@@ -4,8 +4,10 @@
 import argparse
 import csv
 import json
+import os
 import random
 import re
+import sys
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -16,6 +18,12 @@ import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+# geonho/Naver_comments 공용 모듈 (SQLite store, dedup index 등)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "geonho", "Naver_comments"))
+import comment_db  # noqa: E402
+from dedup_index import DedupIndex, NEWS, COMMENT, scoped  # noqa: E402
+from telemetry import TELEMETRY  # noqa: E402
+
 
 KEYWORDS = ["위기", "침체", "불황", "부도", "파산", "금융위기", "쇼크"]
 
@@ -45,11 +53,13 @@ def make_session() -> requests.Session:
         ),
         "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.7",
     })
+    s.hooks["response"].append(TELEMETRY.on_response)
     return s
 
 
 def safe_sleep(base: float):
-    time.sleep(base + random.uniform(0.0, base * 0.5))
+    with TELEMETRY.stage("sleep"):
+        time.sleep(base + random.uniform(0.0, base * 0.5))
 
 
 def daterange_yyyymmdd(start_yyyymmdd: str, end_yyyymmdd: str) -> Iterable[str]:
@@ -169,15 +179,17 @@ def fetch_section_articles_for_day(session: requests.Session, date: str, sid2: i
             except Exception:
                 break
 
-        html_snips = [s for s in flatten_strings(data) if "/article/" in s]
-        page_new = 0
-        for snip in html_snips:
-            for url, title in parse_articles_from_html(snip):
-                if url in seen:
-                    continue
-                seen.add(url)
-                all_items.append((url, title))
-                page_new += 1
+        TELEMETRY.count("pages")
+        with TELEMETRY.stage("parse", endpoint="SECTION_ARTICLE_LIST_FOR_LATEST"):
+            html_snips = [s for s in flatten_strings(data) if "/article/" in s]
+            page_new = 0
+            for snip in html_snips:
+                for url, title in parse_articles_from_html(snip):
+                    if url in seen:
+                        continue
+                    seen.add(url)
+                    all_items.append((url, title))
+                    page_new += 1
 
         # update next token (best-effort)
         found_next = None
@@ -272,11 +284,13 @@ def fetch_comments(session: requests.Session, article_url: str, template_url: st
     if r.status_code != 200:
         return []
 
-    body = strip_jsonp(r.text)
-    try:
-        data = json.loads(body)
-    except Exception:
-        return []
+    TELEMETRY.count("pages")
+    with TELEMETRY.stage("parse", endpoint="web_naver_list_jsonp.json"):
+        body = strip_jsonp(r.text)
+        try:
+            data = json.loads(body)
+        except Exception:
+            return []
 
     comments = []
 
@@ -320,8 +334,9 @@ def ensure_csv(path: str, header: List[str]):
 def append_rows(path: str, rows: List[List]):
     if not rows:
         return
-    with open(path, "a", encoding="utf-8-sig", newline="") as f:
-        csv.writer(f).writerows(rows)
+    with TELEMETRY.stage("write"):
+        with open(path, "a", encoding="utf-8-sig", newline="") as f:
+            csv.writer(f).writerows(rows)
 
 
 def main():
@@ -335,18 +350,37 @@ def main():
     ap.add_argument("--out_news", default="news_2025_top5.csv")
     ap.add_argument("--out_comments", default="comments_2025_top5.csv")
     ap.add_argument("--test_days", type=int, default=0, help="예: 3이면 3일만 테스트")
+    ap.add_argument("--db", default="", help="SQLite store 경로 (지정 시 기사/댓글을 함께 적재)")
+    ap.add_argument("--dedup_dir", default="", help="공용 dedup index 경로 (지정 시 이전 실행에서 저장한 기사/댓글 제외)")
+    ap.add_argument("--telemetry_dir", default="", help="계측 snapshot(JSON/Prometheus) 저장 경로")
+    ap.add_argument("--telemetry_interval", type=float, default=30.0)
+    ap.add_argument("--trace", action="store_true", help="span trace 파일도 기록")
     args = ap.parse_args()
 
     session = make_session()
+    con = comment_db.connect(args.db) if args.db else None
+    dedup = DedupIndex(args.dedup_dir) if args.dedup_dir else None
+    if args.telemetry_dir:
+        TELEMETRY.start(args.telemetry_dir, interval=args.telemetry_interval, trace=args.trace,
+                        prefix="collect_naver_2025_top5")
 
-    ensure_csv(args.out_news, [
+    news_header = [
         "news_date", "news_id", "section", "keyword", "title",
         "comment_total", "rank", "url"
-    ])
-    ensure_csv(args.out_comments, [
+    ]
+    comment_header = [
         "news_id", "comment_id", "comment_at", "sort",
         "text_raw", "like_count", "dislike_count"
-    ])
+    ]
+    ensure_csv(args.out_news, news_header)
+    ensure_csv(args.out_comments, comment_header)
+
+    # dedup key 는 출력 CSV 별로 (다른 크롤러가 저장한 기사가 이 top5 에서 빠지지 않게)
+    news_kind = scoped(NEWS, args.out_news)
+    comment_kind = scoped(COMMENT, args.out_comments)
+    if dedup is not None:   # 처음이면 CSV 전체, 아니면 지난 실행이 쓰고 등록하기 전에 멈춘 꼬리 행만
+        dedup.sync_csv(args.out_news, news_kind, "news_id")
+        dedup.sync_csv(args.out_comments, comment_kind, "comment_id")
 
     dates = list(daterange_yyyymmdd(args.start, args.end))
     if args.test_days > 0:
@@ -395,19 +429,26 @@ def main():
             if len(top) >= args.topk:
                 break
 
-        if not top:
+        # 순위는 이번 실행의 댓글 수 기준으로 먼저 매기고, 이전 실행에서 저장한 기사는 그 다음에 뺌
+        # (뺀 자리를 아래 순위 기사로 채우면 rank 가 틀어짐)
+        ranked = [(rank, c, a) for rank, (c, a) in enumerate(top, start=1)]
+        if dedup is not None:
+            ranked = [(rank, c, a) for rank, c, a in ranked if not dedup.seen(news_kind, f"{a.oid}_{a.aid}")]
+
+        if not ranked:
             continue
 
         # 3) news 저장
         news_rows = []
-        for rank, (c, a) in enumerate(top, start=1):
+        for rank, c, a in ranked:
             news_id = f"{a.oid}_{a.aid}"
             news_rows.append([date, news_id, a.sid2, a.keyword, a.title, c, rank, a.url])
         append_rows(args.out_news, news_rows)
+        TELEMETRY.count("articles", len(news_rows))
 
         # 4) 댓글 저장 (공감30 + 최신30)
         comment_rows = []
-        for _, a in top:
+        for _, _, a in ranked:
             news_id = f"{a.oid}_{a.aid}"
 
             fav = fetch_comments(session, a.url, args.comment_template_url, a.object_id,
@@ -420,6 +461,8 @@ def main():
                 merged[item["comment_id"]] = item  # comment_id로 중복 제거
 
             for item in merged.values():
+                if dedup is not None and dedup.seen(comment_kind, item["comment_id"]):
+                    continue
                 comment_rows.append([
                     news_id,
                     item["comment_id"],
@@ -431,6 +474,15 @@ def main():
                 ])
 
         append_rows(args.out_comments, comment_rows)
+        TELEMETRY.count("comments", len(comment_rows))
+        if dedup is not None:
+            dedup.add_many(news_kind, [r[1] for r in news_rows])
+            dedup.add_many(comment_kind, [r[1] for r in comment_rows])
+            dedup.mark_csv(args.out_news)
+            dedup.mark_csv(args.out_comments)
+        if con is not None:
+            comment_db.insert_articles(con, [dict(zip(news_header, r)) for r in news_rows], source="collect_naver_2025_top5")
+            comment_db.insert_comments(con, [dict(zip(comment_header, r)) for r in comment_rows], source="collect_naver_2025_top5")
         safe_sleep(args.sleep)
 
 
@@ -4,8 +4,10 @@
 import argparse
 import csv
 import json
+import os
 import random
 import re
+import sys
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -16,6 +18,12 @@ import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+# geonho/Naver_comments 공용 모듈 (SQLite store, dedup index 등)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "geonho", "Naver_comments"))
+import comment_db  # noqa: E402
+from dedup_index import DedupIndex, NEWS, COMMENT, scoped  # noqa: E402
+from telemetry import TELEMETRY  # noqa: E402
+
 
 KEYWORDS = ["주식", "한국증시", "삼성전자", "SK하이닉스"]
 
@@ -46,11 +54,13 @@ def make_session() -> requests.Session:
         ),
         "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.7",
     })
+    s.hooks["response"].append(TELEMETRY.on_response)
     return s
 
 
 def safe_sleep(base: float):
-    time.sleep(base + random.uniform(0.0, base * 0.5))
+    with TELEMETRY.stage("sleep"):
+        time.sleep(base + random.uniform(0.0, base * 0.5))
 
 
 def daterange_yyyymmdd(start_yyyymmdd: str, end_yyyymmdd: str) -> Iterable[str]:
@@ -127,7 +137,8 @@ def get_article_published_yyyymmdd(session: requests.Session, article_url: str,
         if r.status_code != 200:
             return ""
         html = r.text
-        soup = BeautifulSoup(html, "html.parser")
+        with TELEMETRY.stage("parse", endpoint="article"):
+            soup = BeautifulSoup(html, "html.parser")
 
         meta = soup.find("meta", attrs={"property": "article:published_time"})
         if meta and meta.get("content"):
@@ -232,15 +243,17 @@ def fetch_section_articles_for_day(session: requests.Session, date: str, sid2: i
             except Exception:
                 break
 
-        html_snips = [s for s in flatten_strings(data) if "/article/" in s]
-        page_new = 0
-        for snip in html_snips:
-            for url, title in parse_articles_from_html(snip):
-                if url in seen:
-                    continue
-                seen.add(url)
-                all_items.append((url, title))
-                page_new += 1
+        TELEMETRY.count("pages")
+        with TELEMETRY.stage("parse", endpoint="SECTION_ARTICLE_LIST_FOR_LATEST"):
+            html_snips = [s for s in flatten_strings(data) if "/article/" in s]
+            page_new = 0
+            for snip in html_snips:
+                for url, title in parse_articles_from_html(snip):
+                    if url in seen:
+                        continue
+                    seen.add(url)
+                    all_items.append((url, title))
+                    page_new += 1
 
         found_next = None
         if isinstance(data, dict) and isinstance(data.get("next"), str):
@@ -380,13 +393,15 @@ def fetch_comments_page(session: requests.Session, article_url: str, template_ur
     if r.status_code != 200:
         return [], None, None
 
-    body = strip_jsonp(r.text)
-    try:
-        data = json.loads(body)
-    except Exception:
-        return [], None, None
+    with TELEMETRY.stage("parse", endpoint="web_naver_list_jsonp.json"):
+        body = strip_jsonp(r.text)
+        try:
+            data = json.loads(body)
+        except Exception:
+            return [], None, None
 
-    comments, next_id, end_id = parse_comments_from_payload(data, sort=sort)
+        comments, next_id, end_id = parse_comments_from_payload(data, sort=sort)
+    TELEMETRY.count("pages")
     safe_sleep(sleep_sec)
     return comments, next_id, end_id
 
@@ -461,8 +476,9 @@ def ensure_csv(path: str, header: List[str]):
 def append_rows(path: str, rows: List[List]):
     if not rows:
         return
-    with open(path, "a", encoding="utf-8-sig", newline="") as f:
-        csv.writer(f).writerows(rows)
+    with TELEMETRY.stage("write"):
+        with open(path, "a", encoding="utf-8-sig", newline="") as f:
+            csv.writer(f).writerows(rows)
 
 
 def main():
@@ -476,6 +492,11 @@ def main():
     ap.add_argument("--out_news", default="news_2025_top5.csv")
     ap.add_argument("--out_comments", default="comments_2025_top5.csv")
     ap.add_argument("--test_days", type=int, default=0, help="예: 3이면 3일만 테스트")
+    ap.add_argument("--db", default="", help="SQLite store 경로 (지정 시 기사/댓글을 함께 적재)")
+    ap.add_argument("--dedup_dir", default="", help="공용 dedup index 경로 (지정 시 이전 실행에서 저장한 기사/댓글 제외)")
+    ap.add_argument("--telemetry_dir", default="", help="계측 snapshot(JSON/Prometheus) 저장 경로")
+    ap.add_argument("--telemetry_interval", type=float, default=30.0)
+    ap.add_argument("--trace", action="store_true", help="span trace 파일도 기록")
     ap.add_argument("--comment_page_size", type=int, default=100)
     ap.add_argument("--max_comment_pages", type=int, default=50)
     ap.add_argument("--strict_pubdate", action="store_true",
@@ -483,15 +504,29 @@ def main():
     args = ap.parse_args()
 
     session = make_session()
+    con = comment_db.connect(args.db) if args.db else None
+    dedup = DedupIndex(args.dedup_dir) if args.dedup_dir else None
+    if args.telemetry_dir:
+        TELEMETRY.start(args.telemetry_dir, interval=args.telemetry_interval, trace=args.trace,
+                        prefix="naver_comments_2025_new")
 
-    ensure_csv(args.out_news, [
+    news_header = [
         "loop_date", "pub_date", "news_id", "section", "keyword", "title",
         "comment_total_all", "rank_in_section", "url"
-    ])
-    ensure_csv(args.out_comments, [
+    ]
+    comment_header = [
         "news_id", "pub_date", "comment_id", "comment_at",
         "text_raw", "like_count", "dislike_count"
-    ])
+    ]
+    ensure_csv(args.out_news, news_header)
+    ensure_csv(args.out_comments, comment_header)
+
+    # dedup key 는 출력 CSV 별로 (다른 크롤러가 저장한 기사가 이 top5 에서 빠지지 않게)
+    news_kind = scoped(NEWS, args.out_news)
+    comment_kind = scoped(COMMENT, args.out_comments)
+    if dedup is not None:   # 처음이면 CSV 전체, 아니면 지난 실행이 쓰고 등록하기 전에 멈춘 꼬리 행만
+        dedup.sync_csv(args.out_news, news_kind, "news_id")
+        dedup.sync_csv(args.out_comments, comment_kind, "comment_id")
 
     dates = list(daterange_yyyymmdd(args.start, args.end))
     if args.test_days > 0:
@@ -561,6 +596,11 @@ def main():
             for rank, (c_total, a) in enumerate(top, start=1):
                 news_id = f"{a.oid}_{a.aid}"
 
+                # 순위는 이번 실행 기준으로 매긴 뒤, 이전 실행에서 저장한 기사는 쓰기 직전에 뺌 (rank 유지)
+                if dedup is not None and dedup.seen(news_kind, news_id):
+                    processed_news.add(news_id)
+                    continue
+
                 pub_date = a.pub_date or loop_date
 
                 if args.strict_pubdate and pub_date != loop_date:
@@ -587,6 +627,8 @@ def main():
                 )
 
                 for it in day_comments:
+                    if dedup is not None and dedup.seen(comment_kind, it["comment_id"]):
+                        continue
                     comment_rows.append([
                         news_id,
                         pub_date,
@@ -599,6 +641,16 @@ def main():
 
             append_rows(args.out_news, news_rows)
             append_rows(args.out_comments, comment_rows)
+            TELEMETRY.count("articles", len(news_rows))
+            TELEMETRY.count("comments", len(comment_rows))
+            if dedup is not None:
+                dedup.add_many(news_kind, [r[2] for r in news_rows])
+                dedup.add_many(comment_kind, [r[2] for r in comment_rows])
+                dedup.mark_csv(args.out_news)
+                dedup.mark_csv(args.out_comments)
+            if con is not None:
+                comment_db.insert_articles(con, [dict(zip(news_header, r)) for r in news_rows], source="naver_comments_2025_new")
+                comment_db.insert_comments(con, [dict(zip(comment_header, r)) for r in comment_rows], source="naver_comments_2025_new")
             safe_sleep(args.sleep)
 
 